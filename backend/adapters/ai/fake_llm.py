@@ -0,0 +1,256 @@
+"""
+Deterministic fake chat model behind FakeLLMProvider (adapters/ai/fake_provider.py) and
+scripts/fake_llm_server.py (OpenAI-compatible HTTP). Standard library only, so the
+server runs without the app's settings, database or litellm.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Call sites recognised from the prompt text alone (the fake server only sees messages)
+_PROMPT_MARKERS: List[Tuple[str, str]] = [
+    ("receipt_extraction", "intelligent receipt parser"),
+    ("expense_parse", "intelligent expense parser"),
+    ("recurring_names", "Simplify these bank transaction titles"),
+    ("auto_categorize", "intelligent transaction classifier"),
+    ("nl_query", "structured JSON query object"),
+    ("budget_suggestions", "pragmatic budget advisor"),
+    ("spending_challenges", "gamification expert"),
+    ("monthly_audit", "Personal CFO"),
+    ("budget_forecast", "The user has a budget of"),
+    ("financial_advice", "financial advisor"),
+    ("expense_breakdown", "Analyze the following expense data"),
+]
+
+_MERCHANTS = ["Starbucks", "BigBasket", "Uber", "Amazon", "Swiggy", "DMart", "Apollo Pharmacy", "PVR Cinemas"]
+_TIPS = [
+    "Skip one takeaway order this week and cook instead.",
+    "Set a weekly cash limit for this category and stick to it.",
+    "Pause non-essential purchases in this category until the month ends.",
+    "Review your subscriptions and cancel one you rarely use.",
+]
+
+
+@dataclass
+class FakeLLMConfig:
+    latency_ms: float = 800.0 # median time to the (first chunk of the) response
+    latency_sigma: float = 0.5 # log-normal spread; 0 = always latency_ms
+    error_rate: float = 0.0
+    chunk_ms: float = 15.0 # delay between streamed chunks
+    seed: int = 0
+
+
+class FakeLLM:
+    """
+    Deterministic stand-in for a chat model. Responses depend only on the prompt (same prompt,
+    same answer) and are schema-valid for the call site the prompt belongs to, built from the
+    ids, categories and amounts in the prompt. Latency and failures are drawn from a seeded RNG.
+    """
+
+    def __init__(self, config: Optional[FakeLLMConfig] = None):
+        self.config = config or FakeLLMConfig()
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+
+    def sample_latency(self) -> float:
+        """Seconds to wait before responding."""
+        with self._rng_lock:
+            if self.config.latency_sigma <= 0:
+                return self.config.latency_ms / 1000
+            return self._rng.lognormvariate(0.0, self.config.latency_sigma) * self.config.latency_ms / 1000
+
+    def should_fail(self) -> bool:
+        with self._rng_lock:
+            return self._rng.random() < self.config.error_rate
+
+    @staticmethod
+    def detect_call_site(prompt: str) -> str:
+        for call_site, marker in _PROMPT_MARKERS:
+            if marker in prompt:
+                return call_site
+        return "default"
+
+    def respond(self, prompt: str, call_site: Optional[str] = None) -> str:
+        """Response text for the prompt: JSON for structured call sites, prose otherwise."""
+        if not call_site or call_site == "default":
+            call_site = self.detect_call_site(prompt)
+        rng = random.Random(hashlib.sha256(prompt.encode()).digest())
+        builder = _BUILDERS.get(call_site)
+        if builder is None:
+            return _prose(prompt, rng, call_site)
+        return json.dumps(builder(prompt, rng))
+
+    def chunks(self, text: str) -> Iterator[str]:
+        """Splits a response into word-sized stream chunks (whitespace kept)."""
+        yield from re.findall(r"\S+\s*|\s+", text)
+
+
+# --- prompt parsing -------------------------------------------------------
+
+def _json_after(prompt: str, marker: str, default: Any) -> Any:
+    """The first JSON array/object following `marker` in the prompt."""
+    start = prompt.find(marker)
+    if start < 0:
+        return default
+    match = re.search(r"[\[{]", prompt[start + len(marker):])
+    if not match:
+        return default
+    try:
+        value, _ = json.JSONDecoder().raw_decode(prompt, start + len(marker) + match.start())
+        return value
+    except ValueError:
+        return default
+
+
+def _line_value(prompt: str, label: str) -> Optional[str]:
+    match = re.search(re.escape(label) + r"\s*(.*)", prompt)
+    return match.group(1).strip() if match else None
+
+
+def _id_categories(text: Optional[str]) -> List[Tuple[int, str]]:
+    """Parses "12:Food, 13:Transport" category lists."""
+    return [(int(cid), name.strip()) for cid, name in re.findall(r"(\d+):([^,\n]+)", text or "")]
+
+
+def _current_date(prompt: str) -> str:
+    value = _line_value(prompt, "Current Date:")
+    return value[:10] if value else time.strftime("%Y-%m-%d")
+
+
+def _match_category(text: str, categories: List[Tuple[int, str]], rng: random.Random) -> Optional[int]:
+    lowered = text.lower()
+    for cid, name in categories:
+        if name.lower() in lowered or any(word in lowered for word in name.lower().split() if len(word) > 3):
+            return cid
+    return rng.choice(categories)[0] if categories else None
+
+
+def _round_up(value: float, step: int = 100) -> int:
+    return int(-(-value // step) * step) if value > 0 else 0
+
+
+# --- per call site responses ----------------------------------------------
+
+def _receipt(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    categories = _id_categories(_line_value(prompt, "User's Categories (ID:Name):"))
+    merchant = rng.choice(_MERCHANTS)
+    return {
+        "title": merchant,
+        "amount": round(rng.uniform(50, 5000), 2),
+        "date": _current_date(prompt),
+        "category_id": _match_category(merchant, categories, rng),
+    }
+
+
+def _expense_parse(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    text = _line_value(prompt, "User Input:") or ""
+    text = text.strip('"')
+    amount = re.search(r"\d+(?:\.\d+)?", text.replace(",", ""))
+    title = re.sub(r"[\d.,₹]+|\brs\b", " ", text, flags=re.I).split()
+    return {
+        "title": " ".join(title[:3]).title() or "Expense",
+        "amount": float(amount.group()) if amount else round(rng.uniform(50, 2000), 2),
+        "date": _current_date(prompt),
+        "category_id": _match_category(text, _id_categories(_line_value(prompt, "User's Categories (ID:Name):")), rng),
+    }
+
+
+def _recurring_names(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    titles = _json_after(prompt, "Titles:", [])
+    names = []
+    for title in titles:
+        words = re.sub(r"\.(com|in|net)\b|[^A-Za-z ]+", " ", str(title)).split()
+        names.append(" ".join(words[:2]).title() or str(title))
+    return {"names": names}
+
+
+def _auto_categorize(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    categories = _id_categories(prompt.split("Categories available (ID:Name):", 1)[-1].split("Transactions to categorize:", 1)[0])
+    transactions = _json_after(prompt, "Transactions to categorize:", [])
+    mappings = []
+    for transaction in transactions:
+        # Leave roughly one in ten alone, as the prompt allows when unsure
+        if categories and rng.random() >= 0.1:
+            mappings.append({"id": transaction.get("id"), "category_id": _match_category(str(transaction.get("title", "")), categories, rng)})
+    return {"mappings": mappings}
+
+
+def _nl_query(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    question = (_line_value(prompt, "User Question:") or "").strip('"').lower()
+    categories = [c.strip() for c in (_line_value(prompt, "User's Categories:") or "").strip("[]").split(",") if c.strip()]
+    category = next((c for c in categories if c.lower() in question), None)
+    operation = "count_transactions" if "how many" in question else "average_spend" if "average" in question else "total_spend"
+    return {
+        "operation": operation,
+        "filters": {"category_name": category, "start_date": None, "end_date": None, "merchant_name": None, "type": "expense"},
+        "group_by": None,
+        "limit": 5,
+        "compare_start_date": None,
+        "compare_end_date": None,
+        "human_readable_answer_template": "The answer is {value}." if operation == "count_transactions" else "You spent {value}" + (f" on {category}." if category else "."),
+    }
+
+
+def _budget_suggestions(prompt: str, rng: random.Random) -> List[Dict[str, Any]]:
+    return [{
+        "category_id": item.get("category_id"),
+        "amount": _round_up(float(item.get("avg_monthly") or 0) * 1.08),
+        "reason": f"Average is {float(item.get('avg_monthly') or 0):.0f}, rounded up with a small buffer.",
+    } for item in _json_after(prompt, "Data:", [])]
+
+
+def _spending_challenges(prompt: str, rng: random.Random) -> List[Dict[str, Any]]:
+    available = [c.strip() for c in (_line_value(prompt, "Available Category List:") or "").strip("[]").split(",") if c.strip()]
+    heavy = re.findall(r"- (.+?): spent \d+ last 30 days \(~(\d+)/week\)", prompt)
+    challenges = []
+    for name, weekly in heavy[:3]:
+        target = _round_up(int(weekly) * 0.75, 50)
+        challenges.append({
+            "title": f"{name} Detox",
+            "description": f"Limit {name} spending to {target} this week.",
+            "category_name": name if name in available or not available else "Uncategorized",
+            "target_amount": target,
+        })
+    return challenges
+
+
+def _monthly_audit(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    spent = re.search(r"Total Spent: ([\d.]+)", prompt)
+    income = re.search(r"Total Income: ([\d.]+)", prompt)
+    spent = float(spent.group(1)) if spent else 0.0
+    income = float(income.group(1)) if income else 0.0
+    savings_rate = (income - spent) / income * 100 if income > 0 else 0.0
+    grade = "A" if savings_rate >= 30 else "B" if savings_rate >= 20 else "C" if savings_rate >= 10 else "D" if savings_rate > 0 else "F"
+    top = re.search(r"Top Spending:\s*- ([^:\n]+)", prompt)
+    return {
+        "grade": grade,
+        "leakage": f"{top.group(1).strip() if top else 'Dining Out'} is your largest expense; check it for waste.",
+        "inflation_check": "Spending is roughly flat month-over-month.",
+        "action_item": rng.choice(_TIPS),
+    }
+
+
+def _prose(prompt: str, rng: random.Random, call_site: str) -> str:
+    if call_site == "budget_forecast":
+        return rng.choice(_TIPS)
+    # "- Food: ₹1,498 (23%, 7 txns)" lines of the financial summary
+    names = re.findall(r"^\s*- ([^:\n]+): ₹", prompt, flags=re.M)[:3] or ["Food", "Shopping", "Transport"]
+    lines = [f"{i}. **{name}**: {rng.choice(_TIPS)}" for i, name in enumerate(names, 1)]
+    return "\n".join(lines)
+
+
+_BUILDERS = {
+    "receipt_extraction": _receipt,
+    "expense_parse": _expense_parse,
+    "recurring_names": _recurring_names,
+    "auto_categorize": _auto_categorize,
+    "nl_query": _nl_query,
+    "budget_suggestions": _budget_suggestions,
+    "spending_challenges": _spending_challenges,
+    "monthly_audit": _monthly_audit,
+}
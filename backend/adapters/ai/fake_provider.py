@@ -0,0 +1,73 @@
+import json
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from backend.adapters.ai.fake_llm import FakeLLM, FakeLLMConfig
+from backend.adapters.ai.llm_provider import LLMProvider, circuit_breaker
+from backend.adapters.ai.prompt_builder import estimate_tokens
+from backend.adapters.ai.usage import check_quota, record_usage
+from backend.core.config import settings
+
+FAKE_MODEL = "fake-llm"
+
+
+class FakeLLMError(RuntimeError):
+    """Injected failure, raised at the configured error rate."""
+
+
+class FakeLLMProvider(LLMProvider):
+    """In-process LLMProvider backed by FakeLLM; records usage and enforces quotas like the real one."""
+
+    def __init__(self, user_id: Optional[int] = None, fake: Optional[FakeLLM] = None):
+        self.user_id = user_id
+        self.fake = fake or default_fake_llm()
+        self.breaker = circuit_breaker(str(user_id), endpoint=FAKE_MODEL) # so injected errors exercise the fallbacks
+
+    def ensure_available(self, call_site: str = "default"):
+        self.breaker.check()
+
+    def _call(self, prompt: str, call_site: str) -> str:
+        check_quota(self.user_id)
+        self.breaker.before_call()
+        delay = self.fake.sample_latency()
+        time.sleep(delay)
+        if self.fake.should_fail():
+            self.breaker.record_failure()
+            record_usage(self.user_id, call_site, FAKE_MODEL, estimate_tokens(prompt), 0, delay * 1000, success=False, estimated=True)
+            raise FakeLLMError(f"Injected failure for '{call_site}'.")
+        self.breaker.record_success()
+        content = self.fake.respond(prompt, call_site)
+        record_usage(self.user_id, call_site, FAKE_MODEL, estimate_tokens(prompt), estimate_tokens(content), delay * 1000, estimated=True)
+        return content
+
+    def generate_text(self, prompt: str, system_prompt: Optional[str] = None, model: Optional[str] = None, temperature: float = 0.7, images: Optional[List[str]] = None, max_tokens: Optional[int] = None, call_site: str = "default") -> str:
+        return self._call(prompt, call_site)
+
+    def generate_json(self, prompt: str, system_prompt: Optional[str] = None, model: Optional[str] = None, temperature: float = 0.0, images: Optional[List[str]] = None, max_tokens: Optional[int] = None, call_site: str = "default") -> Dict[str, Any]:
+        return json.loads(self._call(prompt, call_site))
+
+    def stream_text(self, prompt: str, system_prompt: Optional[str] = None, model: Optional[str] = None, temperature: float = 0.7, max_tokens: Optional[int] = None, call_site: str = "default") -> Iterator[str]:
+        content = self._call(prompt, call_site)
+        for chunk in self.fake.chunks(content):
+            yield chunk
+            time.sleep(self.fake.config.chunk_ms / 1000)
+
+
+_default_fake: Optional[FakeLLM] = None
+_default_fake_lock = threading.Lock()
+
+
+def default_fake_llm() -> FakeLLM:
+    """Process-wide FakeLLM configured from LLM_FAKE_* settings (one RNG stream for all users)."""
+    global _default_fake
+    with _default_fake_lock:
+        if _default_fake is None:
+            _default_fake = FakeLLM(FakeLLMConfig(
+                latency_ms=settings.LLM_FAKE_LATENCY_MS,
+                latency_sigma=settings.LLM_FAKE_LATENCY_SIGMA,
+                error_rate=settings.LLM_FAKE_ERROR_RATE,
+                chunk_ms=settings.LLM_FAKE_CHUNK_MS,
+                seed=settings.LLM_FAKE_SEED,
+            ))
+        return _default_fake
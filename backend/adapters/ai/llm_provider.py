@@ -1,33 +1,256 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import hashlib
 import json
 import logging
-import litellm
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+from backend.adapters.ai.prompt_builder import estimate_tokens
+from backend.adapters.ai.usage import check_quota, record_usage, response_token_counts
+from backend.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+_litellm_module = None
+_litellm_lock = threading.Lock()
+
+
+def get_litellm():
+    """
+    litellm, imported on first use: it takes seconds to import, and most processes (CLI scripts,
+    workers that never serve an AI request) never need it.
+    """
+    global _litellm_module
+    if _litellm_module is None:
+        with _litellm_lock:
+            if _litellm_module is None:
+                import httpx
+                import litellm
+                # One pooled HTTP client for all users: litellm caches an SDK client per API key, built around this
+                litellm.client_session = httpx.Client(
+                    limits=httpx.Limits(max_connections=settings.LLM_HTTP_MAX_CONNECTIONS, max_keepalive_connections=settings.LLM_HTTP_MAX_CONNECTIONS),
+                    follow_redirects=True,
+                )
+                _litellm_module = litellm
+    return _litellm_module
+
+LOCAL_MODEL_PREFIX = "local:"
+HEALTH_WINDOW = 50 # calls per model kept for rolling latency/error stats
+HEALTH_WINDOW_SECONDS = 300 # older calls are ignored, so a demoted model is retried once they expire
+_UNHEALTHY_MIN_CALLS = 5
+_UNHEALTHY_ERROR_RATE = 0.5
+
+
+class ModelRouter:
+    """
+    Chooses models per call site. Each call site maps to a tier (LLM_CALL_SITE_TIERS), each
+    tier to an ordered list of models (LLM_MODEL_TIERS) that are tried in turn on timeout or
+    error; once a tier's models are exhausted the call escalates to the next tier
+    (LLM_TIER_FALLBACKS, e.g. fast -> smart). Rolling latency/error stats per model demote
+    models that have recently been failing to the end of their tier. "local:<name>" entries go
+    to the OpenAI-compatible LLM_LOCAL_BASE_URL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, deque] = {}
+
+    def candidates(self, call_site: str, model: Optional[str] = None) -> List[str]:
+        """Models to try, in order. An explicit `model` bypasses routing."""
+        if model:
+            return [model]
+        first_tier = tier = settings.LLM_CALL_SITE_TIERS.get(call_site, settings.LLM_DEFAULT_TIER)
+        ordered: List[str] = []
+        tiers_seen = set()
+        while tier and tier not in tiers_seen:
+            tiers_seen.add(tier)
+            models = [m for m in settings.LLM_MODEL_TIERS.get(tier, [])
+                      if m not in ordered and (not m.startswith(LOCAL_MODEL_PREFIX) or settings.LLM_LOCAL_BASE_URL)]
+            # Stable sort: configured order within healthy/unhealthy groups, per tier
+            ordered.extend(sorted(models, key=self._unhealthy))
+            tier = settings.LLM_TIER_FALLBACKS.get(tier)
+        if not ordered:
+            raise ValueError(f"No models configured for tier '{first_tier}' (call site '{call_site}').")
+        return ordered
+
+    def record(self, model: str, latency_ms: float, ok: bool):
+        with self._lock:
+            self._calls.setdefault(model, deque(maxlen=HEALTH_WINDOW)).append((time.monotonic(), latency_ms, ok))
+
+    def _recent(self, model: str) -> List[tuple]:
+        """(latency_ms, ok) for the model's calls within HEALTH_WINDOW_SECONDS."""
+        cutoff = time.monotonic() - HEALTH_WINDOW_SECONDS
+        with self._lock:
+            return [(latency, ok) for at, latency, ok in self._calls.get(model, ()) if at >= cutoff]
+
+    def _unhealthy(self, model: str) -> bool:
+        calls = self._recent(model)
+        if len(calls) < _UNHEALTHY_MIN_CALLS:
+            return False
+        return sum(1 for _, ok in calls if not ok) / len(calls) >= _UNHEALTHY_ERROR_RATE
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            models = list(self._calls)
+        stats = {}
+        for model in models:
+            calls = self._recent(model)
+            if not calls:
+                continue
+            latencies = sorted(latency for latency, ok in calls if ok)
+            stats[model] = {
+                "calls": len(calls),
+                "error_rate": round(sum(1 for _, ok in calls if not ok) / len(calls), 3),
+                "latency_ms_p50": round(latencies[len(latencies) // 2], 1) if latencies else None,
+                "latency_ms_p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1) if latencies else None,
+                "healthy": not self._unhealthy(model),
+            }
+        return stats
+
+
+model_router = ModelRouter()
+
+
+class CircuitOpenError(Exception):
+    """The provider is failing: calls fail fast until its circuit breaker lets a probe through."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. LLM_BREAKER_FAILURE_THRESHOLD consecutive failed calls (after
+    model failover) open it. Open: calls fail fast with CircuitOpenError for
+    LLM_BREAKER_RESET_SECONDS. Half-open: one probe call goes through; success closes the
+    circuit, failure reopens it.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if now - self._opened_at < settings.LLM_BREAKER_RESET_SECONDS:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def _probe_in_flight(self, now: float) -> bool:
+        # A probe that never reports back (e.g. an abandoned stream) stops blocking after one reset period
+        return self._probe_started is not None and now - self._probe_started < settings.LLM_BREAKER_RESET_SECONDS
+
+    def _rejection(self, now: float) -> Optional[CircuitOpenError]:
+        state = self._state(now)
+        if state == self.CLOSED or (state == self.HALF_OPEN and not self._probe_in_flight(now)):
+            return None
+        since = self._probe_started if state == self.HALF_OPEN else self._opened_at
+        retry_after = max(1.0, settings.LLM_BREAKER_RESET_SECONDS - (now - since))
+        return CircuitOpenError(f"The AI provider is temporarily unavailable. Please try again in {math.ceil(retry_after)} seconds.", retry_after)
+
+    def check(self):
+        """Raises CircuitOpenError if a call now would be rejected. Does not claim the half-open probe."""
+        with self._lock:
+            error = self._rejection(time.monotonic())
+        if error:
+            raise error
+
+    def before_call(self):
+        """Admits a call or raises CircuitOpenError; in half-open state the admitted call is the probe."""
+        with self._lock:
+            now = time.monotonic()
+            error = self._rejection(now)
+            if error:
+                raise error
+            if self._state(now) == self.HALF_OPEN:
+                self._probe_started = now
+                logger.info(f"Circuit {self.name} half-open: probing the provider.")
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Circuit {self.name} closed: provider is answering again.")
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is None and self._failures < settings.LLM_BREAKER_FAILURE_THRESHOLD:
+                return
+            if self._opened_at is None:
+                logger.warning(f"Circuit {self.name} opened after {self._failures} consecutive failures.")
+            elif self._probe_started is not None:
+                logger.warning(f"Circuit {self.name} probe failed; staying open.")
+            self._opened_at = time.monotonic()
+            self._probe_started = None
+
+
+# Breakers per (endpoint, key): a failing local server must not fail fast the hosted models, and the
+# other way round. Shared by every provider instance (and request) calling that endpoint with that key.
+PROVIDER_ENDPOINT = "provider" # hosted models, wherever litellm routes them by name
+_breakers: "OrderedDict[Tuple[str, str], CircuitBreaker]" = OrderedDict()
+_breakers_lock = threading.Lock()
+_BREAKERS_MAX_ENTRIES = 4096
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Stable, non-reversible id for an API key, safe to log and to use as a cache key."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def circuit_breaker(api_key: str, endpoint: str = PROVIDER_ENDPOINT) -> CircuitBreaker:
+    key = (endpoint, key_fingerprint(api_key or ""))
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is not None:
+            _breakers.move_to_end(key)
+            return breaker
+        breaker = _breakers[key] = CircuitBreaker(f"{endpoint}:{key[1]}")
+        while len(_breakers) > _BREAKERS_MAX_ENTRIES:
+            _breakers.popitem(last=False) # least recently used; busy open circuits stay
+        return breaker
+
+
 class LLMProvider(ABC):
     @abstractmethod
-    def generate_text(self, prompt: str, system_prompt: Optional[str] = None, model: str = "gpt-3.5-turbo", temperature: float = 0.7, images: Optional[List[str]] = None) -> str:
-        """Generates text from an LLM."""
+    def generate_text(self, prompt: str, system_prompt: Optional[str] = None, model: Optional[str] = None, temperature: float = 0.7, images: Optional[List[str]] = None, max_tokens: Optional[int] = None, call_site: str = "default") -> str:
+        """Generates text from an LLM. Without `model`, the model is routed by `call_site`."""
         pass
 
     @abstractmethod
-    def generate_json(self, prompt: str, system_prompt: Optional[str] = None, model: str = "gpt-3.5-turbo", temperature: float = 0.0, images: Optional[List[str]] = None) -> Dict[str, Any]:
+    def generate_json(self, prompt: str, system_prompt: Optional[str] = None, model: Optional[str] = None, temperature: float = 0.0, images: Optional[List[str]] = None, max_tokens: Optional[int] = None, call_site: str = "default") -> Dict[str, Any]:
         """Generates structured JSON from an LLM."""
         pass
 
+    def stream_text(self, prompt: str, system_prompt: Optional[str] = None, model: Optional[str] = None, temperature: float = 0.7, max_tokens: Optional[int] = None, call_site: str = "default") -> Iterator[str]:
+        """Yields the completion in chunks as they arrive. Providers without streaming yield it whole."""
+        yield self.generate_text(prompt, system_prompt=system_prompt, model=model, temperature=temperature, max_tokens=max_tokens, call_site=call_site)
+
+    def ensure_available(self, call_site: str = "default"):
+        """Raises CircuitOpenError while every model for `call_site` is failing fast. Always available by default."""
+        pass
+
 class LiteLLMProvider(LLMProvider):
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, user_id: Optional[int] = None):
         self.api_key = api_key
-        # litellm can pick up OPENAI_API_KEY env var, but we pass it explicitly if we have it from user settings.
-        # However, for different providers, we might need to set standard env vars or pass params.
-        # For simplicity here, we assume the user is passing an OpenAI-compatible key or we configure it.
-        # If the user wants "all models", they might provide different keys. 
-        # But our current app logic retrieves one 'openai_api_key' from user settings.
-        # We will set it as environment variable for litellm to be safe if generic.
-        import os
-        os.environ["OPENAI_API_KEY"] = api_key
+        self.user_id = user_id # usage is recorded and quotas enforced per user
+        # The key is passed per call (see _model_params), never through process-wide env vars
 
     def _prepare_messages(self, prompt: str, system_prompt: Optional[str], images: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         messages = []
@@ -46,33 +269,181 @@ class LiteLLMProvider(LLMProvider):
             messages.append({"role": "user", "content": prompt})
         return messages
 
-    def generate_text(self, prompt: str, system_prompt: Optional[str] = None, model: str = "gpt-3.5-turbo", temperature: float = 0.7, images: Optional[List[str]] = None) -> str:
-        messages = self._prepare_messages(prompt, system_prompt, images)
+    def _model_params(self, model: str) -> Dict[str, Any]:
+        """litellm arguments for a routed model name."""
+        if model.startswith(LOCAL_MODEL_PREFIX):
+            return {
+                "model": "openai/" + model[len(LOCAL_MODEL_PREFIX):],
+                "api_base": settings.LLM_LOCAL_BASE_URL,
+                "api_key": settings.LLM_LOCAL_API_KEY,
+            }
+        return {"model": model, "api_key": self.api_key}
+
+    def _breaker(self, model: str) -> CircuitBreaker:
+        if model.startswith(LOCAL_MODEL_PREFIX):
+            return circuit_breaker(settings.LLM_LOCAL_API_KEY, endpoint=settings.LLM_LOCAL_BASE_URL or "local")
+        return circuit_breaker(self.api_key)
+
+    def ensure_available(self, call_site: str = "default"):
+        error = None
+        for candidate in model_router.candidates(call_site):
+            try:
+                self._breaker(candidate).check()
+                return
+            except CircuitOpenError as e:
+                error = error or e
+        raise error
+
+    def _failover(self, call_site: str, model: Optional[str], attempt: Callable[[str], Any]) -> Any:
+        """
+        Runs `attempt(model)` under the user's quota through the call site's models until one
+        succeeds, skipping models whose endpoint circuit is open. Each endpoint's breaker records
+        one outcome per call: success if one of its models answered, failure if all it tried failed.
+        """
+        check_quota(self.user_id)
+        candidates = model_router.candidates(call_site, model)
+        admitted, failed = [], []
+        error = None
+        for i, candidate in enumerate(candidates):
+            breaker = self._breaker(candidate)
+            if breaker not in admitted:
+                try:
+                    breaker.before_call()
+                except CircuitOpenError as e:
+                    error = error or e
+                    continue
+                admitted.append(breaker)
+            try:
+                result = attempt(candidate)
+            except Exception as e:
+                error = e
+                if breaker not in failed:
+                    failed.append(breaker)
+                if i < len(candidates) - 1:
+                    logger.warning(f"Model {candidate} failed for '{call_site}' ({e}); falling back to {candidates[i + 1]}.")
+                continue
+            breaker.record_success()
+            for other in failed:
+                if other is not breaker:
+                    other.record_failure()
+            return result
+        for breaker in failed:
+            breaker.record_failure()
+        raise error
+
+    def _complete(self, call_site: str, model: Optional[str], messages: List[Dict[str, Any]], **kwargs) -> str:
+        """Runs a completion under the user's quota, failing over through the call site's models."""
+        return self._failover(call_site, model, lambda candidate: self._complete_with(call_site, candidate, messages, **kwargs))
+
+    def _complete_with(self, call_site: str, model: str, messages: List[Dict[str, Any]], **kwargs) -> str:
+        """One completion on one model; records tokens, cost and latency."""
+        started = time.perf_counter()
+        try:
+            response = get_litellm().completion(messages=messages, timeout=settings.LLM_TIMEOUT_SECONDS, **self._model_params(model), **kwargs)
+        except Exception:
+            latency_ms = (time.perf_counter() - started) * 1000
+            model_router.record(model, latency_ms, ok=False)
+            record_usage(self.user_id, call_site, model, estimate_tokens(self._prompt_text(messages)), 0, latency_ms, success=False, estimated=True)
+            raise
+        latency_ms = (time.perf_counter() - started) * 1000
+        model_router.record(model, latency_ms, ok=True)
+        content = response.choices[0].message.content.strip()
+
+        counts = response_token_counts(response)
+        estimated = counts is None
+        if estimated:
+            counts = (estimate_tokens(self._prompt_text(messages)), estimate_tokens(content))
+        try:
+            cost = get_litellm().completion_cost(completion_response=response) or 0.0
+        except Exception:
+            cost = 0.0 # model missing from litellm's price map (e.g. local models)
+        record_usage(self.user_id, call_site, model, *counts, latency_ms, cost_usd=cost, estimated=estimated)
+        return content
+
+    def stream_text(self, prompt: str, system_prompt: Optional[str] = None, model: Optional[str] = None, temperature: float = 0.7, max_tokens: Optional[int] = None, call_site: str = "default") -> Iterator[str]:
+        messages = self._prepare_messages(prompt, system_prompt)
 
+        def start(candidate: str):
+            # Nothing has been sent to the caller before the first chunk, so another model can still answer;
+            # after it, the endpoint is answering and a mid-stream error is not an outage signal
+            stream = self._stream_with(call_site, candidate, messages, temperature=temperature, max_tokens=max_tokens)
+            return stream, next(stream, None)
+
+        stream, first = self._failover(call_site, model, start)
+        if first is not None:
+            yield first
+        yield from stream
+
+    def _stream_with(self, call_site: str, model: str, messages: List[Dict[str, Any]], **kwargs) -> Iterator[str]:
+        started = time.perf_counter()
+        first_chunk_ms = None
+        parts: List[str] = []
+        counts = None
         try:
-            response = litellm.completion(
-                model=model,
+            response = get_litellm().completion(
                 messages=messages,
-                temperature=temperature,
-                api_key=self.api_key
+                timeout=settings.LLM_TIMEOUT_SECONDS,
+                stream=True,
+                stream_options={"include_usage": True},
+                **self._model_params(model),
+                **kwargs
             )
-            return response.choices[0].message.content.strip()
+            for chunk in response:
+                counts = response_token_counts(chunk) or counts
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_chunk_ms is None:
+                        first_chunk_ms = (time.perf_counter() - started) * 1000
+                    parts.append(delta)
+                    yield delta
+        except (Exception, GeneratorExit) as e:
+            # GeneratorExit: the consumer (e.g. a disconnected client) stopped reading mid-stream
+            if not isinstance(e, GeneratorExit):
+                logger.error(f"LiteLLM Streaming Error: {e}")
+                model_router.record(model, (time.perf_counter() - started) * 1000, ok=False)
+            latency_ms = (time.perf_counter() - started) * 1000
+            record_usage(self.user_id, call_site, model, estimate_tokens(self._prompt_text(messages)), estimate_tokens("".join(parts)), latency_ms, success=False, estimated=True)
+            raise
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        # Time to first chunk is what a streaming caller waits for
+        model_router.record(model, first_chunk_ms or latency_ms, ok=True)
+        content = "".join(parts)
+        estimated = counts is None
+        if estimated:
+            counts = (estimate_tokens(self._prompt_text(messages)), estimate_tokens(content))
+        try:
+            cost = sum(get_litellm().cost_per_token(model=model, prompt_tokens=counts[0], completion_tokens=counts[1]))
+        except Exception:
+            cost = 0.0
+        logger.info(f"Streamed '{call_site}' for user {self.user_id} on {model}: first chunk after {first_chunk_ms or latency_ms:.0f} ms.")
+        record_usage(self.user_id, call_site, model, *counts, latency_ms, cost_usd=cost, estimated=estimated)
+
+    @staticmethod
+    def _prompt_text(messages: List[Dict[str, Any]]) -> str:
+        return "\n".join(m["content"] if isinstance(m["content"], str) else m["content"][0]["text"] for m in messages)
+
+    def generate_text(self, prompt: str, system_prompt: Optional[str] = None, model: Optional[str] = None, temperature: float = 0.7, images: Optional[List[str]] = None, max_tokens: Optional[int] = None, call_site: str = "default") -> str:
+        messages = self._prepare_messages(prompt, system_prompt, images)
+
+        try:
+            return self._complete(call_site, model, messages, temperature=temperature, max_tokens=max_tokens)
         except Exception as e:
             logger.error(f"LiteLLM Text Generation Error: {e}")
             raise e
 
-    def generate_json(self, prompt: str, system_prompt: Optional[str] = None, model: str = "gpt-3.5-turbo", temperature: float = 0.0, images: Optional[List[str]] = None) -> Dict[str, Any]:
+    def generate_json(self, prompt: str, system_prompt: Optional[str] = None, model: Optional[str] = None, temperature: float = 0.0, images: Optional[List[str]] = None, max_tokens: Optional[int] = None, call_site: str = "default") -> Dict[str, Any]:
         messages = self._prepare_messages(prompt, system_prompt, images)
 
         try:
-            response = litellm.completion(
-                model=model,
-                messages=messages,
+            content = self._complete(
+                call_site, model, messages,
                 temperature=temperature,
                 response_format={"type": "json_object"}, # litellm abstracts this for supported providers
-                api_key=self.api_key
+                max_tokens=max_tokens
             )
-            content = response.choices[0].message.content.strip()
             
             # Simple cleanup just in case provider doesn't strictly support json mode
             if content.startswith("```json"):
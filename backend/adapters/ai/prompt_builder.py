@@ -0,0 +1,75 @@
+import math
+from typing import Callable, List, Optional
+
+# Conservative for English prose mixed with numbers, dates and ₹ (which tokenise worse than words)
+CHARS_PER_TOKEN = 3.5
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Local token estimate; no tokenizer download or network call."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class PromptBuilder:
+    """
+    Assembles the data section of a prompt under a token budget.
+
+    Sections are added in priority order. Required text is always kept; lists keep as many
+    lines as still fit and collapse the rest into a one-line summary, and `rows_that_fit`
+    tells callers how many rows to fetch (SQL LIMIT) before they query at all.
+    """
+
+    def __init__(self, budget_tokens: int):
+        self.budget_tokens = budget_tokens
+        self.used_tokens = 0
+        self._parts: List[str] = []
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.budget_tokens - self.used_tokens)
+
+    def add(self, text: str):
+        """Adds text unconditionally (headline figures the prompt cannot do without)."""
+        self._parts.append(text)
+        self.used_tokens += estimate_tokens(text) + 1
+
+    def rows_that_fit(self, sample_row: str, share: float = 1.0, reserve_tokens: int = 20, cap: Optional[int] = None) -> int:
+        """How many rows shaped like `sample_row` fit in `share` of the remaining budget."""
+        available = int(self.remaining * share) - reserve_tokens
+        rows = max(0, available // max(1, estimate_tokens(sample_row) + 1))
+        return min(rows, cap) if cap is not None else rows
+
+    def add_list(self, header: str, lines: List[str], tail: Optional[Callable[[int], str]] = None, share: float = 1.0) -> int:
+        """
+        Adds `header` and as many `lines` as fit in `share` of the remaining budget. If lines are
+        dropped, `tail(omitted)` renders a summary line for them. Returns the number of lines kept.
+        """
+        if not lines:
+            return 0
+        budget = int(self.remaining * share)
+        cost = estimate_tokens(header) + 1
+        tail_reserve = estimate_tokens(tail(len(lines))) + 1 if tail else 0
+
+        kept: List[str] = []
+        for i, line in enumerate(lines):
+            line_cost = estimate_tokens(line) + 1
+            # The last line does not need room for a tail after it
+            reserve = tail_reserve if i < len(lines) - 1 else 0
+            if cost + line_cost + reserve > budget:
+                break
+            kept.append(line)
+            cost += line_cost
+
+        if not kept and budget < cost:
+            return 0
+        block = [header] + kept
+        omitted = len(lines) - len(kept)
+        if omitted and tail:
+            block.append(tail(omitted))
+        self.add("\n".join(block))
+        return len(kept)
+
+    def build(self) -> str:
+        return "\n\n".join(self._parts)
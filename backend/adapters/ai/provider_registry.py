@@ -0,0 +1,58 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from backend.adapters.ai.fake_provider import FakeLLMProvider
+from backend.adapters.ai.llm_provider import LiteLLMProvider, LLMProvider, key_fingerprint
+from backend.adapters.database.models import UserSettings
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# user_id -> (resolved_at, key fingerprint, provider); fingerprint and provider are None without a key
+_providers: Dict[int, Tuple[float, Optional[str], Optional[LLMProvider]]] = {}
+_providers_lock = threading.Lock()
+_PROVIDERS_MAX_ENTRIES = 4096
+
+
+def get_provider(session: Session, user_id: int) -> Optional[LLMProvider]:
+    """
+    The user's configured provider, or None if they have no API key. Providers are reused
+    across requests; the user's settings are re-read after LLM_PROVIDER_CACHE_TTL_SECONDS and
+    the provider is only rebuilt when the key has changed.
+    """
+    if settings.LLM_FAKE_PROVIDER:
+        return FakeLLMProvider(user_id)
+
+    now = time.monotonic()
+    with _providers_lock:
+        cached = _providers.get(user_id)
+    if cached and now - cached[0] < settings.LLM_PROVIDER_CACHE_TTL_SECONDS:
+        return cached[2]
+
+    user_settings = session.exec(select(UserSettings).where(UserSettings.user_id == user_id)).first()
+    api_key = user_settings.openai_api_key if user_settings else None
+    fingerprint = key_fingerprint(api_key) if api_key else None
+    if cached and cached[1] == fingerprint:
+        provider = cached[2]
+    elif api_key:
+        provider = LiteLLMProvider(api_key=api_key, user_id=user_id)
+        logger.info(f"LLMProvider created for user {user_id} (key {fingerprint}).")
+    else:
+        provider = None
+        logger.warning(f"No OpenAI API key found for user {user_id}. AI features will be disabled.")
+
+    with _providers_lock:
+        if user_id not in _providers and len(_providers) >= _PROVIDERS_MAX_ENTRIES:
+            _providers.clear()
+        _providers[user_id] = (now, fingerprint, provider)
+    return provider
+
+
+def invalidate_provider(user_id: int):
+    """Drops the user's cached provider, e.g. after their API key changes."""
+    with _providers_lock:
+        _providers.pop(user_id, None)
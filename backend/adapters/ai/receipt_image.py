@@ -0,0 +1,128 @@
+import asyncio
+import io
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-user recent scans: user_id -> OrderedDict[fingerprint -> (stored_at, extraction)]
+_scan_cache: Dict[int, "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]"] = {}
+_scan_cache_lock = threading.Lock()
+_SCAN_CACHE_PER_USER = 50
+_SCAN_CACHE_MAX_USERS = 1024
+
+FINGERPRINT_SIZE = (24, 32)  # portrait thumbnail, one byte per pixel
+_MIN_FINGERPRINT_STD = 8.0
+
+# Bounded, so concurrent uploads cannot decode more full-size photos at once than this
+_preprocess_pool = ThreadPoolExecutor(max_workers=settings.RECEIPT_PREPROCESS_WORKERS, thread_name_prefix="receipt-image")
+
+
+class ReceiptImageError(ValueError):
+    """The upload is not a usable image (unreadable or too large)."""
+
+
+@dataclass
+class PreparedReceipt:
+    data: bytes
+    media_type: str
+    width: int
+    height: int
+    original_size: int
+    fingerprint: Optional[bytes]  # perceptual thumbnail, see `fingerprint`; None if too featureless to match on
+
+
+def prepare_receipt(data: bytes, max_long_edge: Optional[int] = None, grayscale: Optional[bool] = None) -> PreparedReceipt:
+    """
+    Normalises a receipt photo for the vision model: applies the EXIF orientation, downscales
+    to `max_long_edge` and recompresses as JPEG. CPU-bound; run it off the event loop.
+    """
+    max_long_edge = max_long_edge or settings.RECEIPT_MAX_LONG_EDGE
+    grayscale = settings.RECEIPT_GRAYSCALE if grayscale is None else grayscale
+    if len(data) > settings.RECEIPT_MAX_UPLOAD_BYTES:
+        raise ReceiptImageError(f"Receipt image is too large (max {settings.RECEIPT_MAX_UPLOAD_BYTES // (1024 * 1024)} MB).")
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        # JPEG only: decode at a reduced DCT scale instead of full resolution
+        image.draft("L" if grayscale else "RGB", (max_long_edge, max_long_edge))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("L" if grayscale else "RGB")
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        logger.warning(f"Unreadable receipt upload ({len(data)} bytes): {e}")
+        raise ReceiptImageError("Could not read the receipt image. Please upload a JPEG, PNG or WebP photo.")
+
+    image.thumbnail((max_long_edge, max_long_edge), Image.Resampling.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, format="JPEG", quality=settings.RECEIPT_JPEG_QUALITY, optimize=True)
+    prepared = PreparedReceipt(
+        data=out.getvalue(),
+        media_type="image/jpeg",
+        width=image.width,
+        height=image.height,
+        original_size=len(data),
+        fingerprint=fingerprint(image),
+    )
+    logger.info(f"Prepared receipt image: {len(data)} -> {len(prepared.data)} bytes, {image.width}x{image.height}.")
+    return prepared
+
+
+async def prepare_receipt_async(data: bytes, max_long_edge: Optional[int] = None, grayscale: Optional[bool] = None) -> PreparedReceipt:
+    """prepare_receipt on the preprocessing thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_preprocess_pool, partial(prepare_receipt, data, max_long_edge, grayscale))
+
+
+def fingerprint(image: Image.Image) -> Optional[bytes]:
+    """
+    Perceptual fingerprint: a contrast-stretched 24x32 grayscale thumbnail. Re-uploads, re-encodes
+    and rescales of one photo differ from it by well under RECEIPT_MATCH_MAX_DIFF (mean absolute
+    grey level), while different receipts, even from the same shop, differ by several times that.
+    Returns None for near-uniform images, which would all match each other.
+    """
+    thumbnail = np.asarray(ImageOps.autocontrast(image.convert("L").resize(FINGERPRINT_SIZE, Image.Resampling.BOX)))
+    if thumbnail.std() < _MIN_FINGERPRINT_STD:
+        return None
+    return thumbnail.tobytes()
+
+
+def _difference(a: bytes, b: bytes) -> float:
+    return float(np.abs(np.frombuffer(a, np.uint8).astype(np.int16) - np.frombuffer(b, np.uint8)).mean())
+
+
+def get_cached_scan(user_id: int, receipt_fingerprint: bytes) -> Optional[Dict[str, Any]]:
+    """Extraction for an earlier scan of the same receipt image, if one is still cached."""
+    now = time.monotonic()
+    with _scan_cache_lock:
+        scans = _scan_cache.get(user_id)
+        if not scans:
+            return None
+        for known, (stored_at, extraction) in list(scans.items()):
+            if now - stored_at > settings.RECEIPT_CACHE_TTL_SECONDS:
+                del scans[known]
+            elif _difference(known, receipt_fingerprint) <= settings.RECEIPT_MATCH_MAX_DIFF:
+                scans.move_to_end(known)
+                return dict(extraction)
+    return None
+
+
+def store_scan(user_id: int, receipt_fingerprint: bytes, extraction: Dict[str, Any]):
+    with _scan_cache_lock:
+        if user_id not in _scan_cache and len(_scan_cache) >= _SCAN_CACHE_MAX_USERS:
+            _scan_cache.clear()
+        scans = _scan_cache.setdefault(user_id, OrderedDict())
+        scans[receipt_fingerprint] = (time.monotonic(), dict(extraction))
+        scans.move_to_end(receipt_fingerprint)
+        while len(scans) > _SCAN_CACHE_PER_USER:
+            scans.popitem(last=False)
@@ -1,17 +1,35 @@
 import json
 import base64
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 import logging
 from backend.core.config import settings
 from sqlmodel import Session, select
 from sqlalchemy import func
 
-from backend.adapters.database.models import Expense, UserSettings, AISuggestion, Category, RecurringExpense, Budget, Challenge, MonthlyReport
-from backend.adapters.ai.llm_provider import LiteLLMProvider, LLMProvider
+from backend.adapters.database.models import Expense, AISuggestion, Category, RecurringExpense, Budget, Challenge, MonthlyReport
+from backend.adapters.ai.llm_provider import CircuitOpenError, LLMProvider
+from backend.adapters.ai.provider_registry import get_provider
+from backend.adapters.ai.receipt_image import PreparedReceipt, get_cached_scan, store_scan
+from backend.adapters.database.repositories.expense_repository import ExpenseRepository
+from backend.adapters.database.repositories.ai_cache_repository import AICacheRepository
+from backend.services.recurring_detector import RecurringDetector
+from backend.services.forecast_service import ForecastService
+from backend.services.expense_parser import DEFAULT_CURRENCY, ExpenseParser
+from backend.services.query_engine import ExpenseQuery, QueryEngine, QueryValidationError
+from backend.services.report_analysis import validate_report_analysis
+from backend.services.intent_parser import IntentParser, record_route
+from backend.services.financial_context import FinancialContextService
+from backend.services.ledger_service import LedgerService
 
 logger = logging.getLogger(__name__)
 
+BUDGET_ALERT_CACHE = "budget_alert" # AICacheEntry kind: per-category forecast advice, keyed by category id
+
+# Text parsers per (kind, user, ledger version, categories); rebuilt whenever either changes
+_parser_cache: Dict[tuple, Any] = {}
+_PARSER_CACHE_MAX_ENTRIES = 256
+
 class AIService:
     def __init__(self, session: Session, user_id: int):
         self.session = session
@@ -20,62 +38,38 @@ class AIService:
         logger.info(f"AIService initialized for user {user_id}. Provider available: {self.provider is not None}")
 
     def _get_provider(self, user_id: int) -> Optional[LLMProvider]:
-        settings = self.session.exec(select(UserSettings).where(UserSettings.user_id == user_id)).first()
-        if not settings or not settings.openai_api_key:
-            logger.warning(f"No OpenAI API key found for user {user_id}. AI features will be disabled.")
-            return None
-        logger.info(f"LLMProvider initialized for user {user_id}.")
-        return LiteLLMProvider(api_key=settings.openai_api_key)
+        return get_provider(self.session, user_id)
+
+    def _llm_ready(self, feature: str) -> bool:
+        """Whether `feature` should call the LLM: False without a provider or while its circuit is open."""
+        if not self.provider:
+            return False
+        try:
+            self.provider.ensure_available(feature)
+            return True
+        except CircuitOpenError:
+            logger.warning(f"LLM circuit open for user {self.user_id}; using the non-LLM path for {feature}.")
+            return False
 
     def _get_recent_expenses_text(self, days: int = 365) -> str:
-        """Fetches recent expenses and formats them as a text summary."""
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        expenses = self.session.exec(
-            select(Expense).where(Expense.user_id == self.user_id, Expense.date >= cutoff_date)
-        ).all()
-        
-        if not expenses:
+        """Compact summary of the user's finances (days: 30, 90 or 365) from the shared cached context."""
+        context_service = FinancialContextService(self.session)
+        if not context_service.get_context(self.user_id).window(days).transaction_count:
             logger.info(f"No expenses found for user {self.user_id} in the last {days} days.")
             return f"No expenses recorded in the last {days} days."
+        return context_service.prompt_summary(self.user_id, days)
 
-        category_totals = {}
-        total_spent = 0.0
-        
-        categories = self.session.exec(select(Category).where(Category.user_id == self.user_id)).all()
-        cat_map = {c.id: c.name for c in categories}
-        
-        expense_details = []
-        
-        for expense in expenses:
-            cat_name = cat_map.get(expense.category_id, "Unknown")
-            category_totals[cat_name] = category_totals.get(cat_name, 0.0) + expense.amount
-            total_spent += expense.amount
-            expense_details.append(f"- {expense.date.strftime('%Y-%m-%d')}: {expense.title} ({cat_name}) - ₹{expense.amount:.2f}")
-
-        summary = f"Total Spent in last {days} days: ₹{total_spent:.2f}\n\n"
-        summary += "Spending by Category:\n"
-        for cat, amount in category_totals.items():
-            percentage = (amount / total_spent * 100) if total_spent > 0 else 0
-            summary += f"- {cat}: ₹{amount:.2f} ({percentage:.1f}%)\n"
-            
-        summary += "\nRecent Transactions (Last 50):\n" + "\n".join(expense_details[:50])
-        
-        logger.debug(f"Generated expense summary for user {self.user_id}.")
-        return summary
+    _ADVICE_SYSTEM_PROMPT = "You are a helpful financial analyst who provides specific, personalized advice based on actual data."
 
-    def generate_financial_advice(self) -> Optional[str]:
-        if not self.provider:
-            logger.warning(f"Attempted to generate financial advice for user {self.user_id} without LLM provider.")
-            return None
-            
+    def _financial_advice_prompt(self) -> str:
         expense_data = self._get_recent_expenses_text(days=365)
         
-        prompt = f"""
+        return f"""
         You are a highly perceptive, data-driven financial advisor. 
         Analyze the user's recent expense data below to uncover specific spending patterns, anomalies, or opportunities for savings.
         The currency is Indian Rupees (₹).
 
-        User's Expense Data (Last 365 Days):
+        User's Expense Summary (Last 365 Days):
         {expense_data}
 
         Your Task:
@@ -86,26 +80,55 @@ class AIService:
         
         Format the output as a clean list. Use **bold** for key points.
         """
+
+    def _save_suggestion(self, content: str) -> AISuggestion:
+        suggestion = AISuggestion(user_id=self.user_id, content=content)
+        self.session.add(suggestion)
+        self.session.commit()
+        self.session.refresh(suggestion)
+        logger.info(f"Financial advice saved for user {self.user_id}.")
+        return suggestion
+
+    def generate_financial_advice(self) -> Optional[str]:
+        if not self.provider:
+            logger.warning(f"Attempted to generate financial advice for user {self.user_id} without LLM provider.")
+            return None
+        if not self._llm_ready("financial_advice"):
+            return "AI suggestions are temporarily unavailable. Please try again in a few minutes."
+
+        prompt = self._financial_advice_prompt()
         
         try:
             logger.info(f"Generating financial advice for user {self.user_id}...")
-            suggestion_text = self.provider.generate_text(prompt, system_prompt="You are a helpful financial analyst who provides specific, personalized advice based on actual data.")
+            suggestion_text = self.provider.generate_text(prompt, system_prompt=self._ADVICE_SYSTEM_PROMPT, call_site="financial_advice")
             logger.debug(f"AI generated advice: {suggestion_text[:100]}...")
-            
-            new_suggestion = AISuggestion(
-                user_id=self.user_id,
-                content=suggestion_text
-            )
-            self.session.add(new_suggestion)
-            self.session.commit()
-            logger.info(f"Financial advice saved for user {self.user_id}.")
-            
+            self._save_suggestion(suggestion_text)
             return suggestion_text
         except Exception as e:
             logger.error(f"Error generating financial advice for user {self.user_id}: {e}")
             return f"Error generating suggestion: {str(e)}"
 
-    def extract_receipt_data(self, image_data: bytes, media_type: str = "image/jpeg") -> Dict[str, Any]:
+    def stream_financial_advice(self) -> Iterator[str]:
+        """
+        Like generate_financial_advice, but yields the advice in chunks as the model produces
+        them. The AISuggestion is saved once the stream completes; the generator's return value
+        is that suggestion (None if the stream was cut short).
+        """
+        if not self.provider:
+            raise ValueError("AI features are not enabled. Please configure your API key.")
+        prompt = self._financial_advice_prompt()
+        logger.info(f"Streaming financial advice for user {self.user_id}...")
+        parts = []
+        for chunk in self.provider.stream_text(prompt, system_prompt=self._ADVICE_SYSTEM_PROMPT, call_site="financial_advice"):
+            parts.append(chunk)
+            yield chunk
+        return self._save_suggestion("".join(parts).strip())
+
+    def get_category_choices(self) -> List[Tuple[int, str]]:
+        return [tuple(row) for row in self.session.exec(select(Category.id, Category.name).where(Category.user_id == self.user_id))]
+
+    def extract_receipt_data(self, image_data: bytes, media_type: str = "image/jpeg", categories: Optional[List[Tuple[int, str]]] = None) -> Dict[str, Any]:
+        """Pass preloaded `categories` when calling from worker threads, so the session is not shared."""
         if not self.provider:
              logger.warning(f"Attempted to extract receipt data for user {self.user_id} without LLM provider.")
              # Raise error so API can return 400/403
@@ -115,8 +138,9 @@ class AIService:
         base64_image = base64.b64encode(image_data).decode('utf-8')
         image_url = f"data:{media_type};base64,{base64_image}"
         
-        categories = self.session.exec(select(Category).where(Category.user_id == self.user_id)).all()
-        cat_list = ", ".join([f"{c.id}:{c.name}" for c in categories])
+        if categories is None:
+            categories = self.get_category_choices()
+        cat_list = ", ".join([f"{cid}:{name}" for cid, name in categories])
         current_date = datetime.now().strftime("%Y-%m-%d")
 
         prompt = f"""
@@ -146,7 +170,7 @@ class AIService:
                 prompt, 
                 system_prompt="You are a precise receipt data extractor.",
                 images=[image_url],
-                model="gpt-4o" # Force a vision-capable model if possible, or user's default if it supports it
+                call_site="receipt_extraction" # routed to the vision tier
             )
             logger.debug(f"Receipt extraction result for user {self.user_id}: {result}")
             return result
@@ -154,13 +178,52 @@ class AIService:
             logger.error(f"Error extracting receipt data for user {self.user_id}: {e}")
             raise
 
-    def parse_expense_natural_language(self, text: str) -> Dict[str, Any]:
-        if not self.provider:
-             logger.warning(f"Attempted to parse natural language expense for user {self.user_id} without LLM provider.")
-             raise ValueError("AI features are not enabled. Please configure your API key.")
+    def scan_receipt(self, receipt: PreparedReceipt, categories: Optional[List[Tuple[int, str]]] = None) -> Dict[str, Any]:
+        """Extracts a prepared receipt, reusing the result of an earlier scan of the same image."""
+        cached = get_cached_scan(self.user_id, receipt.fingerprint) if receipt.fingerprint else None
+        if cached is not None:
+            logger.info(f"Receipt for user {self.user_id} matches an earlier scan; returning cached extraction.")
+            cached["source"] = "cache"
+            return cached
+
+        result = self.extract_receipt_data(receipt.data, media_type=receipt.media_type, categories=categories)
+        if receipt.fingerprint:
+            store_scan(self.user_id, receipt.fingerprint, result)
+        result["source"] = "llm"
+        return result
+
+    def _get_text_parser(self, parser_class):
+        """ExpenseParser/IntentParser for this user, cached per ledger version and category set."""
+        categories = self.get_category_choices()
+        version = LedgerService(self.session).current_version(self.user_id)
+        key = (parser_class.__name__, self.user_id, version, tuple(categories))
+
+        parser = _parser_cache.get(key)
+        if parser is None:
+            history = ExpenseRepository(self.session).get_title_categories(self.user_id)
+            parser = parser_class(categories, history)
+            if len(_parser_cache) >= _PARSER_CACHE_MAX_ENTRIES:
+                _parser_cache.clear()
+            _parser_cache[key] = parser
+        return parser
 
-        categories = self.session.exec(select(Category).where(Category.user_id == self.user_id)).all()
-        category_list = ", ".join([f"{c.id}:{c.name}" for c in categories])
+    def parse_expense_natural_language(self, text: str) -> Dict[str, Any]:
+        parser = self._get_text_parser(ExpenseParser)
+        local = parser.parse(text)
+        if local.confidence >= settings.NL_PARSE_MIN_CONFIDENCE:
+            logger.info(f"Parsed expense locally for user {self.user_id} (confidence {local.confidence}).")
+            return local.to_dict()
+
+        if not self._llm_ready("expense_parse"):
+            if local.amount is not None:
+                logger.info(f"Returning low-confidence local parse for user {self.user_id}; LLM unavailable.")
+                return local.to_dict()
+            if self.provider:
+                self.provider.ensure_available("expense_parse") # raises CircuitOpenError
+            logger.warning(f"Attempted to parse natural language expense for user {self.user_id} without LLM provider.")
+            raise ValueError("AI features are not enabled. Please configure your API key.")
+
+        category_list = ", ".join([f"{cid}:{name}" for cid, name in parser.categories])
         current_date = datetime.now().strftime("%Y-%m-%d")
 
         prompt = f"""
@@ -177,7 +240,8 @@ class AIService:
         2. Map the input to the most appropriate category ID from the list provided. If no close match, set category_id to null.
         3. If date is implicit (e.g. "yesterday"), calculate it relative to Current Date.
         4. If no title is given, infer a short one.
-        5. Return JSON ONLY. No markdown formatting.
+        5. 'amount' is in {DEFAULT_CURRENCY}: convert amounts in other currencies (e.g. "$12") at an approximate current rate.
+        6. Return JSON ONLY. No markdown formatting.
         
         Output Format:
         {{
@@ -189,59 +253,52 @@ class AIService:
         """
         try:
             logger.info(f"Parsing natural language expense for user {self.user_id}: '{text}'")
-            result = self.provider.generate_json(prompt, system_prompt="You are a precise data extraction assistant that outputs raw JSON.")
+            result = self.provider.generate_json(prompt, system_prompt="You are a precise data extraction assistant that outputs raw JSON.", call_site="expense_parse")
             logger.debug(f"NL expense parsing result for user {self.user_id}: {result}")
+            result["source"] = "llm"
             return result
         except Exception as e:
             logger.error(f"Error parsing natural language expense for user {self.user_id}: {e}")
+            if local.amount is not None:
+                return local.to_dict()
             raise
 
-    def detect_recurring_expenses(self) -> List[Dict[str, Any]]:
-        expenses = self.session.exec(
-            select(Expense)
-            .where(Expense.user_id == self.user_id)
-            .order_by(Expense.date.desc())
-            .limit(100)
-        ).all()
-        
-        if len(expenses) < 5 or not self.provider:
-            logger.info(f"Not enough expenses ({len(expenses)}) or no LLM provider for user {self.user_id} to detect recurring expenses.")
+    def detect_recurring_expenses(self, prettify_names: bool = True) -> List[Dict[str, Any]]:
+        history = ExpenseRepository(self.session).get_title_history(self.user_id)
+        if len(history) < 5:
+            logger.info(f"Not enough expenses ({len(history)}) for user {self.user_id} to detect recurring expenses.")
             return []
 
         existing = self.session.exec(select(RecurringExpense).where(RecurringExpense.user_id == self.user_id)).all()
-        existing_text = ", ".join([f"{r.title} ({r.amount})" for r in existing])
-        expense_list_text = "\n".join([f"- {e.date}: {e.title} ({e.amount})" for e in expenses])
+        suggestions = RecurringDetector().detect(history, tracked_titles=[r.title for r in existing])
+        logger.info(f"Detected {len(suggestions)} recurring expense candidates for user {self.user_id} from {len(history)} transactions.")
+
+        if suggestions and prettify_names and self._llm_ready("recurring_names"):
+            suggestions = self._prettify_recurring_titles(suggestions)
+        return suggestions
 
+    def _prettify_recurring_titles(self, suggestions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Optionally asks the LLM for cleaner merchant names; detection itself never depends on it."""
+        raw_titles = [s["title"] for s in suggestions]
         prompt = f"""
-        Analyze the transaction history below to identify POTENTIAL recurring subscriptions or bills that are NOT yet tracked.
-        
-        Transaction History (Last 90 days):
-        {expense_list_text}
-        
-        Already Tracked (Ignore these): {existing_text}
-        
-        Criteria for selection:
-        - Same or similar title (e.g. "Netflix", "Spotify", "Rent").
-        - Same or very similar amount.
-        - Occurs somewhat regularly (weekly, monthly).
-        
-        Output JSON list of objects with:
-        - title: Simplified name (e.g. "Netflix" instead of "Netflix.com*123")
-        - amount: The recurring amount
-        - frequency: "monthly" or "weekly"
-        - confidence: 0.0 to 1.0 (how sure are you?)
-        - reason: Short explanation (e.g. "Payment of 649 detected on 5th of each month")
-        
+        Simplify these bank transaction titles into short, human-friendly merchant names
+        (e.g. "NETFLIX.COM 866-579" -> "Netflix").
+
+        Titles:
+        {json.dumps(raw_titles)}
+
+        Output JSON: {{"names": ["...", "..."]}} with exactly one name per title, in the same order.
         Return JSON ONLY.
         """
         try:
-            logger.info(f"Detecting recurring expenses for user {self.user_id}...")
-            result = self.provider.generate_json(prompt)
-            logger.debug(f"Recurring expense detection result for user {self.user_id}: {result}")
-            return result
+            names = self.provider.generate_json(prompt, call_site="recurring_names").get("names", [])
+            if len(names) == len(suggestions):
+                for suggestion, name in zip(suggestions, names):
+                    if isinstance(name, str) and name.strip():
+                        suggestion["title"] = name.strip()
         except Exception as e:
-            logger.error(f"Error detecting recurring expenses for user {self.user_id}: {e}")
-            return []
+            logger.warning(f"Could not prettify recurring titles for user {self.user_id}: {e}")
+        return suggestions
 
     def generate_budget_forecast(self) -> List[Dict[str, Any]]:
         import calendar
@@ -251,70 +308,44 @@ class AIService:
             return []
             
         forecasts = []
-        today = datetime.now()
+        today = datetime.utcnow()
         days_in_month = calendar.monthrange(today.year, today.month)[1]
         day_of_month = today.day
-        remaining_days = days_in_month - day_of_month
-        
-        cutoff = datetime.utcnow() - timedelta(hours=24)
-        recent_suggestions = self.session.exec(
-            select(AISuggestion)
-            .where(
-                AISuggestion.user_id == self.user_id, 
-                AISuggestion.created_at >= cutoff,
-                AISuggestion.content.like("BUDGET_ALERT:%")
-            )
-        ).all()
         
-        cache_map = {}
-        for s in recent_suggestions:
-            parts = s.content.split(":", 2)
-            if len(parts) == 3:
-                cache_map[int(parts[1])] = parts[2]
+        ai_cache = AICacheRepository(self.session)
+        cache_map = ai_cache.get_values(self.user_id, BUDGET_ALERT_CACHE)
+
+        # One vectorised pass over the ledger for every budgeted category
+        projections = ForecastService(self.session).forecast_month(self.user_id, [b.category_id for b in budgets], now=today)
 
         for budget in budgets:
-            start_date = datetime(today.year, today.month, 1)
-            spent = self.session.exec(
-                select(Expense)
-                .where(
-                    Expense.category_id == budget.category_id,
-                    Expense.date >= start_date,
-                    Expense.user_id == self.user_id
-                )
-            ).all()
-            spent_amount = sum(e.amount for e in spent)
-            
-            daily_avg = spent_amount / day_of_month if day_of_month > 0 else 0
-            projected_total = daily_avg * days_in_month
+            projection = projections[budget.category_id]
+            spent_amount = projection.spent
+            projected_total = projection.projected
+            remaining_days = projection.days_remaining
             is_at_risk = projected_total > (budget.amount * 1.05)
             
             advice = ""
             if is_at_risk:
-                if budget.category_id in cache_map:
-                    advice = cache_map[budget.category_id]
+                if str(budget.category_id) in cache_map:
+                    advice = cache_map[str(budget.category_id)]
                     logger.debug(f"Using cached budget advice for category {budget.category.name}.")
                 else:
                     advice = "You are spending too fast."
-                    if self.provider:
+                    if self._llm_ready("budget_forecast"):
                         try:
                             prompt = f"""
                             The user has a budget of {budget.amount} for category '{budget.category.name}'.
                             Currently it is day {day_of_month} of {days_in_month}.
-                            They have already spent {spent_amount}.
-                            Projected spend: {projected_total:.0f}.
+                            They have already spent {spent_amount:.0f}.
+                            Projected spend: {projected_total:.0f} (likely range {projection.lower:.0f}-{projection.upper:.0f}).
                             
                             Give a 1-sentence, encouraging specific tip to help them get back on track.
                             """
                             logger.info(f"Generating budget advice for category {budget.category.name} for user {self.user_id}...")
-                            advice = self.provider.generate_text(prompt, max_tokens=60)
+                            advice = self.provider.generate_text(prompt, max_tokens=60, call_site="budget_forecast")
                             logger.debug(f"Generated budget advice: {advice}")
-                            
-                            new_cache = AISuggestion(
-                                user_id=self.user_id,
-                                content=f"BUDGET_ALERT:{budget.category_id}:{advice}"
-                            )
-                            self.session.add(new_cache)
-                            self.session.commit()
+                            ai_cache.put(self.user_id, BUDGET_ALERT_CACHE, str(budget.category_id), advice, settings.BUDGET_ADVICE_CACHE_TTL_SECONDS)
                             logger.info(f"Budget advice cached for category {budget.category.name}.")
                         except Exception as e:
                             logger.error(f"Error generating forecast advice for user {self.user_id}, category {budget.category.name}: {e}")
@@ -324,6 +355,9 @@ class AIService:
                 "budget": budget.amount,
                 "spent": spent_amount,
                 "projected": projected_total,
+                "projected_low": projection.lower,
+                "projected_high": projection.upper,
+                "recurring_due": projection.recurring_due,
                 "days_remaining": remaining_days,
                 "status": "at_risk" if spent_amount < budget.amount else "exceeded",
                 "advice": advice
@@ -332,51 +366,26 @@ class AIService:
         return forecasts
 
     def generate_budget_suggestions(self) -> List[Dict[str, Any]]:
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=90)
-        
-        expenses = self.session.exec(
-            select(Expense)
-            .where(
-                Expense.user_id == self.user_id, 
-                Expense.date >= start_date,
-                Expense.date <= end_date
-            )
-        ).all()
-        
-        if not expenses:
+        summary = FinancialContextService(self.session).get_context(self.user_id).last_90_days
+        if not summary.transaction_count:
             logger.info(f"No expenses found for user {self.user_id} in the last 90 days. Skipping budget suggestions.")
             return []
 
-        cat_expenses = {}
-        for e in expenses:
-            if e.category_id not in cat_expenses:
-                cat_expenses[e.category_id] = []
-            cat_expenses[e.category_id].append(e.amount)
-
-        summaries = []
-        categories = self.session.exec(select(Category).where(Category.user_id == self.user_id)).all()
-        cat_map = {c.id: c.name for c in categories}
-        
-        for cat_id, amounts in cat_expenses.items():
-            total_spent = sum(amounts)
-            avg_monthly = total_spent / 3.0
-            cat_name = cat_map.get(cat_id, f"Category {cat_id}")
-            
-            summaries.append({
-                "category_id": cat_id,
-                "category_name": cat_name,
-                "avg_monthly": round(avg_monthly, 2),
-                "max_single": max(amounts) if amounts else 0
-            })
+        summaries = [{
+            "category_id": c.category_id,
+            "category_name": c.name,
+            "avg_monthly": round(c.total / 3.0, 2),
+            "max_single": c.max_single
+        } for c in summary.categories]
+        cat_map = {c.category_id: c.name for c in summary.categories}
 
         def attach_names(items):
             for item in items:
                 item["category_name"] = cat_map.get(item["category_id"], "Unknown")
             return items
 
-        if not self.provider:
-            logger.warning(f"No LLM provider for user {self.user_id}. Falling back to simple budget suggestions.")
+        if not self._llm_ready("budget_suggestions"):
+            logger.warning(f"LLM unavailable for user {self.user_id}. Falling back to simple budget suggestions.")
             results = [{
                 "category_id": s["category_id"],
                 "amount": int(s["avg_monthly"]),
@@ -395,7 +404,7 @@ class AIService:
         - If the average is very low (< 100), maybe ignore it or suggest 0? Use judgment.
         
         Data:
-        {json.dumps(summaries, indent=2)}
+        {json.dumps(summaries)}
         
         Output JSON list:
         [
@@ -409,7 +418,7 @@ class AIService:
 
         try:
             logger.info(f"Generating budget suggestions for user {self.user_id}...")
-            suggestions = self.provider.generate_json(prompt, temperature=0.3)
+            suggestions = self.provider.generate_json(prompt, temperature=0.3, call_site="budget_suggestions")
             logger.debug(f"Budget suggestions generated for user {self.user_id}: {suggestions}")
             return attach_names(suggestions)
         except Exception as e:
@@ -428,8 +437,8 @@ class AIService:
             .limit(20)
         ).all()
         
-        if not expenses or not self.provider:
-            logger.info(f"No uncategorized expenses or no LLM provider for user {self.user_id}. Skipping auto-categorization.")
+        if not expenses or not self._llm_ready("auto_categorize"):
+            logger.info(f"No uncategorized expenses or LLM unavailable for user {self.user_id}. Skipping auto-categorization.")
             return 0
             
         categories = self.session.exec(select(Category).where(Category.user_id == self.user_id)).all()
@@ -448,7 +457,7 @@ class AIService:
         {cat_list_str}
         
         Transactions to categorize:
-        {json.dumps(items_to_categorize, indent=2)}
+        {json.dumps(items_to_categorize, separators=(",", ":"))}
         
         Task:
         Return a JSON object analyzing each transaction.
@@ -467,7 +476,7 @@ class AIService:
         
         try:
             logger.info(f"Attempting to auto-categorize {len(expenses)} expenses for user {self.user_id}...")
-            data = self.provider.generate_json(prompt, temperature=0.0)
+            data = self.provider.generate_json(prompt, temperature=0.0, call_site="auto_categorize")
             mappings = data.get("mappings", [])
             
             count = 0
@@ -489,6 +498,16 @@ class AIService:
             return 0
 
     def process_natural_language_query(self, query_text: str) -> Dict[str, Any]:
+        params = self._get_text_parser(IntentParser).parse(query_text)
+        if params is not None:
+            try:
+                query = ExpenseQuery.from_dict(params)
+                logger.info(f"Answering NL query locally for user {self.user_id}: '{query_text}'")
+                record_route("local")
+                return self._answer_query(query, params["human_readable_answer_template"])
+            except QueryValidationError as e:
+                logger.warning(f"Local intent parse for user {self.user_id} failed validation, falling back: {e}")
+
         categories = self.session.exec(select(Category).where(Category.user_id == self.user_id)).all()
         cat_list_str = ", ".join([c.name for c in categories])
         current_date = datetime.now().strftime("%Y-%m-%d")
@@ -506,81 +525,83 @@ class AIService:
         - "total_spend": Sum of expenses.
         - "count_transactions": Number of transactions.
         - "average_spend": Average amount per transaction.
+        - "min_spend" / "max_spend": Smallest / largest single transaction.
+        - "top_merchants": Merchants with the highest total spend (use "limit").
+        - "compare_periods": Total spend in the filter period vs the compare period.
         
         Output JSON Format:
         {{
-            "operation": "total_spend" | "count_transactions" | "average_spend",
+            "operation": "total_spend",
             "filters": {{
                 "category_name": "Food" or null,
                 "start_date": "YYYY-MM-DD" or null,
-                "end_date": "YYYY-MM-DD" or null,
-                "merchant_name": "Uber" or null (partial match)
+                "end_date": "YYYY-MM-DD" or null (inclusive),
+                "merchant_name": "Uber" or null (partial match),
+                "type": "expense" or "income"
             }},
+            "group_by": "category" | "month" | "merchant" | null (only for the first five operations),
+            "limit": 5,
+            "compare_start_date": "YYYY-MM-DD" or null (compare_periods only),
+            "compare_end_date": "YYYY-MM-DD" or null (compare_periods only),
             "human_readable_answer_template": "You spent {{value}} on Food in November."
         }}
         
         Rules:
         - If date is "last month", calculate start/end dates relative to {current_date}.
+        - For grouped, top_merchants and compare_periods questions the template is a one-line lead-in; the figures are appended.
         - Return JSON ONLY.
         """
         
         if not self.provider:
             logger.warning(f"Attempted to process NL query for user {self.user_id} without LLM provider.")
+            record_route("unanswered")
             return {"error": "API Key missing"}
+        if not self._llm_ready("nl_query"):
+            record_route("unanswered")
+            return {"answer": "I can only answer simple questions right now; AI is temporarily unavailable. Try again in a few minutes."}
 
+        record_route("llm")
         try:
             logger.info(f"Processing natural language query for user {self.user_id}: '{query_text}'")
-            params = self.provider.generate_json(prompt, system_prompt="You are a precise query generator that outputs raw JSON.")
-            filters = params.get("filters", {})
-            op = params.get("operation")
+            params = self.provider.generate_json(prompt, system_prompt="You are a precise query generator that outputs raw JSON.", call_site="nl_query")
             logger.debug(f"NL query parsed into: {params}")
-            
-            query = select(Expense).where(Expense.user_id == self.user_id)
-            
-            if filters.get("category_name"):
-                cat = self.session.exec(select(Category).where(Category.user_id == self.user_id, Category.name.ilike(filters["category_name"]))).first()
-                if cat:
-                    query = query.where(Expense.category_id == cat.id)
-            if filters.get("start_date"):
-                query = query.where(Expense.date >= datetime.strptime(filters["start_date"], "%Y-%m-%d"))
-            if filters.get("end_date"):
-                query = query.where(Expense.date <= datetime.strptime(filters["end_date"], "%Y-%m-%d"))
-            if filters.get("merchant_name"):
-                query = query.where(Expense.title.ilike(f"%{filters['merchant_name']}%"))
-
-            result_value = 0
-            if op == "total_spend":
-                expenses = self.session.exec(query).all()
-                result_value = sum(e.amount for e in expenses)
-                formatted_result = f"₹{result_value:.2f}"
-            elif op == "count_transactions":
-                expenses = self.session.exec(query).all()
-                result_value = len(expenses)
-                formatted_result = str(result_value)
-            elif op == "average_spend":
-                expenses = self.session.exec(query).all()
-                if expenses:
-                    result_value = sum(e.amount for e in expenses) / len(expenses)
-                formatted_result = f"₹{result_value:.2f}"
-            else:
-                logger.warning(f"Unknown operation '{op}' for NL query for user {self.user_id}.")
-                return {"answer": "I didn't understand the operation."}
+            query = ExpenseQuery.from_dict(params)
+        except QueryValidationError as e:
+            logger.warning(f"Rejected NL query for user {self.user_id}: {e}")
+            return {"answer": "I didn't understand the operation."}
+        except Exception as e:
+            logger.error(f"Error processing NL query for user {self.user_id}: {e}")
+            return {"answer": "Sorry, I couldn't process that question."}
 
-            template = params.get("human_readable_answer_template", "The answer is {value}.")
-            final_answer = template.replace("{value}", formatted_result)
-            logger.info(f"NL query processed for user {self.user_id}. Answer: {final_answer}")
-            return {"answer": final_answer, "debug_query": params}
+        template = params.get("human_readable_answer_template") if isinstance(params.get("human_readable_answer_template"), str) else None
+        return self._answer_query(query, template)
 
+    def _answer_query(self, query: ExpenseQuery, template: Optional[str] = None) -> Dict[str, Any]:
+        try:
+            result = QueryEngine(self.session, self.user_id).run(query)
         except Exception as e:
-            logger.error(f"Error processing NL query for user {self.user_id}: {e}")
+            logger.error(f"Error running NL query for user {self.user_id}: {e}")
             return {"answer": "Sorry, I couldn't process that question."}
 
+        if result.rows or result.comparison:
+            lead = template.replace("{value}", "").strip() if template else ""
+            final_answer = f"{lead}\n{result.describe()}" if lead else result.describe()
+        else:
+            final_answer = (template or "The answer is {value}.").replace("{value}", result.format_value())
+
+        logger.info(f"NL query processed for user {self.user_id}. Answer: {final_answer}")
+        return {
+            "answer": final_answer,
+            "value": result.value,
+            "rows": result.rows,
+            "comparison": result.comparison,
+            "debug_query": query.to_dict(),
+        }
+
     def generate_spending_challenges(self) -> List[Dict[str, Any]]:
-        today_debug = datetime.now()
-        cutoff = datetime.utcnow() - timedelta(days=30)
-        expenses = self.session.exec(select(Expense).where(Expense.user_id == self.user_id, Expense.date >= cutoff)).all()
-        
-        if not expenses:
+        summary = FinancialContextService(self.session).get_context(self.user_id).last_30_days
+
+        if not summary.transaction_count:
             existing = self.session.exec(select(Challenge).where(
                 Challenge.user_id == self.user_id, 
                 Challenge.title == "First Step"
@@ -609,21 +630,12 @@ class AIService:
             return [{"title": "First Step", "description": "Track your spending to unlock insights."}]
             
         categories = self.session.exec(select(Category).where(Category.user_id == self.user_id)).all()
-        cat_map = {c.id: c.name for c in categories}
-        cat_totals = {}
-        for e in expenses:
-            cat_totals[e.category_id] = cat_totals.get(e.category_id, 0.0) + e.amount
-            
-        sorted_cats = sorted(cat_totals.items(), key=lambda x: x[1], reverse=True)[:5]
-        context_data = []
-        for cat_id, total in sorted_cats:
-            name = cat_map.get(cat_id, "Unknown")
-            avg_weekly = total / 4.0
-            context_data.append(f"- {name}: spent {total} last 30 days (~{avg_weekly:.0f}/week)")
-        context_str = "\n".join(context_data)
+        context_str = "\n".join(
+            f"- {c.name}: spent {c.total:.0f} last 30 days (~{c.total / 4.0:.0f}/week)" for c in summary.categories[:5]
+        )
         
-        if not self.provider:
-            logger.warning(f"No LLM provider for user {self.user_id}. Skipping spending challenge generation.")
+        if not self._llm_ready("spending_challenges"):
+            logger.warning(f"LLM unavailable for user {self.user_id}. Skipping spending challenge generation.")
             return []
             
         available_cats = ", ".join([c.name for c in categories])
@@ -659,7 +671,7 @@ class AIService:
         
         try:
             logger.info(f"Generating spending challenges for user {self.user_id}...")
-            suggestions = self.provider.generate_json(prompt, temperature=0.7)
+            suggestions = self.provider.generate_json(prompt, temperature=0.7, call_site="spending_challenges")
             today = datetime.now()
             next_week = today + timedelta(days=7)
             created_challenges = []
@@ -727,42 +739,19 @@ class AIService:
         prev_month_start = start_date - timedelta(days=1)
         prev_month_start = prev_month_start.replace(day=1)
         
-        current_expenses = self.session.exec(select(Expense).where(
-            Expense.user_id == self.user_id, 
-            Expense.date >= start_date, 
-            Expense.date < end_date,
-            Expense.type == 'expense'
-        )).all()
-        
-        prev_expenses = self.session.exec(select(Expense).where(
-            Expense.user_id == self.user_id, 
-            Expense.date >= prev_month_start, 
-            Expense.date < start_date,
-            Expense.type == 'expense'
-        )).all()
-        
-        current_income_txn = self.session.exec(select(Expense).where(
-            Expense.user_id == self.user_id, 
-            Expense.date >= start_date, 
-            Expense.date < end_date,
-            Expense.type == 'income'
-        )).all()
-        
-        total_spent = sum(e.amount for e in current_expenses)
-        prev_spent = sum(e.amount for e in prev_expenses)
-        total_income = sum(e.amount for e in current_income_txn)
+        context_service = FinancialContextService(self.session)
+        current = context_service.get_period(self.user_id, start_date, end_date)
+        previous = context_service.get_period(self.user_id, prev_month_start, start_date)
+
+        total_spent = current.total_spent
+        prev_spent = previous.total_spent
+        total_income = current.total_income
         
         savings_rate = 0.0
         if total_income > 0:
             savings_rate = ((total_income - total_spent) / total_income) * 100
             
-        categories = self.session.exec(select(Category).where(Category.user_id == self.user_id)).all()
-        cat_map = {c.id: c.name for c in categories}
-        cat_totals = {}
-        for e in current_expenses:
-            cat_totals[e.category_id] = cat_totals.get(e.category_id, 0) + e.amount
-        top_cats = sorted(cat_totals.items(), key=lambda x: x[1], reverse=True)[:5]
-        cat_summary = "\n".join([f"- {cat_map.get(cid, 'Unknown')}: {amt}" for cid, amt in top_cats])
+        cat_summary = "\n".join(current.category_lines(limit=5)) or "- (none)"
         
         change_pct = 0.0
         if prev_spent > 0:
@@ -771,6 +760,7 @@ class AIService:
         if not self.provider:
             logger.warning(f"No LLM provider for user {self.user_id}. Skipping monthly audit generation.")
             return None
+        self.provider.ensure_available("monthly_audit") # an open circuit surfaces as 503 instead of a generic failure
 
         prompt = f"""
         Act as a brutal but helpful Personal CFO. Audit the user's finances for {month_str}.
@@ -799,8 +789,8 @@ class AIService:
         
         try:
             logger.info(f"Generating monthly audit for user {self.user_id}, month {month_str}...")
-            analysis_json = json.dumps(self.provider.generate_json(prompt, temperature=0.5))
-            logger.debug(f"Monthly audit analysis for user {self.user_id}: {analysis_json}")
+            analysis = validate_report_analysis(self.provider.generate_json(prompt, temperature=0.5, call_site="monthly_audit"))
+            logger.debug(f"Monthly audit analysis for user {self.user_id}: {analysis}")
             
             existing = self.session.exec(select(MonthlyReport).where(
                 MonthlyReport.user_id == self.user_id,
@@ -811,7 +801,7 @@ class AIService:
                 existing.total_spent = total_spent
                 existing.total_income = total_income
                 existing.savings_rate = savings_rate
-                existing.analysis = analysis_json
+                existing.analysis = analysis
                 self.session.add(existing)
                 report = existing
                 logger.info(f"Updated existing monthly report for user {self.user_id}, month {month_str}.")
@@ -822,7 +812,7 @@ class AIService:
                     total_spent=total_spent,
                     total_income=total_income,
                     savings_rate=savings_rate,
-                    analysis=analysis_json
+                    analysis=analysis
                 )
                 self.session.add(report)
                 logger.info(f"Created new monthly report for user {self.user_id}, month {month_str}.")
@@ -834,34 +824,18 @@ class AIService:
             logger.error(f"Error generating monthly audit for user {self.user_id}, month {month_str}: {e}")
             return None
 
-    def generate_expense_breakdown(self, start_date: datetime, end_date: datetime) -> str:
-        if not self.provider:
-            logger.warning(f"Attempted to generate expense breakdown for user {self.user_id} without LLM provider.")
-            return "Please configure your OpenAI API Key in Settings to receive AI suggestions."
+    def _expense_breakdown_prompt(self, start_date: datetime, end_date: datetime) -> Tuple[Optional[str], Optional[str]]:
+        """(prompt, None), or (None, message) when the period has no expenses."""
+        # The end date is inclusive: cover the whole of that day
+        period_end = end_date.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        context_service = FinancialContextService(self.session)
+        summary = context_service.get_period(self.user_id, start_date, period_end)
 
-        expenses = self.session.exec(
-            select(Expense)
-            .where(
-                Expense.user_id == self.user_id,
-                Expense.date >= start_date,
-                Expense.date <= end_date
-            )
-        ).all()
+        if not summary.transaction_count:
+            return None, f"No expenses found between {start_date.strftime('%Y-%m-%d')} and {end_date.strftime('%Y-%m-%d')}."
 
-        if not expenses:
-            return f"No expenses found between {start_date.strftime('%Y-%m-%d')} and {end_date.strftime('%Y-%m-%d')}."
-
-        categories = self.session.exec(select(Category).where(Category.user_id == self.user_id)).all()
-        cat_map = {c.id: c.name for c in categories}
-
-        expense_summary_lines = []
-        total_spent = 0.0
-        for expense in expenses:
-            cat_name = cat_map.get(expense.category_id, "Unknown")
-            expense_summary_lines.append(f"- {expense.date.strftime('%Y-%m-%d')}: {expense.title} ({cat_name}) - ₹{expense.amount:.2f}")
-            total_spent += expense.amount
-
-        expense_data_text = "\n".join(expense_summary_lines)
+        total_spent = summary.total_spent
+        expense_data_text = context_service.period_prompt(self.user_id, start_date, period_end)
 
         prompt = f"""
         You are a financial analyst. Analyze the following expense data for the period from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}.
@@ -873,9 +847,32 @@ class AIService:
         Provide a concise breakdown of spending patterns, highlighting any significant categories or unusual transactions.
         Suggest one actionable insight based on this data.
         """
+        return prompt, None
+
+    def stream_expense_breakdown(self, start_date: datetime, end_date: datetime) -> Iterator[str]:
+        """generate_expense_breakdown, yielded in chunks as the model produces them."""
+        if not self.provider:
+            raise ValueError("AI features are not enabled. Please configure your API key.")
+        prompt, message = self._expense_breakdown_prompt(start_date, end_date)
+        if prompt is None:
+            yield message
+            return
+        logger.info(f"Streaming expense breakdown for user {self.user_id} from {start_date} to {end_date}...")
+        yield from self.provider.stream_text(prompt, call_site="expense_breakdown")
+
+    def generate_expense_breakdown(self, start_date: datetime, end_date: datetime) -> str:
+        if not self.provider:
+            logger.warning(f"Attempted to generate expense breakdown for user {self.user_id} without LLM provider.")
+            return "Please configure your OpenAI API Key in Settings to receive AI suggestions."
+        if not self._llm_ready("expense_breakdown"):
+            return "Could not generate breakdown."
+
+        prompt, message = self._expense_breakdown_prompt(start_date, end_date)
+        if prompt is None:
+            return message
         try:
             logger.info(f"Generating expense breakdown for user {self.user_id} from {start_date} to {end_date}...")
-            response = self.provider.generate_text(prompt)
+            response = self.provider.generate_text(prompt, call_site="expense_breakdown")
             logger.debug(f"AI Response for expense breakdown: {response}")
             
             # Simple parsing (assuming JSON-like or exact format)
@@ -0,0 +1,174 @@
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from backend.adapters.database.models import LLMUsage
+from backend.adapters.database.repositories.llm_usage_repository import LLMUsageRepository
+from backend.adapters.database.session import engine
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-worker view of today's usage: (user_id, day) -> [calls, tokens, refreshed_at]
+_daily: Dict[Tuple[int, str], List[float]] = {}
+_daily_lock = threading.Lock()
+_DAILY_REFRESH_SECONDS = 60
+
+
+class QuotaExceededError(Exception):
+    """The user has used up their daily LLM call or token allowance."""
+
+
+class UsageWriter:
+    """
+    Persists LLMUsage rows from a background thread, one multi-row INSERT per batch, so
+    provider calls never wait on the database. Rows are flushed when a batch fills up or
+    every LLM_USAGE_FLUSH_SECONDS, and on shutdown.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, row: Dict[str, Any]):
+        self._ensure_started()
+        self._queue.put(row)
+
+    def stop(self, timeout: float = 5.0):
+        """Flushes pending rows and stops the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="llm-usage-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch: List[Dict[str, Any]] = []
+            deadline = time.monotonic() + settings.LLM_USAGE_FLUSH_SECONDS
+            while len(batch) < settings.LLM_USAGE_BATCH_SIZE:
+                try:
+                    row = self._queue.get(timeout=max(0.0, deadline - time.monotonic()) if batch else None)
+                except queue.Empty:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+            if batch:
+                self._write(batch)
+
+    @staticmethod
+    def _write(batch: List[Dict[str, Any]]):
+        try:
+            with Session(engine) as session:
+                session.execute(insert(LLMUsage), batch) # executemany: one round trip per batch
+                session.commit()
+            logger.debug(f"Wrote {len(batch)} LLM usage rows.")
+        except Exception as e:
+            # Accounting must never break AI features; the rows are lost
+            logger.error(f"Failed to write {len(batch)} LLM usage rows: {e}")
+
+
+usage_writer = UsageWriter()
+
+
+def _today() -> Tuple[datetime, str]:
+    start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, start.strftime("%Y-%m-%d")
+
+
+def _daily_entry(user_id: int) -> List[float]:
+    """Today's [calls, tokens, refreshed_at] for a user, re-read from the ledger every minute."""
+    start, day = _today()
+    key = (user_id, day)
+    with _daily_lock:
+        entry = _daily.get(key)
+        if entry is not None and time.monotonic() - entry[2] < _DAILY_REFRESH_SECONDS:
+            return entry
+    with Session(engine) as session:
+        calls, tokens = LLMUsageRepository(session).get_totals_since(user_id, start)
+    with _daily_lock:
+        if len(_daily) >= 4096:
+            _daily.clear()
+        entry = _daily.get(key)
+        # Calls recorded here but not yet flushed may be missing from the ledger; never go backwards
+        if entry is not None:
+            calls, tokens = max(calls, entry[0]), max(tokens, entry[1])
+        entry = _daily[key] = [calls, tokens, time.monotonic()]
+        return entry
+
+
+def check_quota(user_id: Optional[int]):
+    """Raises QuotaExceededError if the user has reached today's LLM_DAILY_*_QUOTA (0 disables a quota)."""
+    if user_id is None or not (settings.LLM_DAILY_CALL_QUOTA or settings.LLM_DAILY_TOKEN_QUOTA):
+        return
+    calls, tokens, _ = _daily_entry(user_id)
+    if settings.LLM_DAILY_CALL_QUOTA and calls >= settings.LLM_DAILY_CALL_QUOTA:
+        raise QuotaExceededError(f"Daily AI request limit reached ({settings.LLM_DAILY_CALL_QUOTA} calls). Try again tomorrow.")
+    if settings.LLM_DAILY_TOKEN_QUOTA and tokens >= settings.LLM_DAILY_TOKEN_QUOTA:
+        raise QuotaExceededError(f"Daily AI token limit reached ({settings.LLM_DAILY_TOKEN_QUOTA} tokens). Try again tomorrow.")
+
+
+def quota_status(user_id: int) -> Dict[str, Any]:
+    calls, tokens, _ = _daily_entry(user_id)
+    return {
+        "calls_today": int(calls),
+        "tokens_today": int(tokens),
+        "daily_call_quota": settings.LLM_DAILY_CALL_QUOTA or None,
+        "daily_token_quota": settings.LLM_DAILY_TOKEN_QUOTA or None,
+    }
+
+
+def record_usage(user_id: Optional[int], call_site: str, model: str, prompt_tokens: int, completion_tokens: int,
+                 latency_ms: float, cost_usd: float = 0.0, success: bool = True, estimated: bool = False):
+    """Queues an LLMUsage row and counts it against today's quota."""
+    logger.info(
+        f"LLM call '{call_site}' ({model}) for user {user_id}: {prompt_tokens} prompt + {completion_tokens} completion tokens"
+        f"{' (estimated)' if estimated else ''}, {latency_ms:.0f} ms{'' if success else ', failed'}."
+    )
+    if user_id is None:
+        return
+    with _daily_lock:
+        entry = _daily.get((user_id, _today()[1]))
+        if entry is not None:
+            entry[0] += 1
+            entry[1] += prompt_tokens + completion_tokens
+    usage_writer.submit({
+        "user_id": user_id,
+        "call_site": call_site,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cost_usd": cost_usd,
+        "latency_ms": latency_ms,
+        "success": success,
+        "estimated": estimated,
+        "created_at": datetime.utcnow(),
+    })
+
+
+def response_token_counts(response: Any) -> Optional[tuple]:
+    """(prompt_tokens, completion_tokens) reported by the provider, if any."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    prompt = getattr(usage, "prompt_tokens", None)
+    completion = getattr(usage, "completion_tokens", None)
+    if prompt is None or completion is None:
+        return None
+    return int(prompt), int(completion)
@@ -0,0 +1,122 @@
+import logging
+import os
+import zlib
+from contextlib import contextmanager
+from typing import Iterator, Set
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCRIPT_LOCATION = os.path.join(BACKEND_DIR, "alembic")
+# Postgres advisory lock id shared by every worker of this app
+MIGRATION_LOCK_ID = zlib.crc32(b"expense-tracker:schema-migrations")
+# Schema that create_all produced at startup before migrations ran there (databases without alembic_version)
+BASELINE_REVISION = "5e9336781da9"
+
+_head_revisions: Set[str] = set()
+
+
+def alembic_config(connection: Connection = None) -> Config:
+    """Programmatic Alembic config (no ini file, so alembic/env.py leaves app logging alone)."""
+    config = Config()
+    config.set_main_option("script_location", SCRIPT_LOCATION)
+    if connection is not None:
+        config.attributes["connection"] = connection # picked up by alembic/env.py
+    return config
+
+
+def head_revisions() -> Set[str]:
+    """Head revision(s) of the migration scripts, read once per process."""
+    if not _head_revisions:
+        _head_revisions.update(ScriptDirectory.from_config(alembic_config()).get_heads())
+    return set(_head_revisions)
+
+
+def current_revisions(connection: Connection) -> Set[str]:
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+def has_tables(connection: Connection) -> bool:
+    """Whether the database holds any app tables (ignoring alembic_version)."""
+    return any(name != "alembic_version" for name in inspect(connection).get_table_names())
+
+
+def upgrade(connection: Connection):
+    command.upgrade(alembic_config(connection), "head")
+
+
+def stamp(connection: Connection, revision: str = "head"):
+    command.stamp(alembic_config(connection), revision)
+
+
+@contextmanager
+def migration_lock(engine: Engine) -> Iterator[Connection]:
+    """
+    Holds a cross-process lock for schema changes and seeding, and yields a connection to run them on.
+    Postgres uses a session-level advisory lock; SQLite locks a file next to the database
+    (workers share a host). Other backends run unlocked.
+    """
+    with engine.connect() as connection:
+        dialect = engine.dialect.name
+        if dialect == "postgresql":
+            connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            connection.commit()
+            try:
+                yield connection
+            finally:
+                connection.rollback()
+                connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+                connection.commit()
+        elif dialect == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+            import fcntl
+            with open(f"{engine.url.database}.migrate.lock", "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield connection
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        else:
+            logger.warning(f"No migration lock for dialect '{dialect}'; run migrations before starting several workers.")
+            yield connection
+
+
+@contextmanager
+def try_lock(engine: Engine, name: str) -> Iterator[bool]:
+    """
+    Non-blocking cross-process lock named `name`, held until the block exits: yields True in the
+    one process that got it and False in the others. Same mechanisms as migration_lock.
+    """
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        lock_id = zlib.crc32(f"expense-tracker:{name}".encode())
+        with engine.connect() as connection:
+            acquired = bool(connection.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id}).scalar())
+            connection.commit()
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+                    connection.commit()
+    elif dialect == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+        import fcntl
+        with open(f"{engine.url.database}.{name}.lock", "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                acquired = True
+            except BlockingIOError:
+                acquired = False
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        yield True
@@ -1,7 +1,8 @@
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 from sqlmodel import Field, Relationship, SQLModel
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import JSON, Column, UniqueConstraint, Index
+from sqlalchemy.dialects.postgresql import JSONB
 
 from backend.core.models import UserBase, CategoryBase, ExpenseBase, BudgetBase, RecurringExpenseBase
 
@@ -11,6 +12,7 @@ class Expense(ExpenseBase, table=True):
     user_id: int = Field(foreign_key="user.id")
     category: Optional["Category"] = Relationship(back_populates="expenses")
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    is_anomaly: bool = Field(default=False) # Flagged at write time by AnomalyService
 
 class Category(CategoryBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -52,6 +54,20 @@ class AISuggestion(SQLModel, table=True):
     content: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    __table_args__ = (Index("ix_aisuggestion_user_created", "user_id", "created_at"),)
+
+class AICacheEntry(SQLModel, table=True):
+    """Cached AI output, e.g. per-category budget advice; looked up by (user_id, kind, key) until expires_at."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id")
+    kind: str # e.g. "budget_alert"
+    key: str # e.g. the category id
+    value: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True) # swept by the maintenance runner
+
+    __table_args__ = (UniqueConstraint("user_id", "kind", "key", name="unique_aicache_user_kind_key"),)
+
 class Challenge(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
@@ -72,5 +88,37 @@ class MonthlyReport(SQLModel, table=True):
     total_spent: float
     total_income: float
     savings_rate: float
-    analysis: str # JSON string storing complex AI insights
+    # AI audit (grade, leakage, inflation_check, action_item); validated on write by services/report_analysis.py
+    analysis: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False))
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    __table_args__ = (Index("ix_monthlyreport_user_month", "user_id", "month"),)
+
+class CategoryStats(SQLModel, table=True):
+    """Running per-(user, category) statistics of log-amounts, updated on every new expense."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    category_id: Optional[int] = Field(default=None, foreign_key="category.id", nullable=True)
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0 # Welford sum of squared deviations
+    quantile_state: str = "{}" # JSON P² marker state for the tracked quantiles
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    __table_args__ = (UniqueConstraint("user_id", "category_id", name="unique_user_category_stats"),)
+
+class LLMUsage(SQLModel, table=True):
+    """One LLM call made on a user's behalf, written in batches by the usage writer."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id")
+    call_site: str # AIService feature, e.g. "auto_categorize"
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    latency_ms: float = 0.0
+    success: bool = True
+    estimated: bool = False # token counts estimated locally (provider reported none)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    __table_args__ = (Index("ix_llmusage_user_created", "user_id", "created_at"),)
@@ -0,0 +1,181 @@
+"""
+Monthly range partitioning of the `expense` table on Postgres (EXPENSE_PARTITIONING).
+
+The partitioned table keeps the columns, defaults, id sequence and foreign keys of the plain
+table; its primary key becomes (id, date) because Postgres requires the partition key in unique
+constraints. Each month lives in `expense_pYYYYMM`, holding [first day, first day of next month);
+rows outside every monthly partition land in `expense_default`. Queries filtering on
+`date >= start AND date < end` (monthly reports, the monthly audit) only scan the matching
+partitions, and an old month can be detached as a standalone table without rewriting anything.
+"""
+import logging
+import re
+import zlib
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+PARENT = "expense"
+DEFAULT_PARTITION = "expense_default"
+_STAGING = "expense_unpartitioned"
+_MONTHLY_PARTITION = re.compile(r"^expense_p(\d{4})(\d{2})$")
+# Transaction-level advisory lock, so workers running the maintenance job concurrently take turns
+PARTITION_LOCK_ID = zlib.crc32(b"expense-tracker:expense-partitions")
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month:%Y%m}"
+
+
+def is_partition_table(name: str) -> bool:
+    """Whether `name` is a partition (or a detached former partition) of `expense`; not in the models."""
+    return name == DEFAULT_PARTITION or _MONTHLY_PARTITION.match(name) is not None
+
+
+def is_partitioned(connection: Connection) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    relkind = connection.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": PARENT}).scalar()
+    return relkind == "p"
+
+
+def partition_months(connection: Connection) -> List[date]:
+    """Months that currently have an attached partition, oldest first."""
+    names = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:name)"
+    ), {"name": PARENT}).scalars()
+    months = []
+    for name in names:
+        match = _MONTHLY_PARTITION.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def _create_partition(connection: Connection, month: date):
+    """
+    Creates and attaches the partition for `month`. Rows of that month already in the default
+    partition are moved into it first; otherwise attaching would fail on them.
+    """
+    name, start, end = partition_name(month), month, add_months(month, 1)
+    bounds = {"start": datetime(start.year, start.month, 1), "end": datetime(end.year, end.month, 1)}
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    connection.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), bounds)
+    # Bounds are literals in DDL; dates formatted here, never user input
+    connection.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"))
+
+
+def _create_attached_partition(connection: Connection, month: date):
+    # Only while converting: the parent is new and empty, so no rows need moving
+    end = add_months(month, 1)
+    connection.execute(text(
+        f"CREATE TABLE {partition_name(month)} PARTITION OF {PARENT} FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+
+
+def ensure_partitions(connection: Connection, months_ahead: int, today: Optional[date] = None) -> List[str]:
+    """
+    Creates missing monthly partitions from the current month through `months_ahead` months
+    ahead. Idempotent; the caller commits. Returns the names of the partitions created.
+    """
+    connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": PARTITION_LOCK_ID})
+    current = month_start(today or datetime.utcnow())
+    existing = set(partition_months(connection))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            _create_partition(connection, month)
+            created.append(partition_name(month))
+    return created
+
+
+def _rebuild(connection: Connection, months: Optional[List[date]]):
+    """
+    Replaces `expense` with a copy that keeps its columns, defaults, id sequence, foreign keys
+    and rows: partitioned into `months` (plus the default partition), or plain when None.
+    """
+    connection.execute(text(f"ALTER TABLE {PARENT} RENAME TO {_STAGING}"))
+    pkey = connection.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:name) AND contype = 'p'"
+    ), {"name": _STAGING}).scalar()
+    if pkey:
+        # Its index name would clash with the new table's primary key
+        connection.execute(text(f"ALTER TABLE {_STAGING} RENAME CONSTRAINT {pkey} TO {_STAGING}_pkey"))
+    foreign_keys = connection.execute(text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = to_regclass(:name) AND contype = 'f'"
+    ), {"name": _STAGING}).all()
+    sequence = connection.execute(text("SELECT pg_get_serial_sequence(:name, 'id')"), {"name": _STAGING}).scalar()
+
+    partition_by = " PARTITION BY RANGE (date)" if months is not None else ""
+    connection.execute(text(f"CREATE TABLE {PARENT} (LIKE {_STAGING} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){partition_by}"))
+    if sequence:
+        # The id default still points at the old table's sequence; hand it over before the old table is dropped
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {PARENT}.id"))
+    primary_key = "id, date" if months is not None else "id"
+    connection.execute(text(f"ALTER TABLE {PARENT} ADD CONSTRAINT {PARENT}_pkey PRIMARY KEY ({primary_key})"))
+    for name, definition in foreign_keys:
+        connection.execute(text(f"ALTER TABLE {PARENT} ADD CONSTRAINT {name} {definition}"))
+    if months is not None:
+        for month in months:
+            _create_attached_partition(connection, month)
+        connection.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT"))
+
+    connection.execute(text(f"INSERT INTO {PARENT} SELECT * FROM {_STAGING}"))
+    connection.execute(text(f"DROP TABLE {_STAGING}"))
+
+
+def partition_expense_table(connection: Connection, months_ahead: int):
+    """
+    Converts the plain `expense` table into a partitioned one in the caller's transaction: a
+    partition for every month that has expenses and for the current month through `months_ahead`
+    months ahead, plus the default partition. Rewrites the whole table under an exclusive lock.
+    """
+    with_rows = connection.execute(text(f"SELECT DISTINCT date_trunc('month', date) FROM {PARENT}")).scalars()
+    current = month_start(datetime.utcnow())
+    months = {month_start(value) for value in with_rows} | {add_months(current, n) for n in range(months_ahead + 1)}
+    logger.info(f"Partitioning the expense table into {len(months)} monthly partitions...")
+    _rebuild(connection, sorted(months))
+
+
+def merge_expense_table(connection: Connection):
+    """Turns the partitioned `expense` table back into a plain one. Detached partitions are left alone."""
+    logger.info("Merging expense partitions into a plain table...")
+    _rebuild(connection, None)
+    left = [name for name in connection.execute(text("SELECT relname FROM pg_class WHERE relkind = 'r'")).scalars()
+            if _MONTHLY_PARTITION.match(name)]
+    if left:
+        logger.warning(f"Detached partitions were not merged back: {', '.join(sorted(left))}.")
+
+
+def detach_partitions_before(connection: Connection, before: date, concurrently: bool = False) -> List[str]:
+    """
+    Detaches monthly partitions for months before `before`. Each becomes a standalone table of
+    the same name (to archive or drop); its rows leave `expense` without any rows being rewritten.
+    `concurrently` (Postgres 14+) avoids blocking queries on `expense` but needs an autocommit
+    connection.
+    """
+    detached = []
+    for month in partition_months(connection):
+        if month >= month_start(before):
+            break
+        name = partition_name(month)
+        connection.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}{' CONCURRENTLY' if concurrently else ''}"))
+        detached.append(name)
+    return detached
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+from backend.adapters.database.repositories.base import BaseRepository
+from backend.adapters.database.models import AICacheEntry
+
+class AICacheRepository(BaseRepository[AICacheEntry]):
+    def __init__(self, session: Session):
+        super().__init__(session, AICacheEntry)
+
+    def get_values(self, user_id: int, kind: str) -> Dict[str, str]:
+        """key -> value for the user's unexpired entries of one kind."""
+        rows = self.session.exec(
+            select(AICacheEntry.key, AICacheEntry.value)
+            .where(
+                AICacheEntry.user_id == user_id,
+                AICacheEntry.kind == kind,
+                AICacheEntry.expires_at > datetime.utcnow()
+            )
+        ).all()
+        return {key: value for key, value in rows}
+
+    def put(self, user_id: int, kind: str, key: str, value: str, ttl_seconds: float) -> Optional[AICacheEntry]:
+        """Inserts or replaces the entry; commits. None if a concurrent request inserted it first."""
+        now = datetime.utcnow()
+        entry = self.session.exec(
+            select(AICacheEntry).where(
+                AICacheEntry.user_id == user_id,
+                AICacheEntry.kind == kind,
+                AICacheEntry.key == key
+            )
+        ).first()
+        if entry is None:
+            entry = AICacheEntry(user_id=user_id, kind=kind, key=key, value=value, expires_at=now)
+        entry.value = value
+        entry.created_at = now
+        entry.expires_at = now + timedelta(seconds=ttl_seconds)
+        self.session.add(entry)
+        try:
+            self.session.commit()
+        except IntegrityError:
+            self.session.rollback()
+            return None
+        return entry
+
+    def delete_expired(self, before: datetime) -> int:
+        result = self.session.execute(delete(AICacheEntry).where(AICacheEntry.expires_at <= before))
+        self.session.commit()
+        return result.rowcount
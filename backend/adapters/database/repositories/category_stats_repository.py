@@ -0,0 +1,31 @@
+from typing import Any, Dict, Optional, List
+from sqlalchemy import update
+from sqlmodel import Session, select
+from backend.adapters.database.repositories.base import BaseRepository
+from backend.adapters.database.models import CategoryStats
+
+class CategoryStatsRepository(BaseRepository[CategoryStats]):
+    def __init__(self, session: Session):
+        super().__init__(session, CategoryStats)
+
+    def get_for_category(self, user_id: int, category_id: Optional[int]) -> Optional[CategoryStats]:
+        query = select(CategoryStats).where(CategoryStats.user_id == user_id)
+        if category_id is None:
+            query = query.where(CategoryStats.category_id == None)
+        else:
+            query = query.where(CategoryStats.category_id == category_id)
+        return self.session.exec(query).first()
+
+    def get_for_user(self, user_id: int) -> List[CategoryStats]:
+        return self.session.exec(
+            select(CategoryStats).where(CategoryStats.user_id == user_id)
+        ).all()
+
+    def compare_and_set(self, stats_id: int, expected_count: int, values: Dict[str, Any]) -> bool:
+        """Updates the row only if no other writer changed it since it was read (count unchanged). Does not commit."""
+        result = self.session.execute(
+            update(CategoryStats)
+            .where(CategoryStats.id == stats_id, CategoryStats.count == expected_count)
+            .values(**values)
+        )
+        return result.rowcount == 1
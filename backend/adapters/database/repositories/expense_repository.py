@@ -1,6 +1,6 @@
-from typing import List, Optional
+from typing import List, Optional, Iterator, Tuple
 from datetime import datetime
-from sqlmodel import Session, select
+from sqlmodel import Session, select, func
 from backend.adapters.database.repositories.base import BaseRepository
 from backend.adapters.database.models import Expense
 
@@ -57,3 +57,28 @@ class ExpenseRepository(BaseRepository[Expense]):
         
         result = self.session.exec(statement).one()
         return result or 0.0
+
+    def iter_ledger_rows(self, user_id: int, batch_size: int = 5000) -> Iterator[Tuple[int, datetime, float, Optional[int], str]]:
+        """Streams only the columns needed for ledger snapshots, oldest first."""
+        statement = select(Expense.id, Expense.date, Expense.amount, Expense.category_id, Expense.type)\
+            .where(Expense.user_id == user_id)\
+            .order_by(Expense.date, Expense.id)\
+            .execution_options(yield_per=batch_size)
+        for row in self.session.exec(statement):
+            yield tuple(row)
+
+    def get_title_history(self, user_id: int, type: str = "expense") -> List[Tuple[str, float, datetime]]:
+        """Returns (title, amount, date) for the user's full history, oldest first."""
+        statement = select(Expense.title, Expense.amount, Expense.date)\
+            .where(Expense.user_id == user_id)\
+            .where(Expense.type == type)\
+            .order_by(Expense.date)
+        return [tuple(row) for row in self.session.exec(statement)]
+
+    def get_title_categories(self, user_id: int, type: str = "expense") -> List[Tuple[str, Optional[int], int]]:
+        """Returns (title, category_id, count) for every distinct title/category pair the user has used."""
+        statement = select(Expense.title, Expense.category_id, func.count(Expense.id))\
+            .where(Expense.user_id == user_id)\
+            .where(Expense.type == type)\
+            .group_by(Expense.title, Expense.category_id)
+        return [tuple(row) for row in self.session.exec(statement)]
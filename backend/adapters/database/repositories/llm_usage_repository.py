@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import case
+from sqlmodel import Session, select, func
+from backend.adapters.database.repositories.base import BaseRepository
+from backend.adapters.database.models import LLMUsage
+
+class LLMUsageRepository(BaseRepository[LLMUsage]):
+    def __init__(self, session: Session):
+        super().__init__(session, LLMUsage)
+
+    def get_totals_since(self, user_id: int, since: datetime) -> Tuple[int, int]:
+        """(calls, total tokens) for a user since `since`."""
+        calls, tokens = self.session.exec(
+            select(func.count(LLMUsage.id), func.sum(LLMUsage.prompt_tokens + LLMUsage.completion_tokens))
+            .where(LLMUsage.user_id == user_id, LLMUsage.created_at >= since)
+        ).one()
+        return int(calls or 0), int(tokens or 0)
+
+    def get_grouped_since(self, user_id: int, since: datetime) -> List[Tuple[str, str, int, int, int, int, float]]:
+        """(call_site, model, calls, errors, prompt_tokens, completion_tokens, cost_usd) per call site and model."""
+        return self.session.exec(
+            select(LLMUsage.call_site, LLMUsage.model, func.count(LLMUsage.id),
+                   func.sum(case((LLMUsage.success == False, 1), else_=0)),
+                   func.sum(LLMUsage.prompt_tokens), func.sum(LLMUsage.completion_tokens), func.sum(LLMUsage.cost_usd))
+            .where(LLMUsage.user_id == user_id, LLMUsage.created_at >= since)
+            .group_by(LLMUsage.call_site, LLMUsage.model)
+        ).all()
+
+    def get_latency_at_rank(self, user_id: int, since: datetime, call_site: str, rank: int) -> Optional[float]:
+        """The `rank`-th smallest latency (0-based) of a call site's calls since `since`."""
+        return self.session.exec(
+            select(LLMUsage.latency_ms)
+            .where(LLMUsage.user_id == user_id, LLMUsage.created_at >= since, LLMUsage.call_site == call_site)
+            .order_by(LLMUsage.latency_ms)
+            .offset(rank).limit(1)
+        ).first()
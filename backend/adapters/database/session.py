@@ -1,14 +1,212 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
 from sqlmodel import create_engine, Session, SQLModel
 from backend.core.config import settings
+from backend.core.metrics import counters
 
-# Handle Postgres specific fix for SQLModel/SQLAlchemy if needed
-database_url = settings.DATABASE_URL
-if database_url and database_url.startswith("postgres://"):
-    database_url = database_url.replace("postgres://", "postgresql://", 1)
+logger = logging.getLogger(__name__)
 
-connect_args = {"check_same_thread": False} if settings.check_same_thread else {}
+def _normalize_url(url: str) -> str:
+    # Handle Postgres specific fix for SQLModel/SQLAlchemy if needed
+    if url and url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
 
-engine = create_engine(database_url, connect_args=connect_args)
+def _create_engine(url: str):
+    connect_args = {"check_same_thread": False} if "sqlite" in url else {}
+    return create_engine(url, connect_args=connect_args)
+
+database_url = _normalize_url(settings.DATABASE_URL)
+engine = _create_engine(database_url)
+
+# Optional read replica for read-only endpoints (see RoutingSession)
+read_engine = _create_engine(_normalize_url(settings.DATABASE_READ_URL)) if settings.DATABASE_READ_URL else None
+
+is_sqlite = engine.dialect.name == "sqlite"
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets readers run alongside the single writer instead of behind a database-wide lock;
+    synchronous=NORMAL is durable across app crashes (a power loss can drop the last commits).
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}") # negative = KiB
+    cursor.close()
+
+if settings.SQLITE_WAL:
+    for _engine in (engine, read_engine):
+        if _engine is not None and _engine.dialect.name == "sqlite":
+            event.listen(_engine, "connect", _apply_sqlite_pragmas)
+
+
+class SQLiteWriteSerializer:
+    """
+    SQLite allows one writer at a time; threadpool requests that write concurrently otherwise
+    spin in busy_timeout and can still fail with "database is locked". Connections of the app
+    engine take this process-wide lock right before their first INSERT/UPDATE/DELETE and hold it
+    until the transaction commits or rolls back, so writers queue here in order instead of
+    polling SQLite. Reads never wait. It only orders writers that SQLite would serialise anyway
+    (long writing transactions, e.g. bulk imports, delay other writers either way).
+
+    The wait is bounded by SQLITE_BUSY_TIMEOUT_MS; past it the write proceeds and SQLite's own
+    busy handler takes over (e.g. a thread that nests two writing sessions).
+    """
+
+    def __init__(self, timeout_seconds: float):
+        self._lock = threading.Lock()
+        self._holder = None # raw DBAPI connection whose transaction holds the lock
+        self.timeout_seconds = timeout_seconds
+
+    @staticmethod
+    def _raw(connection):
+        # SQLAlchemy Connection, pool proxy or the sqlite3 connection itself
+        connection = getattr(connection, "connection", connection)
+        return getattr(connection, "dbapi_connection", connection)
+
+    def acquire(self, connection):
+        raw = self._raw(connection)
+        if self._holder is raw:
+            return
+        if self._lock.acquire(timeout=self.timeout_seconds):
+            self._holder = raw
+        else:
+            logger.warning(f"Waited {self.timeout_seconds:.1f}s for the SQLite write lock; writing without it.")
+
+    def release(self, connection):
+        if self._holder is not None and self._holder is self._raw(connection):
+            self._holder = None
+            self._lock.release()
+
+
+write_serializer = SQLiteWriteSerializer(settings.SQLITE_BUSY_TIMEOUT_MS / 1000)
+
+if is_sqlite and settings.SQLITE_SERIALIZE_WRITES:
+    _WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _serialize_writes(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:7].upper().startswith(_WRITE_STATEMENTS):
+            write_serializer.acquire(conn)
+
+    # These fire just before the DBAPI commit/rollback; a writer let in meanwhile waits out
+    # the last instant in busy_timeout.
+    @event.listens_for(engine, "commit")
+    def _release_on_commit(conn):
+        write_serializer.release(conn)
+
+    @event.listens_for(engine, "rollback")
+    def _release_on_rollback(conn):
+        write_serializer.release(conn)
+
+    # A connection returned to the pool mid-transaction is rolled back by the pool's reset, and
+    # an invalidated one is discarded; neither goes through the Connection events above.
+    @event.listens_for(engine.pool, "reset")
+    def _release_on_reset(dbapi_connection, connection_record, reset_state):
+        write_serializer.release(dbapi_connection)
+
+    @event.listens_for(engine.pool, "invalidate")
+    def _release_on_invalidate(dbapi_connection, connection_record, exception):
+        write_serializer.release(dbapi_connection)
+
+# --- Read replica routing ---------------------------------------------------
+
+REPLICA_KEY = "use_replica" # session.info flag: SELECTs may go to read_engine
+WROTE_KEY = "wrote"
+USER_KEY = "user_id" # set by api.deps, so writes make that user sticky
+
+# Per worker: user_id -> monotonic time of the user's last write. Another worker may still send a
+# user's reads to the replica within the window; replica lag is expected to stay well below it.
+_recent_writes: Dict[int, float] = {}
+_recent_writes_lock = threading.Lock()
+_RECENT_WRITES_MAX_ENTRIES = 10000
+
+
+def note_write(user_id: Optional[int]):
+    if user_id is None:
+        return
+    with _recent_writes_lock:
+        if len(_recent_writes) >= _RECENT_WRITES_MAX_ENTRIES:
+            cutoff = time.monotonic() - settings.DATABASE_READ_STICKY_SECONDS
+            for uid in [uid for uid, at in _recent_writes.items() if at < cutoff]:
+                del _recent_writes[uid]
+        _recent_writes[user_id] = time.monotonic()
+
+
+def wrote_recently(user_id: int) -> bool:
+    """Whether the user wrote within DATABASE_READ_STICKY_SECONDS (their reads stay on the primary)."""
+    written_at = _recent_writes.get(user_id)
+    return written_at is not None and time.monotonic() - written_at < settings.DATABASE_READ_STICKY_SECONDS
+
+
+class RoutingSession(Session):
+    """
+    Session used by the API. Sends SELECTs to the read replica while `info["use_replica"]` is
+    set, and everything else to the primary: flushes, INSERT/UPDATE/DELETE, any statement while
+    the session holds pending changes, and every statement after its first write. Without
+    DATABASE_READ_URL, or without the flag, it is a plain session on the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (read_engine is None or not self.info.get(REPLICA_KEY) or self.info.get(WROTE_KEY)
+                or isinstance(clause, UpdateBase) or self.new or self.dirty or self.deleted):
+            return engine
+        return read_engine
+
+
+def _mark_written(session: Session):
+    session.info[WROTE_KEY] = True
+    note_write(session.info.get(USER_KEY))
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _note_flush(session, flush_context):
+    _mark_written(session)
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _note_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_written(orm_execute_state.session)
+
+
+@contextmanager
+def primary_reads(session: Session) -> Iterator[Session]:
+    """Reads inside the block go to the primary (e.g. building state that is persisted elsewhere)."""
+    previous = session.info.get(REPLICA_KEY)
+    session.info[REPLICA_KEY] = False
+    try:
+        yield session
+    finally:
+        session.info[REPLICA_KEY] = previous
+
+
+@contextmanager
+def read_session() -> Iterator[Session]:
+    """
+    Session for read-only work: SELECTs go to the replica when one is configured. Call
+    `read_as_user` before running queries on a user's behalf.
+    """
+    with RoutingSession(engine) as session:
+        session.info[REPLICA_KEY] = read_engine is not None
+        yield session
+
+
+def read_as_user(session: Session, user_id: int):
+    """Ties a read session to `user_id`: if they wrote recently, its reads move to the primary (read-your-writes)."""
+    session.info[USER_KEY] = user_id
+    if session.info.get(REPLICA_KEY) and wrote_recently(user_id):
+        session.info[REPLICA_KEY] = False
+    if read_engine is not None:
+        counters.increment("db_read.replica" if session.info[REPLICA_KEY] else "db_read.primary")
 
 def create_db_and_tables():
     # Import all models to ensure they are registered with SQLModel.metadata
@@ -16,5 +214,5 @@ def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
 def get_session():
-    with Session(engine) as session:
+    with RoutingSession(engine) as session:
         yield session
@@ -0,0 +1,338 @@
+import os
+import struct
+import logging
+import threading
+import calendar
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# One fixed-width record per expense row. Dates are stored as seconds since the epoch
+# (naive UTC, same as the database) so they can be used directly as datetime64 values.
+LEDGER_DTYPE = np.dtype([
+    ("id", "<i8"),
+    ("date", "<M8[s]"),
+    ("amount", "<f8"),
+    ("category_id", "<i8"),  # -1 when uncategorized
+    ("type", "u1"),          # see TYPE_CODES
+])
+
+# Delta records carry the same columns plus an operation code.
+DELTA_DTYPE = np.dtype(LEDGER_DTYPE.descr + [("op", "u1")])
+
+OP_UPSERT = 0
+OP_DELETE = 1
+
+TYPE_CODES = {"expense": 0, "income": 1}
+NO_CATEGORY = -1
+
+_MAGIC = b"ETLEDGR1"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIQQ")  # magic, format version, row count, max expense id
+_HEADER_SIZE = 64  # padded so the record array starts on an aligned offset
+
+LedgerRow = Tuple[int, datetime, float, Optional[int], str]
+
+
+def _to_epoch_seconds(value: datetime) -> int:
+    return calendar.timegm(value.timetuple())
+
+
+def _encode_rows(rows: Iterable[LedgerRow], dtype: np.dtype, op: Optional[int] = None) -> np.ndarray:
+    records = []
+    for expense_id, date, amount, category_id, type_ in rows:
+        record = (
+            expense_id,
+            _to_epoch_seconds(date),
+            amount,
+            category_id if category_id is not None else NO_CATEGORY,
+            TYPE_CODES.get(type_, TYPE_CODES["expense"]),
+        )
+        records.append(record if op is None else record + (op,))
+    return np.array(records, dtype=dtype)
+
+
+class LedgerView:
+    """Column-oriented, read-only view of a user's expense history."""
+
+    def __init__(self, user_id: int, records: np.ndarray, version: Tuple[int, ...]):
+        self.user_id = user_id
+        self.records = records
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.records["id"]
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self.records["date"]
+
+    @property
+    def amounts(self) -> np.ndarray:
+        return self.records["amount"]
+
+    @property
+    def category_ids(self) -> np.ndarray:
+        return self.records["category_id"]
+
+    @property
+    def types(self) -> np.ndarray:
+        return self.records["type"]
+
+    def expenses_only(self) -> np.ndarray:
+        return self.records[self.records["type"] == TYPE_CODES["expense"]]
+
+
+class LedgerSnapshotStore:
+    """
+    Per-user binary snapshot files plus an append-only delta log.
+
+    Layout under the data dir:
+      <user_id>.ledger            fixed header + LEDGER_DTYPE records, sorted by date
+      <user_id>.delta             DELTA_DTYPE records appended since the snapshot
+      <user_id>.delta.compacting  delta being folded into a snapshot that is being rebuilt
+
+    Snapshots are memory-mapped read-only and shared between requests of the same worker;
+    the OS page cache shares them between workers. At most `max_maps` users' maps are kept
+    open, least recently used evicted first.
+    """
+
+    def __init__(self, data_dir: str, max_maps: int = 256):
+        self.data_dir = data_dir
+        self.max_maps = max_maps
+        self._maps: Dict[int, Tuple[Tuple[int, int, int], np.memmap]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- Paths ---
+    def snapshot_path(self, user_id: int) -> str:
+        return os.path.join(self.data_dir, f"{user_id}.ledger")
+
+    def delta_path(self, user_id: int) -> str:
+        return os.path.join(self.data_dir, f"{user_id}.delta")
+
+    def _compacting_path(self, user_id: int) -> str:
+        return self.delta_path(user_id) + ".compacting"
+
+    def _ensure_dir(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+
+    # --- Writing ---
+    def begin_compaction(self, user_id: int):
+        """Moves the current delta aside so writes made during a rebuild land in a fresh log."""
+        delta = self.delta_path(user_id)
+        compacting = self._compacting_path(user_id)
+        if os.path.exists(delta) and not os.path.exists(compacting):
+            os.replace(delta, compacting)
+
+    def abort_compaction(self, user_id: int):
+        """Puts the set-aside delta back in front of anything written since."""
+        compacting = self._compacting_path(user_id)
+        if not os.path.exists(compacting):
+            return
+        with open(compacting, "rb") as f:
+            pending = f.read()
+        delta = self.delta_path(user_id)
+        if os.path.exists(delta):
+            with open(delta, "rb") as f:
+                pending += f.read()
+        tmp = delta + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(pending)
+        os.replace(tmp, delta)
+        os.remove(compacting)
+
+    def write_snapshot(self, user_id: int, rows: Iterable[LedgerRow], chunk_size: int = 10000) -> int:
+        """Writes a new snapshot atomically and discards the delta it supersedes."""
+        self._ensure_dir()
+        path = self.snapshot_path(user_id)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp" # concurrent rebuilds in one process each get their own
+        count = 0
+        max_id = 0
+        try:
+            with open(tmp, "wb") as f:
+                f.write(b"\0" * _HEADER_SIZE)
+                chunk = []
+                for row in rows:
+                    chunk.append(row)
+                    if len(chunk) >= chunk_size:
+                        encoded = _encode_rows(chunk, LEDGER_DTYPE)
+                        f.write(encoded.tobytes())
+                        count += len(encoded)
+                        max_id = max(max_id, int(encoded["id"].max()))
+                        chunk = []
+                if chunk:
+                    encoded = _encode_rows(chunk, LEDGER_DTYPE)
+                    f.write(encoded.tobytes())
+                    count += len(encoded)
+                    max_id = max(max_id, int(encoded["id"].max()))
+                f.seek(0)
+                f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, count, max_id))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        compacting = self._compacting_path(user_id)
+        if os.path.exists(compacting):
+            os.remove(compacting)
+        logger.info(f"Wrote ledger snapshot for user {user_id} with {count} rows.")
+        return count
+
+    def append_delta(self, user_id: int, rows: Iterable[LedgerRow], op: int = OP_UPSERT):
+        if not os.path.exists(self.snapshot_path(user_id)):
+            # Nothing to patch; the next load builds a fresh snapshot anyway.
+            return
+        encoded = _encode_rows(rows, DELTA_DTYPE, op=op)
+        if not len(encoded):
+            return
+        # A single O_APPEND write keeps concurrent appenders from interleaving records.
+        with open(self.delta_path(user_id), "ab") as f:
+            f.write(encoded.tobytes())
+
+    def drop(self, user_id: int):
+        for path in (self.snapshot_path(user_id), self.delta_path(user_id), self._compacting_path(user_id)):
+            if os.path.exists(path):
+                os.remove(path)
+        with self._lock:
+            self._maps.pop(user_id, None)
+
+    def drop_all(self):
+        """Removes every user's snapshot, e.g. after the expense table was changed in bulk outside the services."""
+        if os.path.isdir(self.data_dir):
+            for name in os.listdir(self.data_dir):
+                if name.endswith((".ledger", ".delta", ".compacting", ".tmp")):
+                    os.remove(os.path.join(self.data_dir, name))
+        with self._lock:
+            self._maps.clear()
+
+    # --- Reading ---
+    def version(self, user_id: int) -> Optional[Tuple[int, ...]]:
+        """Cheap token that changes whenever the snapshot or its delta log changes."""
+        try:
+            snap = os.stat(self.snapshot_path(user_id))
+        except FileNotFoundError:
+            return None
+        return (snap.st_ino, snap.st_mtime_ns, self._size(self._compacting_path(user_id)), self._size(self.delta_path(user_id)))
+
+    def delta_rows(self, user_id: int) -> int:
+        total = self._size(self._compacting_path(user_id)) + self._size(self.delta_path(user_id))
+        return total // DELTA_DTYPE.itemsize
+
+    def load(self, user_id: int) -> Optional[LedgerView]:
+        version = self.version(user_id)
+        if version is None:
+            return None
+        base = self._map_snapshot(user_id)
+        if base is None:
+            return None
+
+        delta = self._read_delta(self._compacting_path(user_id))
+        current = self._read_delta(self.delta_path(user_id))
+        if len(current):
+            delta = np.concatenate([delta, current]) if len(delta) else current
+
+        if not len(delta):
+            # Zero-copy: the view's columns are slices of the shared memory map.
+            return LedgerView(user_id, base, version)
+        return LedgerView(user_id, self._apply_delta(base, delta), version)
+
+    def _map_snapshot(self, user_id: int) -> Optional[np.memmap]:
+        path = self.snapshot_path(user_id)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._maps.get(user_id)
+            if cached and cached[0] == key:
+                self._maps.move_to_end(user_id)
+                return cached[1]
+
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            logger.warning(f"Ledger snapshot for user {user_id} is truncated; ignoring it.")
+            return None
+        magic, fmt, count, _max_id = _HEADER.unpack(header)
+        if magic != _MAGIC or fmt != _FORMAT_VERSION:
+            logger.warning(f"Ledger snapshot for user {user_id} has an unknown format; ignoring it.")
+            return None
+
+        if count:
+            records = np.memmap(path, dtype=LEDGER_DTYPE, mode="r", offset=_HEADER_SIZE, shape=(count,))
+        else:
+            records = np.empty(0, dtype=LEDGER_DTYPE)
+
+        with self._lock:
+            self._maps[user_id] = (key, records)
+            self._maps.move_to_end(user_id)
+            while len(self._maps) > self.max_maps:
+                # Unmapped once no request's LedgerView still holds it; closing it here would pull
+                # the pages out from under such a view
+                self._maps.popitem(last=False)
+        return records
+
+    @staticmethod
+    def _read_delta(path: str) -> np.ndarray:
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return np.empty(0, dtype=DELTA_DTYPE)
+        # Ignore a torn trailing record from an interrupted append.
+        usable = len(raw) - (len(raw) % DELTA_DTYPE.itemsize)
+        return np.frombuffer(raw[:usable], dtype=DELTA_DTYPE)
+
+    @staticmethod
+    def _apply_delta(base: np.ndarray, delta: np.ndarray) -> np.ndarray:
+        # Last operation per expense id wins.
+        reversed_ids = delta["id"][::-1]
+        _, first_in_reversed = np.unique(reversed_ids, return_index=True)
+        latest = delta[len(delta) - 1 - first_in_reversed]
+
+        kept = base[~np.isin(base["id"], latest["id"])]
+        upserts = latest[latest["op"] == OP_UPSERT]
+        patched = np.empty(len(upserts), dtype=LEDGER_DTYPE)
+        for name in LEDGER_DTYPE.names:
+            patched[name] = upserts[name]
+
+        merged = np.concatenate([np.asarray(kept), patched])
+        return merged[np.argsort(merged["date"], kind="stable")]
+
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
+
+
+_store: Optional[LedgerSnapshotStore] = None
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> LedgerSnapshotStore:
+    """Process-wide store so every request in a worker shares the same memory maps."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from backend.core.config import settings
+                _store = LedgerSnapshotStore(settings.LEDGER_DATA_DIR, settings.LEDGER_MAX_OPEN_SNAPSHOTS)
+    return _store
+
+
+def ledger_row(expense: Any) -> LedgerRow:
+    return (expense.id, expense.date, expense.amount, expense.category_id, expense.type)
@@ -14,6 +14,7 @@ sys.path.append(os.getcwd())
 # Import models to register them with SQLModel.metadata
 from backend.adapters.database import models
 from backend.adapters.database.session import database_url
+from backend.adapters.database.partitioning import is_partition_table
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -34,6 +35,11 @@ target_metadata = SQLModel.metadata
 # ... etc.
 
 
+def include_name(name, type_, parent_names):
+    # Expense partitions (EXPENSE_PARTITIONING) are managed outside the models
+    return not (type_ == "table" and is_partition_table(name))
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -50,6 +56,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -65,6 +72,14 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # Called from the app (adapters/database/migrations.py) with an open connection, e.g. under the migration lock
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata, include_name=include_name)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     # Create configuration dict with URL from our database.py
     configuration = config.get_section(config.config_ini_section, {})
     configuration["sqlalchemy.url"] = database_url
@@ -77,7 +92,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_name=include_name
         )
 
         with context.begin_transaction():
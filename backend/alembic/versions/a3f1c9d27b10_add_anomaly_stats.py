@@ -0,0 +1,49 @@
+"""Add anomaly flag and per-category running stats
+
+Revision ID: a3f1c9d27b10
+Revises: 5e9336781da9
+Create Date: 2026-10-19 19:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f1c9d27b10'
+down_revision: Union[str, Sequence[str], None] = '5e9336781da9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('expense') as batch_op:
+        batch_op.add_column(sa.Column('is_anomaly', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+    op.create_table('categorystats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('mean', sa.Float(), nullable=False),
+    sa.Column('m2', sa.Float(), nullable=False),
+    sa.Column('quantile_state', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['category.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'category_id', name='unique_user_category_stats')
+    )
+    op.create_index(op.f('ix_categorystats_user_id'), 'categorystats', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_categorystats_user_id'), table_name='categorystats')
+    op.drop_table('categorystats')
+    with op.batch_alter_table('expense') as batch_op:
+        batch_op.drop_column('is_anomaly')
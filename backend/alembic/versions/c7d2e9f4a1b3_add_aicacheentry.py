@@ -0,0 +1,101 @@
+"""Add AI cache table and move BUDGET_ALERT suggestions into it
+
+Revision ID: c7d2e9f4a1b3
+Revises: b5e8d1a4c2f7
+Create Date: 2026-10-19 23:40:00.000000
+
+"""
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2e9f4a1b3'
+down_revision: Union[str, Sequence[str], None] = 'b5e8d1a4c2f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BUDGET_ALERT_PREFIX = "BUDGET_ALERT:"
+BUDGET_ALERT_TTL = timedelta(hours=24)
+
+aisuggestion = sa.table('aisuggestion',
+    sa.column('id', sa.Integer()),
+    sa.column('user_id', sa.Integer()),
+    sa.column('content', sa.String()),
+    sa.column('created_at', sa.DateTime()),
+)
+aicacheentry = sa.table('aicacheentry',
+    sa.column('user_id', sa.Integer()),
+    sa.column('kind', sa.String()),
+    sa.column('key', sa.String()),
+    sa.column('value', sa.String()),
+    sa.column('created_at', sa.DateTime()),
+    sa.column('expires_at', sa.DateTime()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('aicacheentry',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('key', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('value', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'kind', 'key', name='unique_aicache_user_kind_key')
+    )
+    op.create_index(op.f('ix_aicacheentry_expires_at'), 'aicacheentry', ['expires_at'], unique=False)
+
+    # Still-fresh budget advice becomes cache entries (newest per user and category); the rest is dropped
+    bind = op.get_bind()
+    cutoff = datetime.utcnow() - BUDGET_ALERT_TTL
+    rows = bind.execute(
+        sa.select(aisuggestion.c.user_id, aisuggestion.c.content, aisuggestion.c.created_at)
+        .where(aisuggestion.c.content.like(BUDGET_ALERT_PREFIX + "%"), aisuggestion.c.created_at >= cutoff)
+        .order_by(aisuggestion.c.created_at)
+    ).all()
+    latest = {}
+    for user_id, content, created_at in rows:
+        parts = content.split(":", 2)
+        if len(parts) == 3 and parts[1].isdigit():
+            latest[(user_id, parts[1])] = (parts[2], created_at)
+    if latest:
+        op.bulk_insert(aicacheentry, [{
+            "user_id": user_id,
+            "kind": "budget_alert",
+            "key": key,
+            "value": value,
+            "created_at": created_at,
+            "expires_at": created_at + BUDGET_ALERT_TTL,
+        } for (user_id, key), (value, created_at) in latest.items()])
+    bind.execute(sa.delete(aisuggestion).where(aisuggestion.c.content.like(BUDGET_ALERT_PREFIX + "%")))
+
+    op.create_index('ix_aisuggestion_user_created', 'aisuggestion', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_aisuggestion_user_created', table_name='aisuggestion')
+
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(aicacheentry.c.user_id, aicacheentry.c.key, aicacheentry.c.value, aicacheentry.c.created_at)
+        .where(aicacheentry.c.kind == "budget_alert", aicacheentry.c.expires_at > datetime.utcnow())
+    ).all()
+    if rows:
+        op.bulk_insert(aisuggestion, [{
+            "user_id": user_id,
+            "content": f"{BUDGET_ALERT_PREFIX}{key}:{value}",
+            "created_at": created_at,
+        } for user_id, key, value, created_at in rows])
+
+    op.drop_index(op.f('ix_aicacheentry_expires_at'), table_name='aicacheentry')
+    op.drop_table('aicacheentry')
@@ -0,0 +1,27 @@
+"""Add (user_id, month) index to monthlyreport for paginated listing
+
+Revision ID: d1e4b7c9a2f5
+Revises: c7d2e9f4a1b3
+Create Date: 2026-10-19 23:55:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1e4b7c9a2f5'
+down_revision: Union[str, Sequence[str], None] = 'c7d2e9f4a1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_monthlyreport_user_month', 'monthlyreport', ['user_id', 'month'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_monthlyreport_user_month', table_name='monthlyreport')
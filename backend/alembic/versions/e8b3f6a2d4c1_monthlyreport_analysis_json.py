@@ -0,0 +1,80 @@
+"""Store monthlyreport.analysis as JSON (JSONB on Postgres)
+
+Revision ID: e8b3f6a2d4c1
+Revises: d1e4b7c9a2f5
+Create Date: 2026-10-20 00:20:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b3f6a2d4c1'
+down_revision: Union[str, Sequence[str], None] = 'd1e4b7c9a2f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JSON_TYPE = sa.JSON().with_variant(postgresql.JSONB(astext_type=sa.Text()), 'postgresql')
+# Old rows were written unchecked: text that is not a JSON object is kept verbatim under this key
+RAW_KEY = 'raw'
+BATCH_SIZE = 1000
+
+
+def _to_json(value):
+    if not value:
+        return {}
+    try:
+        data = json.loads(value)
+    except ValueError:
+        return {RAW_KEY: value}
+    return data if isinstance(data, dict) else {RAW_KEY: value}
+
+
+def _to_text(value):
+    if isinstance(value, dict) and set(value) == {RAW_KEY}:
+        return value[RAW_KEY]
+    return json.dumps(value or {})
+
+
+def _copy_column(bind, source, target, convert):
+    """Fills `target` from `source` for every row, one executemany per BATCH_SIZE rows."""
+    report = sa.table('monthlyreport', sa.column('id', sa.Integer()), source, target)
+    statement = sa.update(report).where(report.c.id == sa.bindparam('report_id')).values({target.name: sa.bindparam('document')})
+    rows = bind.execute(sa.select(report.c.id, source)).all()
+    for start in range(0, len(rows), BATCH_SIZE):
+        bind.execute(statement, [{'report_id': report_id, 'document': convert(value)} for report_id, value in rows[start:start + BATCH_SIZE]])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('monthlyreport') as batch_op:
+        batch_op.add_column(sa.Column('analysis_new', JSON_TYPE, nullable=True))
+    bind = op.get_bind()
+    _copy_column(bind, sa.column('analysis', sa.String()), sa.column('analysis_new', JSON_TYPE), _to_json)
+    with op.batch_alter_table('monthlyreport') as batch_op:
+        batch_op.drop_column('analysis')
+        batch_op.alter_column('analysis_new', new_column_name='analysis', existing_type=JSON_TYPE, nullable=False)
+
+    if bind.dialect.name == 'postgresql':
+        # Grade history and grade filters read analysis->>'grade'
+        op.execute("CREATE INDEX ix_monthlyreport_user_grade ON monthlyreport (user_id, (analysis->>'grade'))")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_monthlyreport_user_grade")
+
+    with op.batch_alter_table('monthlyreport') as batch_op:
+        batch_op.add_column(sa.Column('analysis_new', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    _copy_column(bind, sa.column('analysis', JSON_TYPE), sa.column('analysis_new', sa.String()), _to_text)
+    with op.batch_alter_table('monthlyreport') as batch_op:
+        batch_op.drop_column('analysis')
+        batch_op.alter_column('analysis_new', new_column_name='analysis', existing_type=sa.String(), nullable=False)
@@ -0,0 +1,37 @@
+"""Partition expense by month on date (Postgres, EXPENSE_PARTITIONING)
+
+Revision ID: f3a9c1e7b5d2
+Revises: e8b3f6a2d4c1
+Create Date: 2026-10-20 01:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from backend.adapters.database import partitioning
+from backend.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c1e7b5d2'
+down_revision: Union[str, Sequence[str], None] = 'e8b3f6a2d4c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Optional: a no-op on SQLite and with EXPENSE_PARTITIONING off. Databases that enable it later
+    # convert with `python backend/scripts/partition_expenses.py convert`.
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or not settings.EXPENSE_PARTITIONING or partitioning.is_partitioned(bind):
+        return
+    partitioning.partition_expense_table(bind, settings.EXPENSE_PARTITION_MONTHS_AHEAD)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if partitioning.is_partitioned(bind):
+        partitioning.merge_expense_table(bind)
@@ -1,14 +1,15 @@
-from typing import Generator
+from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlmodel import Session, select
 
 from backend.core.config import settings
-from backend.adapters.database.session import get_session
+from backend.adapters.database.session import REPLICA_KEY, USER_KEY, get_session, primary_reads, read_as_user, read_session
 from backend.adapters.database.models import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+READ_USER_KEY = "current_user" # session.info: the user get_read_db authenticated
 
 def get_db() -> Generator[Session, None, None]:
     """
@@ -17,22 +18,52 @@ def get_db() -> Generator[Session, None, None]:
     """
     yield from get_session()
 
-async def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _token_email(token: str) -> str:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    
-    statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
+        raise _credentials_exception()
+    if email is None:
+        raise _credentials_exception()
+    return email
+
+def _get_user(session: Session, email: str) -> Optional[User]:
+    return session.exec(select(User).where(User.email == email)).first()
+
+async def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_db)) -> User:
+    user = _get_user(session, _token_email(token))
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    session.info[USER_KEY] = user.id # writes in this request keep the user's reads on the primary
     return user
+
+def get_read_db(token: str = Depends(oauth2_scheme)) -> Generator[Session, None, None]:
+    """
+    Dependency for read-only endpoints: one session for the whole request, the user lookup
+    included, with queries on the read replica (DATABASE_READ_URL) when configured, unless the
+    user wrote moments ago. Pair it with `get_read_user`.
+    """
+    email = _token_email(token)
+    with read_session() as session:
+        user = _get_user(session, email)
+        if user is None and session.info.get(REPLICA_KEY):
+            # Registered moments ago and not on the replica yet
+            with primary_reads(session):
+                user = _get_user(session, email)
+        if user is None:
+            raise _credentials_exception()
+        read_as_user(session, user.id)
+        session.info[READ_USER_KEY] = user
+        yield session
+
+def get_read_user(session: Session = Depends(get_read_db)) -> User:
+    """The authenticated user, loaded through the request's read session."""
+    return session.info[READ_USER_KEY]
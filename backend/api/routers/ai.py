@@ -1,13 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
-from typing import Optional
+from typing import Iterator, Optional
+from datetime import datetime
 from pydantic import BaseModel
 from backend.adapters.database.models import User, UserSettings, AISuggestion
 from backend.api.deps import get_db as get_session
 from backend.api.deps import get_current_user
 from backend.adapters.ai import service as ai_service
+from backend.adapters.ai.llm_provider import CircuitOpenError, model_router
+from backend.adapters.ai.provider_registry import invalidate_provider
+from backend.adapters.ai.receipt_image import prepare_receipt_async
+from backend.adapters.ai.usage import QuotaExceededError
+from backend.core.config import settings
+from backend.services.usage_service import UsageService
+import json
+import logging
 
 router = APIRouter(prefix="/ai", tags=["ai"])
+logger = logging.getLogger(__name__)
 
 class SettingsUpdate(BaseModel):
     openai_api_key: str
@@ -22,7 +33,7 @@ class ParseRequest(BaseModel):
     text: str
 
 @router.post("/parse")
-async def parse_expense(
+def parse_expense(
     request: ParseRequest,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
@@ -32,11 +43,15 @@ async def parse_expense(
         service = ai_service.AIService(session, current_user.id)
         parsed_data = service.parse_expense_natural_language(request.text)
         return {"parsed": parsed_data}
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except CircuitOpenError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/recurring/detect")
-async def detect_recurring(
+def detect_recurring(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -46,7 +61,7 @@ async def detect_recurring(
     return {"suggestions": suggestions}
 
 @router.get("/budgets/forecast")
-async def get_budget_forecast(
+def get_budget_forecast(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -55,8 +70,29 @@ async def get_budget_forecast(
     forecasts = service.generate_budget_forecast()
     return {"forecasts": forecasts}
 
+@router.get("/usage")
+def get_usage(
+    days: int = Query(30, ge=1, le=365),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """LLM calls, tokens, cost and p50/p95 latency per AI feature over the last `days`, plus today's quota."""
+    return UsageService(session).get_summary(current_user.id, days)
+
+@router.get("/models")
+def get_model_health(
+    current_user: User = Depends(get_current_user)
+):
+    """Routing table and rolling per-model latency/error stats in this worker."""
+    return {
+        "tiers": settings.LLM_MODEL_TIERS,
+        "call_sites": settings.LLM_CALL_SITE_TIERS,
+        "tier_fallbacks": settings.LLM_TIER_FALLBACKS,
+        "models": model_router.stats(),
+    }
+
 @router.post("/settings")
-async def save_settings(
+def save_settings(
     settings_data: SettingsUpdate,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
@@ -73,10 +109,11 @@ async def save_settings(
     session.add(user_settings)
     session.commit()
     session.refresh(user_settings)
+    invalidate_provider(current_user.id)
     return {"message": "Settings saved successfully"}
 
 @router.get("/settings")
-async def get_settings(
+def get_settings(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -96,7 +133,7 @@ async def get_settings(
     }
 
 @router.post("/generate")
-async def generate_suggestion(
+def generate_suggestion(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -105,18 +142,80 @@ async def generate_suggestion(
     suggestion_text = service.generate_financial_advice()
     return {"suggestion": suggestion_text}
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _sse_stream(chunks: Iterator[str]) -> Iterator[str]:
+    """
+    Server-sent events for a chunked AI response: a `token` event per chunk, then `done`
+    (with the saved suggestion's id when the generator returns one) or `error`.
+    """
+    try:
+        while True:
+            try:
+                chunk = next(chunks)
+            except StopIteration as stop:
+                done = {}
+                if isinstance(stop.value, AISuggestion):
+                    done = {"id": stop.value.id, "created_at": stop.value.created_at.isoformat()}
+                yield _sse("done", done)
+                return
+            yield _sse("token", {"text": chunk})
+    except QuotaExceededError as e:
+        yield _sse("error", {"detail": str(e), "status": 429})
+    except CircuitOpenError as e:
+        yield _sse("error", {"detail": str(e), "status": 503})
+    except Exception as e:
+        logger.error(f"AI stream error: {e}")
+        yield _sse("error", {"detail": "Could not generate a response. Please try again.", "status": 500})
+
+def _require_llm(service: ai_service.AIService, call_site: str):
+    """Rejects up front (before any response bytes) when AI is not configured or its circuit is open."""
+    if not service.provider:
+        raise HTTPException(status_code=400, detail="AI features are not enabled. Please configure your API key.")
+    service.provider.ensure_available(call_site)
+
+def _event_stream_response(chunks: Iterator[str]) -> StreamingResponse:
+    # The sync iterator runs in the threadpool; disable proxy buffering so chunks flush immediately
+    return StreamingResponse(
+        _sse_stream(chunks),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/generate/stream")
+def generate_suggestion_stream(
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Generate a new suggestion, streamed as server-sent events; saved once complete."""
+    service = ai_service.AIService(session, current_user.id)
+    _require_llm(service, "financial_advice")
+    return _event_stream_response(service.stream_financial_advice())
+
+@router.get("/breakdown/stream")
+def expense_breakdown_stream(
+    start_date: datetime,
+    end_date: datetime,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """AI breakdown of spending between two dates (end inclusive), streamed as server-sent events."""
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    service = ai_service.AIService(session, current_user.id)
+    _require_llm(service, "expense_breakdown")
+    return _event_stream_response(service.stream_expense_breakdown(start_date, end_date))
+
 @router.get("/suggestion")
-async def get_latest_suggestion(
+def get_latest_suggestion(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Get the most recent suggestion without regenerating."""
     suggestion = session.exec(
         select(AISuggestion)
-        .where(
-            AISuggestion.user_id == current_user.id,
-            AISuggestion.content.not_like("BUDGET_ALERT:%")
-        )
+        .where(AISuggestion.user_id == current_user.id)
         .order_by(AISuggestion.created_at.desc())
     ).first()
     
@@ -129,25 +228,102 @@ async def get_latest_suggestion(
         "created_at": suggestion.created_at.isoformat()
     }}
 
+from functools import partial
+
 from fastapi import UploadFile, File
+from starlette.concurrency import run_in_threadpool
+from typing import List
 
-import logging
+from backend.services.expense_service import ExpenseService
+from backend.services.receipt_batch import scan_receipts, receipt_to_expense
 
-logger = logging.getLogger(__name__)
+_UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+async def _read_upload(file: UploadFile, limit: int) -> bytes:
+    """Reads the upload in chunks, rejecting it as soon as it exceeds `limit` bytes."""
+    chunks, size = [], 0
+    while chunk := await file.read(_UPLOAD_CHUNK_BYTES):
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(status_code=413, detail=f"Receipt image is too large (max {limit // (1024 * 1024)} MB).")
+        chunks.append(chunk)
+    return b"".join(chunks)
 
 @router.post("/scan-receipt")
 async def scan_receipt(
     file: UploadFile = File(...),
+    grayscale: Optional[bool] = None,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """Scan a receipt image and extract expense details."""
     try:
-        contents = await file.read()
+        contents = await _read_upload(file, settings.RECEIPT_MAX_UPLOAD_BYTES)
+        receipt = await prepare_receipt_async(contents, grayscale=grayscale)
         service = ai_service.AIService(session, current_user.id)
-        # Pass content type (e.g. image/jpeg)
-        extracted_data = service.extract_receipt_data(contents, media_type=file.content_type or "image/jpeg")
+        extracted_data = await run_in_threadpool(service.scan_receipt, receipt)
         return {"parsed": extracted_data}
+    except HTTPException:
+        raise
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"Receipt scan error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/scan-receipts")
+async def scan_receipts_batch(
+    files: List[UploadFile] = File(...),
+    create: bool = False,
+    grayscale: Optional[bool] = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Scan several receipts at once. Streams NDJSON: one line per receipt as it completes
+    ({"index", "filename", "status", "parsed" | "error"}), then a summary line. With
+    `create=true`, successfully parsed receipts are saved as expenses in one bulk insert.
+    """
+    if len(files) > settings.RECEIPT_BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.RECEIPT_BATCH_MAX_FILES} receipts per batch.")
+    service = ai_service.AIService(session, current_user.id)
+    _require_llm(service, "receipt_extraction")
+
+    # The multipart body is already spooled to temporary files; each one is read only when its scan starts
+    if sum(file.size or 0 for file in files) > settings.RECEIPT_BATCH_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Receipts are too large together (max {settings.RECEIPT_BATCH_MAX_BYTES // (1024 * 1024)} MB per batch).")
+    uploads, rejected = [], []
+    for index, file in enumerate(files):
+        if (file.size or 0) > settings.RECEIPT_MAX_UPLOAD_BYTES:
+            rejected.append({"index": index, "filename": file.filename, "status": "error", "error": f"Receipt image is too large (max {settings.RECEIPT_MAX_UPLOAD_BYTES // (1024 * 1024)} MB)."})
+        else:
+            uploads.append((index, file.filename or f"receipt-{index + 1}", partial(_read_upload, file, settings.RECEIPT_MAX_UPLOAD_BYTES)))
+
+    async def stream():
+        parsed = {}
+        for item in rejected:
+            yield json.dumps(item) + "\n"
+        async for item in scan_receipts(service, [(name, read) for _, name, read in uploads], grayscale=grayscale):
+            item["index"] = uploads[item["index"]][0] # position in the original upload list
+            if item["status"] == "ok":
+                parsed[item["index"]] = item["parsed"]
+            yield json.dumps(item) + "\n"
+
+        summary = {"done": True, "scanned": len(parsed), "failed": len(files) - len(parsed)}
+        if create:
+            # Synchronous DB work (the write may wait on the SQLite write lock): off the event loop
+            category_ids = {cid for cid, _ in await run_in_threadpool(service.get_category_choices)}
+            to_create, invalid = [], []
+            for index in sorted(parsed):
+                try:
+                    to_create.append((index, receipt_to_expense(parsed[index], category_ids)))
+                except ValueError as e:
+                    invalid.append({"index": index, "error": str(e)})
+            expenses = await run_in_threadpool(ExpenseService(session).create_expenses, [e for _, e in to_create], current_user.id)
+            summary["created"] = [{"index": index, "expense_id": expense.id} for (index, _), expense in zip(to_create, expenses)]
+            summary["not_created"] = invalid
+        yield json.dumps(summary) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
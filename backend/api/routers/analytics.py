@@ -2,15 +2,17 @@ from fastapi import APIRouter, Depends
 from sqlmodel import Session
 from backend.api.deps import get_db as get_session
 from backend.adapters.database.models import User
-from backend.api.deps import get_current_user
+from backend.api.deps import get_current_user, get_read_db, get_read_user
 from backend.services.analytics_service import AnalyticsService
+from backend.services.anomaly_service import AnomalyService
+from backend.services.intent_parser import routing_stats
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 @router.get("/dashboard")
 def get_dashboard_stats(
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    session: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user)
 ):
     service = AnalyticsService(session)
     return service.get_dashboard_stats(current_user.id)
@@ -25,11 +27,30 @@ def predict_category(
     category_id = service.predict_category(current_user.id, title)
     return {"category_id": category_id}
 
+@router.get("/anomalies")
+def get_anomalies(
+    limit: int = 50,
+    session: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user)
+):
+    """Score the user's full history and return the most unusual transactions."""
+    service = AnomalyService(session)
+    return {"anomalies": service.score_history(current_user.id, limit=limit)}
+
+@router.post("/anomalies/rebuild")
+def rebuild_anomaly_stats(
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Recompute running per-category statistics from history (e.g. after bulk edits)."""
+    service = AnomalyService(session)
+    return {"categories": service.rebuild_stats(current_user.id)}
+
 @router.get("/monthly-report")
 def get_monthly_report(
     month: str, # Format YYYY-MM
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    session: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user)
 ):
     # This logic is also available in ReportService, but seems to be used here too.
     # We can delegate to ReportService for consistency if preferred, or keep in AnalyticsService.
@@ -53,3 +74,9 @@ def ask_ai(
     
     return service.process_ai_query(current_user.id, q_text)
 
+@router.get("/ask/stats")
+def get_ask_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """How /ask questions were answered in this worker: local grammar vs LLM, and the local fraction."""
+    return routing_stats()
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlmodel import Session
 import csv
 import io
 
 from backend.api.deps import get_db as get_session
 from backend.adapters.database.models import User
-from backend.api.deps import get_current_user
+from backend.api.deps import get_current_user, get_read_db, get_read_user
 from backend.services.import_service import ImportService
 
 router = APIRouter(prefix="/data", tags=["data"])
@@ -22,12 +23,13 @@ async def import_expenses(
     
     content = await file.read()
     service = ImportService(session)
-    return service.process_import(content, current_user.id)
+    # Synchronous DB writes (they may wait on the SQLite write lock): off the event loop
+    return await run_in_threadpool(service.process_import, content, current_user.id)
 
 @router.get("/export")
 def export_expenses(
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    session: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user)
 ):
     service = ImportService(session)
     expenses = service.get_all_expenses(current_user.id)
@@ -58,8 +60,8 @@ def export_expenses(
 
 @router.get("/export/json")
 def export_data_json(
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    session: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user)
 ):
     service = ImportService(session)
     expenses = service.get_all_expenses(current_user.id)
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlmodel import Session
 from typing import Optional
 from backend.adapters.database.models import User
 from backend.api.deps import get_db as get_session
-from backend.api.deps import get_current_user
+from backend.api.deps import get_current_user, get_read_db, get_read_user
 from backend.services.report_service import ReportService
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+NEXT_BEFORE_HEADER = "X-Next-Before"
+
 @router.post("/generate")
 def generate_report(
     month: Optional[str] = None,
@@ -23,17 +25,38 @@ def generate_report(
 
 @router.get("/")
 def get_reports(
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    limit: int = Query(12, ge=1, le=100),
+    before: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    include_analysis: bool = False,
+    session: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user)
+):
+    """
+    Past reports, newest first, a page at a time. Summaries only unless include_analysis=true.
+    When there are older reports, the X-Next-Before header holds the `before` for the next page.
+    """
+    service = ReportService(session)
+    page = service.list_reports(current_user.id, limit=limit, before=before, include_analysis=include_analysis)
+    if page["next_before"]:
+        response.headers[NEXT_BEFORE_HEADER] = page["next_before"]
+    return page["items"]
+
+@router.get("/grades")
+def get_grade_history(
+    limit: int = Query(12, ge=1, le=120),
+    grade: Optional[str] = Query(None, pattern="^[ABCDF]$"),
+    session: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user)
 ):
-    """Get all past reports."""
+    """Audit grade per month, newest first; optionally only months with the given grade."""
     service = ReportService(session)
-    return service.get_all_reports(current_user.id)
+    return service.get_grade_history(current_user.id, limit=limit, grade=grade)
 
 @router.get("/latest")
 def get_latest_report(
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    session: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user)
 ):
     """Get the most recent report."""
     service = ReportService(session)
@@ -42,8 +65,8 @@ def get_latest_report(
 @router.get("/{month}")
 def get_report_by_month(
     month: str,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    session: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user)
 ):
     """Get report for a specific month (YYYY-MM)."""
     service = ReportService(session)
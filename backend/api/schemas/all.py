@@ -18,6 +18,7 @@ class ExpenseCreate(ExpenseBase):
 class ExpenseRead(ExpenseBase):
     id: int
     created_at: datetime
+    is_anomaly: bool = False
     category: Optional[CategoryRead] = None
 
 class ExpenseUpdate(SQLModel):
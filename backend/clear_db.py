@@ -1,5 +1,6 @@
 from sqlmodel import Session, delete
 from backend.adapters.database.session import engine
+from backend.adapters.ledger.snapshot import get_snapshot_store
 from backend.adapters.database.models import (
     User, Category, Expense, Budget, RecurringExpense, 
     UserSettings, AISuggestion, Challenge, MonthlyReport
@@ -32,6 +33,7 @@ def clear_db():
         session.exec(delete(User))
         
         session.commit()
+        get_snapshot_store().drop_all()
         print("Database cleared successfully.")
 
 if __name__ == "__main__":
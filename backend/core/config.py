@@ -1,4 +1,5 @@
 import os
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator
 
@@ -9,6 +10,120 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 43200 # 30 days
     LOG_DIR: str = "logs"
     ENABLE_REGISTRATION: bool = False
+    # Worker startup: "migrate" upgrades a schema behind head (one worker at a time, under a lock);
+    # "check" refuses to start instead, for deployments that migrate in a separate step
+    DB_STARTUP_MODE: str = "migrate"
+    # Optional read replica: read-only endpoints (analytics, reports, exports) query it, except for a
+    # user who wrote within DATABASE_READ_STICKY_SECONDS (their reads stay on the primary)
+    DATABASE_READ_URL: Optional[str] = None
+    DATABASE_READ_STICKY_SECONDS: float = 5.0
+    # Postgres only: range-partition `expense` by month on `date` (adapters/database/partitioning.py).
+    # Partitions up to EXPENSE_PARTITION_MONTHS_AHEAD months ahead are created by a maintenance job.
+    EXPENSE_PARTITIONING: bool = False
+    EXPENSE_PARTITION_MONTHS_AHEAD: int = 3
+    EXPENSE_PARTITION_CHECK_SECONDS: float = 6 * 3600.0
+
+    # SQLite tuning (ignored for other databases). SQLITE_WAL=false keeps SQLite's defaults (rollback journal).
+    SQLITE_WAL: bool = True
+    SQLITE_SYNCHRONOUS: str = "NORMAL" # FULL for power-loss durability of the last commits
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024 # per connection
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_SERIALIZE_WRITES: bool = True # queue writing sessions on a process-wide lock (adapters/database/session.py)
+
+    # Ledger snapshots (memory-mapped per-user expense columns for analytics)
+    LEDGER_DATA_DIR: str = "data/ledger"
+    LEDGER_DELTA_COMPACT_ROWS: int = 5000
+    LEDGER_MAX_OPEN_SNAPSHOTS: int = 256 # memory maps kept open per worker, least recently used closed first
+
+    # Spend anomaly detection
+    ANOMALY_MIN_SAMPLES: int = 10
+    ANOMALY_Z_THRESHOLD: float = 3.0 # write-time, on running log-amount stats
+    ANOMALY_BATCH_THRESHOLD: float = 3.5 # batch, robust (median/MAD) z-score
+
+    # Natural-language quick add: local parses at or above this confidence skip the LLM
+    NL_PARSE_MIN_CONFIDENCE: float = 0.75
+
+    # Approximate token budget for the data section of AI prompts (transactions, totals, trends)
+    AI_PROMPT_TOKEN_BUDGET: int = 1200
+
+    # LLM usage ledger and per-user daily quotas (0 = unlimited)
+    LLM_DAILY_CALL_QUOTA: int = 0
+    LLM_DAILY_TOKEN_QUOTA: int = 0
+    LLM_USAGE_BATCH_SIZE: int = 100
+    LLM_USAGE_FLUSH_SECONDS: float = 2.0
+
+    # Model routing: call site -> tier -> models tried in order on timeout/error.
+    # "local:<model>" entries use the OpenAI-compatible server at LLM_LOCAL_BASE_URL (skipped when unset).
+    LLM_MODEL_TIERS: Dict[str, List[str]] = {
+        "fast": ["gpt-4o-mini", "gpt-3.5-turbo"],
+        "smart": ["gpt-4o", "gpt-4o-mini"],
+        "vision": ["gpt-4o", "gpt-4o-mini"],
+    }
+    LLM_CALL_SITE_TIERS: Dict[str, str] = {
+        "expense_parse": "fast",
+        "auto_categorize": "fast",
+        "recurring_names": "fast",
+        "nl_query": "fast",
+        "budget_forecast": "fast",
+        "receipt_extraction": "vision",
+        "financial_advice": "smart",
+        "expense_breakdown": "smart",
+        "monthly_audit": "smart",
+        "budget_suggestions": "smart",
+        "spending_challenges": "smart",
+    }
+    LLM_DEFAULT_TIER: str = "fast"
+    # Tier a call escalates to once every model of its own tier failed (chains are followed, cycles stop)
+    LLM_TIER_FALLBACKS: Dict[str, str] = {"fast": "smart"}
+    LLM_TIMEOUT_SECONDS: float = 30.0 # per attempt, before failing over
+    LLM_LOCAL_BASE_URL: Optional[str] = None # e.g. http://localhost:11434/v1
+    LLM_LOCAL_API_KEY: str = "sk-local"
+    LLM_HTTP_MAX_CONNECTIONS: int = 50 # shared connection pool for all provider keys
+    # Configured providers are cached per user; settings are re-read after this long (other workers' key changes)
+    LLM_PROVIDER_CACHE_TTL_SECONDS: float = 60.0
+    # litellm is imported on first use (seconds of import time); the API process warms it in the background at startup
+    LLM_PRELOAD: bool = True
+
+    # Circuit breaker per provider key: opens after this many consecutive failed calls,
+    # fails fast for LLM_BREAKER_RESET_SECONDS, then lets one probe call through.
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 3
+    LLM_BREAKER_RESET_SECONDS: float = 60.0
+
+    # Cached AI output (AICacheEntry) and the background sweep of expired entries
+    BUDGET_ADVICE_CACHE_TTL_SECONDS: int = 24 * 3600
+    AI_CACHE_SWEEP_SECONDS: float = 600.0
+    MAINTENANCE_ENABLED: bool = True # periodic jobs in services/maintenance.py; disable on extra workers if wanted
+
+    # History retention per user, opt-in (0 = no limit, the default): once set, rows beyond the newest
+    # KEEP_LAST or older than MAX_AGE_DAYS are permanently deleted by one worker's maintenance job
+    AI_SUGGESTION_KEEP_LAST: int = 0
+    AI_SUGGESTION_MAX_AGE_DAYS: int = 0
+    MONTHLY_REPORT_KEEP_LAST: int = 0
+    MONTHLY_REPORT_MAX_AGE_DAYS: int = 0
+    RETENTION_INTERVAL_SECONDS: float = 3600.0
+    RETENTION_BATCH_SIZE: int = 500 # rows per delete transaction, so locks stay short
+    RETENTION_BATCH_PAUSE_SECONDS: float = 0.05
+
+    # Offline load testing: serve every user from the in-process fake LLM (adapters/ai/fake_llm.py)
+    LLM_FAKE_PROVIDER: bool = False
+    LLM_FAKE_LATENCY_MS: float = 800.0 # median; log-normal with LLM_FAKE_LATENCY_SIGMA spread
+    LLM_FAKE_LATENCY_SIGMA: float = 0.5
+    LLM_FAKE_ERROR_RATE: float = 0.0
+    LLM_FAKE_CHUNK_MS: float = 15.0
+    LLM_FAKE_SEED: int = 0
+
+    # Receipt scanning: uploads are downscaled/recompressed before the vision call
+    RECEIPT_MAX_UPLOAD_BYTES: int = 15 * 1024 * 1024
+    RECEIPT_MAX_LONG_EDGE: int = 1600
+    RECEIPT_JPEG_QUALITY: int = 80
+    RECEIPT_GRAYSCALE: bool = False
+    RECEIPT_PREPROCESS_WORKERS: int = 4
+    RECEIPT_MATCH_MAX_DIFF: float = 2.0 # fingerprint grey-level difference under which a re-scan reuses the cached extraction
+    RECEIPT_CACHE_TTL_SECONDS: int = 86400
+    RECEIPT_BATCH_MAX_FILES: int = 20
+    RECEIPT_BATCH_MAX_BYTES: int = 60 * 1024 * 1024 # all uploads of one batch together
+    RECEIPT_BATCH_CONCURRENCY: int = 4 # concurrent vision calls per batch request
     
     # CORS
     BACKEND_CORS_ORIGINS: list[str] | str = []
@@ -0,0 +1,22 @@
+import threading
+from collections import Counter
+from typing import Dict
+
+
+class Counters:
+    """Process-local counters for cheap operational metrics (per worker, reset on restart)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Counter = Counter()
+
+    def increment(self, name: str, by: int = 1):
+        with self._lock:
+            self._values[name] += by
+
+    def snapshot(self, prefix: str = "") -> Dict[str, int]:
+        with self._lock:
+            return {k: v for k, v in self._values.items() if k.startswith(prefix)}
+
+
+counters = Counters()
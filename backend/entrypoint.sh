@@ -3,9 +3,9 @@
 # Exit immediately if a command exits with a non-zero status
 set -e
 
-# Run database migrations
+# Run database migrations and seed defaults once, before the workers start
 echo "Running database migrations..."
-alembic -c backend/alembic.ini upgrade head
+python -m backend.init_db
 
 # Start the application
 echo "Starting application..."
@@ -1,9 +1,15 @@
-from sqlmodel import Session, select
-from backend.adapters.database.session import create_db_and_tables, engine
+import logging
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, SQLModel, select
+from backend.adapters.database.session import engine
 from backend.adapters.database.models import Category
+from backend.adapters.database import migrations, partitioning
+from backend.core.config import settings
 
-def init_categories():
-    with Session(engine) as session:
+logger = logging.getLogger(__name__)
+
+def init_categories(bind=engine):
+    with Session(bind) as session:
         existing = session.exec(select(Category)).first()
         if not existing:
             defaults = [
@@ -16,11 +22,59 @@ def init_categories():
             ]
             session.add_all(defaults)
             session.commit()
-            print("Initialized default master categories.")
+            logger.info("Initialized default master categories.")
         else:
-            print("Categories already exist. Skipping initialization.")
+            logger.info("Categories already exist. Skipping initialization.")
+
+def _is_seeded(connection: Connection) -> bool:
+    return Session(connection).exec(select(Category.id).limit(1)).first() is not None
+
+def _migrate(connection: Connection):
+    """Brings the schema to head. Caller holds the migration lock."""
+    current = migrations.current_revisions(connection)
+    if current == migrations.head_revisions():
+        return
+    if current:
+        logger.info(f"Upgrading database schema from {', '.join(sorted(current))} to head...")
+        migrations.upgrade(connection)
+    elif migrations.has_tables(connection):
+        # Created by create_all at startup before migrations ran there: that schema is the
+        # baseline revision, and the migrations after it still have to run (create_all never
+        # adds columns to existing tables).
+        logger.warning(f"Database has tables but no Alembic revision; stamping {migrations.BASELINE_REVISION} and upgrading to head.")
+        migrations.stamp(connection, migrations.BASELINE_REVISION)
+        migrations.upgrade(connection)
+    else:
+        logger.info("Empty database: creating schema at head.")
+        SQLModel.metadata.create_all(connection)
+        if settings.EXPENSE_PARTITIONING and connection.dialect.name == "postgresql":
+            # What the partitioning migration would have done; cheap since the table was just created
+            partitioning.partition_expense_table(connection, settings.EXPENSE_PARTITION_MONTHS_AHEAD)
+        migrations.stamp(connection)
+    connection.commit()
+
+def prepare_database():
+    """
+    Startup check run by every worker. At head and seeded (the usual case) it costs one
+    connection and two small queries. Otherwise one process at a time (migration_lock) brings the
+    schema to head and seeds default categories; the rest wait, re-check and find nothing to do.
+    With DB_STARTUP_MODE="check" a schema behind head is an error instead of being upgraded.
+    """
+    heads = migrations.head_revisions()
+    with engine.connect() as connection:
+        at_head = migrations.current_revisions(connection) == heads
+        if at_head and _is_seeded(connection):
+            return
+    if not at_head and settings.DB_STARTUP_MODE == "check":
+        raise RuntimeError("Database schema is not at the latest revision; run `python -m backend.init_db` or `alembic -c backend/alembic.ini upgrade head` first.")
+
+    with migrations.migration_lock(engine) as connection:
+        _migrate(connection)
+        init_categories(connection)
+        connection.commit()
 
 if __name__ == "__main__":
-    create_db_and_tables()
-    init_categories()
+    from backend.core.logging import setup_logging
+    setup_logging()
+    prepare_database()
     print("Database initialization completed.")
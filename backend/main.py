@@ -1,23 +1,42 @@
-from fastapi import FastAPI
+import math
+import threading
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 # Import new routers
 from backend.api.routers import expenses, auth, analytics, data, categories, budgets, recurring, ai, challenges, reports
-from backend.init_db import init_categories
+from backend.init_db import prepare_database
 from backend.core.config import settings
-from backend.adapters.database.session import create_db_and_tables
 from backend.core.logging import setup_logging
+from backend.adapters.ai.usage import QuotaExceededError, usage_writer
+from backend.adapters.ai.llm_provider import CircuitOpenError, get_litellm
+from backend.services.maintenance import maintenance
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     setup_logging()
-    create_db_and_tables() 
-    init_categories()
+    prepare_database() # revision check; migrates and seeds under a lock only when needed
+    if settings.MAINTENANCE_ENABLED:
+        maintenance.start()
+    if settings.LLM_PRELOAD and not settings.LLM_FAKE_PROVIDER:
+        # Import litellm off the startup path so the first AI request doesn't pay for it
+        threading.Thread(target=get_litellm, name="litellm-preload", daemon=True).start()
     yield
+    maintenance.stop()
+    usage_writer.stop() # flush queued LLM usage rows
 
 app = FastAPI(lifespan=lifespan)
 
+@app.exception_handler(QuotaExceededError)
+async def quota_exceeded_handler(request: Request, exc: QuotaExceededError):
+    return JSONResponse(status_code=429, content={"detail": str(exc)})
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(math.ceil(exc.retry_after))})
+
 # CORS setup
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,157 @@
+"""
+Load-tests the AI endpoints offline against the fake LLM, in-process, on a throwaway SQLite
+database seeded with synthetic users and expenses.
+
+    python backend/scripts/benchmark_ai_endpoints.py --requests 400 --concurrency 16 --latency-ms 300
+    python backend/scripts/benchmark_ai_endpoints.py --error-rate 0.3      # circuit breaker / fallbacks
+    python backend/scripts/benchmark_ai_endpoints.py --llm-url http://127.0.0.1:8001/v1   # via litellm and fake_llm_server.py
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from statistics import median
+
+# Ensure the backend module is in the python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(parent_dir)
+
+# (name, method, path, json body)
+SCENARIOS = [
+    ("parse", "POST", "/ai/parse", {"text": "team lunch at the new place"}),
+    ("forecast", "GET", "/ai/budgets/forecast", None),
+    ("budget_suggestions", "POST", "/budgets/auto-suggest", None),
+    ("advice", "POST", "/ai/generate", None),
+    ("advice_stream", "POST", "/ai/generate/stream", None),
+    ("nl_query", "POST", "/analytics/ask", {"q": "how did my food spending compare with my friends"}),
+    ("challenges", "POST", "/challenges/generate", None),
+    ("auto_categorize", "POST", "/expenses/auto-categorize", None),
+    ("monthly_report", "POST", "/reports/generate", None),
+]
+
+MERCHANTS = ["Starbucks", "Swiggy", "BigBasket", "Uber", "Amazon", "Netflix", "Apollo Pharmacy", "Electricity Bill", "Misc Shop"]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def seed(users: int, expenses_per_user: int):
+    from sqlmodel import Session
+    from backend.adapters.database.models import Budget, Category, Expense, User, UserSettings
+    from backend.adapters.database.session import engine, create_db_and_tables
+    from backend.core.security import create_access_token
+
+    create_db_and_tables()
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    tokens = []
+    with Session(engine) as session:
+        for n in range(users):
+            user = User(email=f"bench{n}@example.com", full_name=f"Bench {n}", password_hash="x")
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+            session.add(UserSettings(user_id=user.id, openai_api_key=f"sk-bench-{n}"))
+            categories = [Category(name=name, user_id=user.id) for name in ("Food", "Groceries", "Transport", "Shopping", "Bills")]
+            session.add_all(categories)
+            session.commit()
+            for category in categories[:2]:
+                session.add(Budget(user_id=user.id, category_id=category.id, amount=500))
+            for i in range(expenses_per_user):
+                session.add(Expense(
+                    user_id=user.id,
+                    title=rng.choice(MERCHANTS),
+                    amount=round(rng.uniform(40, 2500), 2),
+                    date=now - timedelta(days=rng.randint(0, 90), hours=rng.randint(0, 23)),
+                    category_id=rng.choice(categories).id if rng.random() > 0.2 else None,
+                ))
+            session.commit()
+            tokens.append(create_access_token({"sub": user.email}))
+    return tokens
+
+
+def run(tokens, scenarios, total_requests: int, concurrency: int):
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    local = threading.local()
+    results = defaultdict(list) # scenario -> [(latency_ms, status)]
+    results_lock = threading.Lock()
+
+    def one(i: int):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = TestClient(app)
+        name, method, path, body = scenarios[i % len(scenarios)]
+        headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+        start = time.perf_counter()
+        response = client.request(method, path, json=body, headers=headers)
+        _ = response.content # streams are read to the end
+        latency_ms = (time.perf_counter() - start) * 1000
+        with results_lock:
+            results[name].append((latency_ms, response.status_code))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    print(f"\n{'endpoint':<20}{'n':>6}{'non-2xx':>9}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, _, _, _ in scenarios:
+        rows = results.get(name)
+        if not rows:
+            continue
+        latencies = [latency for latency, _ in rows]
+        failures = sum(1 for _, status in rows if status >= 300)
+        print(f"{name:<20}{len(rows):>6}{failures:>9}{median(latencies):>10.0f}{_percentile(latencies, 95):>10.0f}{max(latencies):>10.0f}")
+    print(f"\n{total_requests} requests in {elapsed:.1f}s ({total_requests / elapsed:.1f} req/s) with {concurrency} concurrent clients")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark/soak-test the AI endpoints against the fake LLM.")
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--expenses", type=int, default=300, help="Synthetic expenses per user")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Median fake LLM latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--scenarios", help="Comma-separated subset of: " + ", ".join(s[0] for s in SCENARIOS))
+    parser.add_argument("--llm-url", help="Use an OpenAI-compatible server (e.g. fake_llm_server.py) through litellm instead of the in-process fake")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure the environment before importing the app
+    tmp = tempfile.mkdtemp(prefix="ai-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+    os.environ["LEDGER_DATA_DIR"] = os.path.join(tmp, "ledger")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    if args.llm_url:
+        os.environ["LLM_LOCAL_BASE_URL"] = args.llm_url
+        os.environ["LLM_MODEL_TIERS"] = '{"fast": ["local:fake"], "smart": ["local:fake"], "vision": ["local:fake"]}'
+    else:
+        os.environ["LLM_FAKE_PROVIDER"] = "true"
+        os.environ["LLM_FAKE_LATENCY_MS"] = str(args.latency_ms)
+        os.environ["LLM_FAKE_LATENCY_SIGMA"] = str(args.latency_sigma)
+        os.environ["LLM_FAKE_ERROR_RATE"] = str(args.error_rate)
+
+    scenarios = SCENARIOS
+    if args.scenarios:
+        wanted = set(args.scenarios.split(","))
+        scenarios = [s for s in SCENARIOS if s[0] in wanted]
+
+    tokens = seed(args.users, args.expenses)
+    print(f"Seeded {args.users} users x {args.expenses} expenses in {tmp}")
+    run(tokens, scenarios, args.requests, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import json
+import sys
+import os
+import time
+from datetime import date, timedelta
+from statistics import median
+
+# Ensure the backend module is in the python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(parent_dir)
+
+from backend.core.config import settings
+from backend.services.expense_parser import ExpenseParser
+
+# Fixed "today" so relative dates in the corpus are stable (a Wednesday)
+TODAY = date(2025, 6, 4)
+
+CATEGORIES = [
+    (1, "Food & Dining"), (2, "Groceries"), (3, "Transport"), (4, "Shopping"),
+    (5, "Entertainment"), (6, "Bills & Utilities"), (7, "Health"), (8, "Rent"),
+]
+
+HISTORY = [
+    ("Starbucks", 1, 24), ("Chai Point", 1, 40), ("Swiggy Order", 1, 31), ("Zomato", 1, 12),
+    ("BigBasket", 2, 18), ("DMart", 2, 9), ("Uber Ride", 3, 35), ("Ola", 3, 8), ("Metro Recharge", 3, 6),
+    ("Amazon", 4, 14), ("Netflix", 5, 10), ("PVR Cinemas", 5, 4), ("Airtel Postpaid", 6, 12),
+    ("Electricity Bill", 6, 12), ("Apollo Pharmacy", 7, 5), ("House Rent", 8, 12), ("Amazon", 2, 3),
+]
+
+# (text, expected amount, expected date offset in days before TODAY, expected category id)
+CORPUS = [
+    ("coffee 150", 150, 0, 1),
+    ("coffee 150 yesterday", 150, 1, 1),
+    ("starbucks 350", 350, 0, 1),
+    ("paid 420 at starbucks yesterday", 420, 1, 1),
+    ("chai point 60", 60, 0, 1),
+    ("swiggy 540 last night", 540, 1, 1),
+    ("lunch 220", 220, 0, 1),
+    ("dinner with friends 1,850", 1850, 0, 1),
+    ("₹90 tea", 90, 0, 1),
+    ("zomato rs 310 on monday", 310, 2, 1),
+    ("groceries 1.2k", 1200, 0, 2),
+    ("bigbasket 2,340 day before yesterday", 2340, 2, 2),
+    ("vegetables 180 today", 180, 0, 2),
+    ("dmart 1450 on sunday", 1450, 3, 2),
+    ("milk 56", 56, 0, 2),
+    ("uber 230", 230, 0, 3),
+    ("uber ride to office 189 yesterday", 189, 1, 3),
+    ("ola 310 3 days ago", 310, 3, 3),
+    ("petrol 2000", 2000, 0, 3),
+    ("auto 80", 80, 0, 3),
+    ("metro recharge 500 last friday", 500, 5, 3),
+    ("parking 40", 40, 0, 3),
+    ("amazon 899", 899, 0, 4),
+    ("bought shoes for 2499", 2499, 0, 4),
+    ("spent 1299 on a shirt", 1299, 0, 4),
+    ("netflix 649", 649, 0, 5),
+    ("movie tickets 700 on saturday", 700, 4, 5),
+    ("pvr 560", 560, 0, 5),
+    ("electricity bill 1830", 1830, 0, 6),
+    ("airtel postpaid 599 on 1st jun", 599, 3, 6),
+    ("wifi 799", 799, 0, 6),
+    ("mobile recharge 239", 239, 0, 6),
+    ("medicines 340", 340, 0, 7),
+    ("apollo pharmacy 1,120 yesterday", 1120, 1, 7),
+    ("doctor visit 800 on 28/05", 800, 7, 7),
+    ("rent 18000", 18000, 0, 8),
+    ("house rent ₹18,000 on the 1st", 18000, 3, 8),
+    ("$12 snacks at airport", 12, 0, 1),
+    ("gift for mom 1500", 1500, 0, None),
+    ("haircut 300", 300, 0, None),
+    ("2 coffees 300", 300, 0, 1),
+    ("donation 500", 500, 0, None),
+    ("birthday party stuff", None, 0, None),
+    ("paid rahul back", None, 0, None),
+]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(corpus, repeats: int, threshold: float, verbose: bool):
+    parser = ExpenseParser(CATEGORIES, HISTORY)
+
+    hits = correct_hits = fully_correct = 0
+    latencies = []
+    for text, amount, days_ago, category_id in corpus:
+        expected_date = (TODAY - timedelta(days=days_ago)).isoformat()
+        for _ in range(repeats):
+            start = time.perf_counter()
+            parsed = parser.parse(text, today=TODAY)
+            latencies.append((time.perf_counter() - start) * 1_000_000)
+
+        correct = parsed.amount == amount and parsed.date == expected_date and parsed.category_id == category_id
+        fully_correct += correct
+        if parsed.confidence >= threshold:
+            hits += 1
+            correct_hits += correct
+        if verbose or (parsed.confidence >= threshold and not correct):
+            flag = "HIT " if parsed.confidence >= threshold else "LLM "
+            print(f"{flag}{'ok ' if correct else 'BAD'} {parsed.confidence:.2f}  {text!r} -> "
+                  f"{parsed.title!r} {parsed.amount} {parsed.date} cat={parsed.category_id}")
+
+    total = len(corpus)
+    print(f"\nCorpus: {total} entries, threshold {threshold}")
+    print(f"Served locally: {hits}/{total} ({hits / total:.0%}); correct when served: {correct_hits}/{max(hits, 1)} "
+          f"({correct_hits / max(hits, 1):.0%})")
+    print(f"Correct overall (ignoring confidence): {fully_correct}/{total} ({fully_correct / total:.0%})")
+    print(f"Latency per parse: p50 {median(latencies):.1f} µs, p95 {_percentile(latencies, 95):.1f} µs, "
+          f"max {max(latencies):.1f} µs over {len(latencies)} parses")
+
+
+def load_corpus(path: str):
+    """JSON lines with text, amount, days_ago and category_id keys."""
+    with open(path) as f:
+        return [(row["text"], row.get("amount"), row.get("days_ago", 0), row.get("category_id"))
+                for row in (json.loads(line) for line in f if line.strip())]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rule-based quick-add parser: local hit rate, accuracy and latency.")
+    parser.add_argument("--corpus", help="JSON lines corpus instead of the built-in one (uses the built-in categories/history)")
+    parser.add_argument("--repeats", type=int, default=200, help="Parses per entry for latency figures")
+    parser.add_argument("--threshold", type=float, default=settings.NL_PARSE_MIN_CONFIDENCE)
+    parser.add_argument("--verbose", action="store_true", help="Print every entry, not just confident mistakes")
+
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else CORPUS
+    run(corpus, args.repeats, args.threshold, args.verbose)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Read throughput under write load on a throwaway SQLite database, for each SQLite profile:
+
+    default      rollback journal, no write serialiser (SQLITE_WAL=false, SQLITE_SERIALIZE_WRITES=false)
+    wal          WAL + pragmas only
+    wal+serial   WAL + pragmas + the single-writer lock (the app's default)
+
+    python backend/scripts/benchmark_sqlite_concurrency.py --readers 8 --writers 4 --seconds 10
+    python backend/scripts/benchmark_sqlite_concurrency.py --writers 16 --hold-ms 20   # slow write transactions
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from statistics import median
+
+# Ensure the backend module is in the python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(parent_dir)
+
+PROFILES = {
+    "default": {"SQLITE_WAL": "false", "SQLITE_SERIALIZE_WRITES": "false"},
+    "wal": {"SQLITE_WAL": "true", "SQLITE_SERIALIZE_WRITES": "false"},
+    "wal+serial": {"SQLITE_WAL": "true", "SQLITE_SERIALIZE_WRITES": "true"},
+}
+TITLES = ["Starbucks", "Swiggy", "BigBasket", "Uber", "Amazon", "Netflix", "Apollo Pharmacy", "Electricity Bill"]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def seed(users: int, expenses_per_user: int):
+    from sqlmodel import Session
+    from backend.adapters.database.models import Category, Expense, User
+    from backend.adapters.database.session import engine, create_db_and_tables
+
+    create_db_and_tables()
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        for n in range(users):
+            user = User(email=f"bench{n}@example.com", full_name=f"Bench {n}", password_hash="x")
+            session.add(user)
+            session.commit()
+            categories = [Category(name=name, user_id=user.id) for name in ("Food", "Transport", "Shopping", "Bills")]
+            session.add_all(categories)
+            session.commit()
+            session.add_all([Expense(
+                user_id=user.id, title=rng.choice(TITLES), amount=round(rng.uniform(40, 2500), 2),
+                date=now - timedelta(days=rng.randint(0, 365)), category_id=rng.choice(categories).id,
+            ) for _ in range(expenses_per_user)])
+            session.commit()
+    return [(n + 1, [c for c in range(n * 4 + 1, n * 4 + 5)]) for n in range(users)]
+
+
+def run_profile(args) -> dict:
+    """One profile in this process (settings were set through the environment by the parent)."""
+    from sqlalchemy import func
+    from sqlmodel import Session, select
+    from backend.adapters.database.models import Expense
+    from backend.adapters.database.session import engine
+
+    users = seed(args.users, args.expenses)
+    stop = threading.Event()
+    lock = threading.Lock()
+    read_ms, write_ms, errors = [], [], Counter()
+
+    def reader(seed_value: int):
+        rng = random.Random(seed_value)
+        while not stop.is_set():
+            user_id, _ = rng.choice(users)
+            since = datetime.utcnow() - timedelta(days=90)
+            started = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    # Dashboard-style reads: category totals plus the latest page of expenses
+                    session.exec(select(Expense.category_id, func.sum(Expense.amount))
+                                 .where(Expense.user_id == user_id, Expense.date >= since)
+                                 .group_by(Expense.category_id)).all()
+                    session.exec(select(Expense).where(Expense.user_id == user_id)
+                                 .order_by(Expense.date.desc()).limit(50)).all()
+                with lock:
+                    read_ms.append((time.perf_counter() - started) * 1000)
+            except Exception as e:
+                with lock:
+                    errors[f"read: {str(e).splitlines()[0][:60]}"] += 1
+
+    def writer(seed_value: int):
+        rng = random.Random(seed_value)
+        while not stop.is_set():
+            user_id, category_ids = rng.choice(users)
+            started = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    # Read-then-write, like the expense endpoints (category lookup, insert, stats update)
+                    latest = session.exec(select(Expense).where(Expense.user_id == user_id)
+                                          .order_by(Expense.id.desc()).limit(1)).first()
+                    session.add(Expense(user_id=user_id, title=rng.choice(TITLES), amount=round(rng.uniform(40, 2500), 2),
+                                        date=datetime.utcnow(), category_id=rng.choice(category_ids)))
+                    if latest is not None:
+                        latest.amount = round(latest.amount + 1, 2)
+                        session.add(latest)
+                    if args.hold_ms:
+                        session.flush() # take the write lock, then do request work inside the transaction
+                        time.sleep(args.hold_ms / 1000)
+                    session.commit()
+                with lock:
+                    write_ms.append((time.perf_counter() - started) * 1000)
+            except Exception as e:
+                with lock:
+                    errors[f"write: {str(e).splitlines()[0][:60]}"] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    with engine.connect() as connection:
+        journal_mode = connection.exec_driver_sql("PRAGMA journal_mode").scalar()
+    return {
+        "journal_mode": journal_mode,
+        "reads_per_s": len(read_ms) / args.seconds,
+        "read_p50_ms": median(read_ms) if read_ms else 0.0,
+        "read_p95_ms": _percentile(read_ms, 95),
+        "writes_per_s": len(write_ms) / args.seconds,
+        "write_p95_ms": _percentile(write_ms, 95),
+        "errors": dict(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite read throughput under concurrent writes, per profile.")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--expenses", type=int, default=2000, help="Seeded expenses per user")
+    parser.add_argument("--hold-ms", type=float, default=0.0, help="Work done inside each write transaction after its first write")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="Comma-separated subset of: " + ", ".join(PROFILES))
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_profile(args)))
+        return
+
+    print(f"{args.readers} readers, {args.writers} writers (holding {args.hold_ms:.0f} ms), {args.seconds:.0f}s per profile, "
+          f"{args.users} users x {args.expenses} expenses\n")
+    print(f"{'profile':<12}{'journal':>9}{'reads/s':>10}{'read p50':>10}{'read p95':>10}{'writes/s':>10}{'write p95':>11}{'errors':>8}")
+    for name in args.profiles.split(","):
+        # Settings are read at import time: each profile runs in a fresh interpreter on a fresh database
+        tmp = tempfile.mkdtemp(prefix="sqlite-bench-")
+        env = dict(os.environ, **PROFILES[name])
+        env["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+        env["LEDGER_DATA_DIR"] = os.path.join(tmp, "ledger")
+        env.setdefault("SECRET_KEY", "benchmark")
+        child = ["--child", "--readers", str(args.readers), "--writers", str(args.writers), "--seconds", str(args.seconds),
+                 "--users", str(args.users), "--expenses", str(args.expenses), "--hold-ms", str(args.hold_ms)]
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), *child], env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"{name:<12} failed:\n{result.stderr[-2000:]}")
+            continue
+        r = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{name:<12}{r['journal_mode']:>9}{r['reads_per_s']:>10.0f}{r['read_p50_ms']:>10.1f}{r['read_p95_ms']:>10.1f}"
+              f"{r['writes_per_s']:>10.0f}{r['write_p95_ms']:>11.1f}{sum(r['errors'].values()):>8}")
+        for error, count in r["errors"].items():
+            print(f"{'':<12}  {count} x {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import argparse
+import sys
+import os
+import time
+
+# Ensure the backend module is in the python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(parent_dir)
+
+from sqlmodel import select, Session
+from backend.adapters.database.session import engine
+from backend.adapters.database.models import User
+from backend.services.ledger_service import LedgerService
+
+def build_snapshots(user_id: int = None):
+    with Session(engine) as session:
+        if user_id is not None:
+            user_ids = [user_id]
+        else:
+            user_ids = session.exec(select(User.id)).all()
+
+        service = LedgerService(session)
+        for uid in user_ids:
+            start = time.perf_counter()
+            count = service.rebuild(uid)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"User {uid}: {count} rows in {elapsed:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild memory-mapped ledger snapshots.")
+    parser.add_argument("--user-id", type=int, help="Only rebuild this user's snapshot")
+
+    args = parser.parse_args()
+
+    build_snapshots(args.user_id)
+
+if __name__ == "__main__":
+    main()
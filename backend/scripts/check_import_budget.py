@@ -0,0 +1,66 @@
+"""
+Cold-start check: fails (exit 1) when importing the API app takes longer than the budget, or
+when a module that should only load on first use (litellm, openai) is imported eagerly.
+Each run is a fresh interpreter; the median of --runs is compared with the budget.
+
+    python backend/scripts/check_import_budget.py                # budget from IMPORT_BUDGET_SECONDS, default 2.0
+    python backend/scripts/check_import_budget.py --budget 1.5 --runs 7
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from statistics import median
+
+from profile_imports import child_env, parent_dir
+
+# Imported on first use only (see adapters/ai/llm_provider.get_litellm)
+DEFERRED_MODULES = ["litellm", "openai"]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str):
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, deferred=DEFERRED_MODULES)],
+        capture_output=True, text=True, env=child_env(), cwd=parent_dir,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if importing the app exceeds the cold-start budget.")
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--budget", type=float, default=float(os.environ.get("IMPORT_BUDGET_SECONDS", 2.0)), help="seconds")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    seconds = [run["seconds"] for run in runs]
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    elapsed = median(seconds)
+    print(f"import {args.module}: median {elapsed * 1000:.0f} ms, min {min(seconds) * 1000:.0f} ms over {args.runs} runs (budget {args.budget * 1000:.0f} ms)")
+
+    failures = []
+    if elapsed > args.budget:
+        failures.append(f"import time {elapsed:.2f}s exceeds the {args.budget:.2f}s budget (see scripts/profile_imports.py)")
+    if loaded:
+        failures.append(f"deferred modules imported eagerly: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
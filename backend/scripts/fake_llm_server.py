@@ -0,0 +1,152 @@
+"""
+OpenAI-compatible fake LLM server for offline load tests and benchmarks.
+
+Serves POST /v1/chat/completions (plain and `stream: true`) and GET /v1/models with
+deterministic, schema-valid responses for each AIService call site (see
+backend/adapters/ai/fake_llm.py), after a log-normal latency and with an optional error rate.
+
+Point the app at it through the local-model route:
+
+    python backend/scripts/fake_llm_server.py --port 8001 --latency-ms 600 --error-rate 0.02
+    LLM_LOCAL_BASE_URL=http://127.0.0.1:8001/v1 \\
+    LLM_MODEL_TIERS='{"fast": ["local:fake"], "smart": ["local:fake"], "vision": ["local:fake"]}' \\
+    uvicorn backend.main:app
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Ensure the backend module is in the python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(parent_dir)
+
+# Standard library only: no app settings, database or litellm needed
+from backend.adapters.ai.fake_llm import FakeLLM, FakeLLMConfig
+from backend.adapters.ai.prompt_builder import estimate_tokens
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list): # vision requests: text parts plus image_url parts
+        return "\n".join(part.get("text", "") for part in content if part.get("type") == "text")
+    return content
+
+
+def make_handler(fake: FakeLLM, error_status: int):
+    class FakeLLMHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # keep-alive, like a real provider
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, body: dict):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._send_json(200, {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "fake-llm"}]})
+            else:
+                self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            messages = request.get("messages", [])
+            prompt = _message_text(messages[-1]) if messages else ""
+            model = request.get("model", "fake")
+
+            time.sleep(fake.sample_latency())
+            if fake.should_fail():
+                self._send_json(error_status, {"error": {"message": "Injected failure from the fake LLM server.", "type": "server_error"}})
+                return
+
+            content = fake.respond(prompt)
+            usage = {
+                "prompt_tokens": sum(estimate_tokens(_message_text(m)) for m in messages),
+                "completion_tokens": estimate_tokens(content),
+            }
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+            if request.get("stream"):
+                self._stream(completion_id, model, content, usage if (request.get("stream_options") or {}).get("include_usage") else None)
+                return
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        def _stream(self, completion_id: str, model: str, content: str, usage: dict = None):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def send(payload: str):
+                data = payload.encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def chunk(delta: dict, finish_reason=None, **extra) -> str:
+                body = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra}
+                return f"data: {json.dumps(body)}\n\n"
+
+            send(chunk({"role": "assistant", "content": ""}))
+            for piece in fake.chunks(content):
+                send(chunk({"content": piece}))
+                time.sleep(fake.config.chunk_ms / 1000)
+            send(chunk({}, "stop"))
+            if usage:
+                send(f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model, 'choices': [], 'usage': usage})}\n\n")
+            send("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+    return FakeLLMHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible fake LLM server for offline load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="median response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal spread (0 = fixed latency)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status for injected failures (e.g. 429, 503)")
+    parser.add_argument("--chunk-ms", type=float, default=15.0, help="delay between streamed chunks")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeLLM(FakeLLMConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        chunk_ms=args.chunk_ms,
+        seed=args.seed,
+    ))
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(fake, args.error_status))
+    print(f"Fake LLM server on http://{args.host}:{args.port}/v1 "
+          f"(latency {args.latency_ms:.0f} ms, sigma {args.latency_sigma}, error rate {args.error_rate:.1%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
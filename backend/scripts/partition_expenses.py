@@ -0,0 +1,87 @@
+"""
+Monthly partitioning of the expense table on Postgres (see adapters/database/partitioning.py).
+
+    python backend/scripts/partition_expenses.py status
+    python backend/scripts/partition_expenses.py convert            # existing database; locks and rewrites expense
+    python backend/scripts/partition_expenses.py ensure             # what the maintenance job does
+    python backend/scripts/partition_expenses.py detach --before 2024-01 [--concurrently]
+
+Detached months become standalone tables (expense_pYYYYMM) that can be archived with pg_dump and dropped.
+"""
+import argparse
+import sys
+import os
+from datetime import datetime
+
+# Ensure the backend module is in the python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(parent_dir)
+
+from backend.adapters.database import partitioning
+from backend.adapters.database.migrations import migration_lock
+from backend.adapters.database.session import engine
+from backend.core.config import settings
+
+
+def status():
+    with engine.connect() as connection:
+        if not partitioning.is_partitioned(connection):
+            print("expense is not partitioned.")
+            return
+        months = partitioning.partition_months(connection)
+        print(f"expense is partitioned: {len(months)} monthly partitions, {months[0]:%Y-%m} to {months[-1]:%Y-%m}." if months
+              else "expense is partitioned, with no monthly partitions.")
+
+
+def convert(months_ahead: int):
+    # Same lock as startup migrations, so a worker cannot migrate mid-conversion
+    with migration_lock(engine) as connection:
+        if partitioning.is_partitioned(connection):
+            print("expense is already partitioned.")
+            return
+        partitioning.partition_expense_table(connection, months_ahead)
+        connection.commit()
+    status()
+
+
+def ensure(months_ahead: int):
+    with engine.begin() as connection:
+        created = partitioning.ensure_partitions(connection, months_ahead)
+    print(f"Created: {', '.join(created)}" if created else "All partitions exist.")
+
+
+def detach(before: str, concurrently: bool):
+    before_month = datetime.strptime(before, "%Y-%m").date()
+    # DETACH ... CONCURRENTLY cannot run inside a transaction block
+    bind = engine.execution_options(isolation_level="AUTOCOMMIT") if concurrently else engine
+    with bind.begin() as connection:
+        detached = partitioning.detach_partitions_before(connection, before_month, concurrently)
+    print(f"Detached: {', '.join(detached)}" if detached else f"No partitions before {before}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monthly partitioning of the expense table (Postgres).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status")
+    for name in ("convert", "ensure"):
+        sub.add_parser(name).add_argument("--months-ahead", type=int, default=settings.EXPENSE_PARTITION_MONTHS_AHEAD)
+    detach_parser = sub.add_parser("detach", help="Detach the partitions of months before --before")
+    detach_parser.add_argument("--before", required=True, help="YYYY-MM")
+    detach_parser.add_argument("--concurrently", action="store_true", help="Postgres 14+: do not block queries on expense")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("Expense partitioning needs Postgres.")
+    if args.command == "status":
+        status()
+    elif args.command == "convert":
+        convert(args.months_ahead)
+    elif args.command == "ensure":
+        ensure(args.months_ahead)
+    else:
+        detach(args.before, args.concurrently)
+
+
+if __name__ == "__main__":
+    main()
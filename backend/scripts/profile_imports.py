@@ -0,0 +1,70 @@
+"""
+Profiles the import of a module (default: the API app) in a fresh interpreter with
+`python -X importtime` and lists the slowest modules and top-level packages.
+
+    python backend/scripts/profile_imports.py
+    python backend/scripts/profile_imports.py --module backend.seed_data --top 15
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+# Ensure the backend module is in the python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+
+# "import time:       self [us] |  cumulative | imported package"
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def child_env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [parent_dir, env.get("PYTHONPATH")]))
+    env.setdefault("SECRET_KEY", "import-profile") # required by Settings, never used
+    return env
+
+
+def profile(module: str):
+    """[(self_us, cumulative_us, depth, name)] for every module the import loads."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=child_env(), cwd=parent_dir,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the slowest imports of a module.")
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = profile(args.module)
+    total_us = max((cumulative for _, cumulative, _, name in rows if name == args.module), default=0)
+    packages = defaultdict(int)
+    for self_us, _, _, name in rows:
+        packages[name.split(".")[0]] += self_us
+
+    print(f"import {args.module}: {total_us / 1000:.0f} ms, {len(rows)} modules\n")
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for self_us, cumulative_us, _, name in sorted(rows, key=lambda r: -r[1])[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}")
+
+    print(f"\n{'self ms':>14}{'share':>10}  top-level package")
+    for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{self_us / 1000:>14.1f}{self_us / max(total_us, 1):>10.0%}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ from sqlmodel import Session, select
 from backend.adapters.database.session import engine
 from backend.adapters.database.models import User, Category, Expense
 from backend.core.security import get_password_hash
+from backend.services.anomaly_service import AnomalyService
+from backend.services.ledger_service import LedgerService
 
 def seed_data():
     with Session(engine) as session:
@@ -151,6 +153,8 @@ def seed_data():
 
         session.add_all(expenses)
         session.commit()
+        LedgerService(session).invalidate(user.id)
+        AnomalyService(session).rebuild_stats(user.id)
         print(f"Added {len(expenses)} realistic transactions covering 1 year.")
 
 if __name__ == "__main__":
@@ -0,0 +1,320 @@
+import json
+import math
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlmodel import Session, select
+
+from backend.adapters.database.models import CategoryStats, Expense
+from backend.adapters.database.repositories.category_stats_repository import CategoryStatsRepository
+from backend.adapters.ledger.snapshot import NO_CATEGORY
+from backend.core.config import settings
+from backend.services.ledger_service import LedgerService
+
+logger = logging.getLogger(__name__)
+
+TRACKED_QUANTILES = {"p50": 0.5, "p95": 0.95}
+RECORD_ATTEMPTS = 5 # compare-and-set retries per category before the update is dropped
+
+
+class P2Quantile:
+    """
+    P² streaming quantile estimator (Jain & Chlamtac): five markers, O(1) per update,
+    serialisable to a small dict so it can live in a table row.
+    """
+
+    def __init__(self, p: float, state: Optional[Dict[str, Any]] = None):
+        self.p = p
+        state = state or {}
+        self.n: int = state.get("n", 0)
+        self.q: List[float] = state.get("q", [])
+        self.pos: List[float] = state.get("pos", [])
+        self.desired: List[float] = state.get("desired", [])
+
+    @property
+    def _increments(self) -> List[float]:
+        p = self.p
+        return [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    @classmethod
+    def from_sorted(cls, values: np.ndarray, p: float) -> "P2Quantile":
+        """Initialises the markers directly from already-sorted history."""
+        est = cls(p)
+        count = len(values)
+        est.n = count
+        if count < 5:
+            est.q = [float(v) for v in values]
+            return est
+        desired = [1.0, 1 + (count - 1) * p / 2, 1 + (count - 1) * p, 1 + (count - 1) * (1 + p) / 2, float(count)]
+        positions = [1]
+        for d in desired[1:4]:
+            positions.append(max(positions[-1] + 1, int(round(d))))
+        positions.append(count)
+        for i in range(3, 0, -1):
+            positions[i] = min(positions[i], positions[i + 1] - 1)
+        est.pos = [float(x) for x in positions]
+        est.q = [float(values[x - 1]) for x in positions]
+        est.desired = desired
+        return est
+
+    def add(self, x: float):
+        self.n += 1
+        if self.n <= 5:
+            self.q.append(x)
+            self.q.sort()
+            if self.n == 5:
+                self.pos = [1.0, 2.0, 3.0, 4.0, 5.0]
+                self.desired = [1.0 + 4 * d for d in self._increments]
+            return
+
+        q, pos = self.q, self.pos
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        self.desired = [d + inc for d, inc in zip(self.desired, self._increments)]
+
+        for i in range(1, 4):
+            d = self.desired[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                step = 1 if d > 0 else -1
+                candidate = self._parabolic(i, step)
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + step * (q[i + step] - q[i]) / (pos[i + step] - pos[i])
+                q[i] = candidate
+                pos[i] += step
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.q, self.pos
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> Optional[float]:
+        if not self.q:
+            return None
+        if self.n < 5:
+            ordered = sorted(self.q)
+            return ordered[min(len(ordered) - 1, int(self.p * len(ordered)))]
+        return self.q[2]
+
+    def to_state(self) -> Dict[str, Any]:
+        return {"n": self.n, "q": self.q, "pos": self.pos, "desired": self.desired}
+
+
+class AnomalyService:
+    """
+    Spend anomaly detection.
+
+    Write time: `score` checks a new expense against its (user, category) running statistics
+    (Welford mean/variance of log-amounts plus P² quantiles) and `record` folds it in once
+    saved, both O(1). Edits and deletes rebuild the affected categories from the ledger. Batch: `score_history` scores the full ledger with a vectorised robust
+    z-score (median/MAD per category).
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.repository = CategoryStatsRepository(session)
+
+    # --- Write path ---
+    def score(self, expense: Expense) -> bool:
+        """Sets `expense.is_anomaly` from its category's running stats. Read-only; call before saving the expense."""
+        expense.is_anomaly = False
+        if not self._tracked(expense):
+            return False
+
+        stats = self.repository.get_for_category(expense.user_id, expense.category_id)
+        if stats is None or stats.count < max(settings.ANOMALY_MIN_SAMPLES, 2):
+            return False
+        std = math.sqrt(stats.m2 / (stats.count - 1))
+        p95 = self._load_quantiles(stats.quantile_state)["p95"].value()
+        if std > 0 and p95 is not None:
+            z = (math.log1p(expense.amount) - stats.mean) / std
+            expense.is_anomaly = z >= settings.ANOMALY_Z_THRESHOLD and expense.amount > p95
+        if expense.is_anomaly:
+            logger.info(f"Expense '{expense.title}' ({expense.amount}) flagged as unusual for user {expense.user_id}, category {expense.category_id}.")
+        return expense.is_anomaly
+
+    def record(self, expenses: List[Expense]):
+        """
+        Folds saved expenses into their categories' running stats (Welford mean/variance plus
+        P² quantiles), one short transaction per category after the expenses are committed, so a
+        stats conflict never fails the expense write. Concurrent writers are resolved by
+        compare-and-set on the row's count: the loser re-reads and retries.
+        """
+        amounts: Dict[Tuple[int, Optional[int]], List[float]] = {}
+        for expense in expenses:
+            if self._tracked(expense):
+                amounts.setdefault((expense.user_id, expense.category_id), []).append(expense.amount)
+        for (user_id, category_id), values in amounts.items():
+            self._record_category(user_id, category_id, values)
+
+    def _record_category(self, user_id: int, category_id: Optional[int], amounts: List[float]) -> bool:
+        for _ in range(RECORD_ATTEMPTS):
+            try:
+                stats = self.repository.get_for_category(user_id, category_id)
+                if stats is None:
+                    # A concurrent first expense in the category makes one of the inserts hit unique_user_category_stats
+                    self.session.add(CategoryStats(user_id=user_id, category_id=category_id, **self._folded(0, 0.0, 0.0, "{}", amounts)))
+                    self.session.commit()
+                    return True
+                values = self._folded(stats.count, stats.mean, stats.m2, stats.quantile_state, amounts)
+                if self.repository.compare_and_set(stats.id, stats.count, values):
+                    self.session.commit()
+                    return True
+            except (IntegrityError, OperationalError) as e:
+                logger.debug(f"Anomaly stats update for user {user_id}, category {category_id} conflicted: {e}")
+            self.session.rollback()
+        logger.warning(f"Gave up updating anomaly stats for user {user_id}, category {category_id} after {RECORD_ATTEMPTS} conflicts; "
+                       f"POST /analytics/anomalies/rebuild resyncs them.")
+        return False
+
+    @classmethod
+    def _folded(cls, count: int, mean: float, m2: float, quantile_state: str, amounts: List[float]) -> Dict[str, Any]:
+        """Column values after adding `amounts` to the given running stats."""
+        quantiles = cls._load_quantiles(quantile_state)
+        for amount in amounts:
+            x = math.log1p(amount)
+            count += 1
+            delta = x - mean
+            mean += delta / count
+            m2 += delta * (x - mean)
+            for estimator in quantiles.values():
+                estimator.add(amount)
+        return {
+            "count": count,
+            "mean": mean,
+            "m2": m2,
+            "quantile_state": json.dumps({name: est.to_state() for name, est in quantiles.items()}),
+            "updated_at": datetime.utcnow(),
+        }
+
+    @staticmethod
+    def _tracked(expense: Expense) -> bool:
+        return expense.type == "expense" and expense.amount > 0
+
+    @staticmethod
+    def _load_quantiles(quantile_state: Optional[str]) -> Dict[str, P2Quantile]:
+        try:
+            state = json.loads(quantile_state or "{}")
+        except ValueError:
+            state = {}
+        return {name: P2Quantile(p, state.get(name)) for name, p in TRACKED_QUANTILES.items()}
+
+    # --- Batch path ---
+    def score_history(self, user_id: int, threshold: Optional[float] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        threshold = threshold if threshold is not None else settings.ANOMALY_BATCH_THRESHOLD
+        records = LedgerService(self.session).get_ledger(user_id).expenses_only()
+        records = records[records["amount"] > 0]
+        if not len(records):
+            return []
+
+        scores, group_sizes = self._robust_scores(records["category_id"], np.log1p(records["amount"]))
+        flagged = np.nonzero((group_sizes >= settings.ANOMALY_MIN_SAMPLES) & (scores > threshold))[0]
+        flagged = flagged[np.argsort(-scores[flagged])][:limit]
+        if not len(flagged):
+            return []
+
+        ids = [int(i) for i in records["id"][flagged]]
+        titles = dict(self.session.exec(select(Expense.id, Expense.title).where(Expense.id.in_(ids))).all())
+
+        results = []
+        for idx in flagged:
+            record = records[idx]
+            category_id = int(record["category_id"])
+            results.append({
+                "id": int(record["id"]),
+                "title": titles.get(int(record["id"]), ""),
+                "amount": float(record["amount"]),
+                "date": str(record["date"].astype("datetime64[D]")),
+                "category_id": None if category_id == NO_CATEGORY else category_id,
+                "score": round(float(scores[idx]), 2),
+            })
+        return results
+
+    @staticmethod
+    def _robust_scores(categories: np.ndarray, values: np.ndarray):
+        """Per-category robust z-scores (0.6745 * (x - median) / MAD), computed with two sorts."""
+        order = np.lexsort((values, categories))
+        sorted_cats = categories[order]
+        sorted_vals = values[order]
+        _, starts, counts = np.unique(sorted_cats, return_index=True, return_counts=True)
+        group = np.repeat(np.arange(len(counts)), counts)
+
+        lo, hi = starts + (counts - 1) // 2, starts + counts // 2
+        medians = (sorted_vals[lo] + sorted_vals[hi]) / 2
+        deviations = np.abs(sorted_vals - medians[group])
+        sorted_devs = deviations[np.lexsort((deviations, group))]
+        mads = (sorted_devs[lo] + sorted_devs[hi]) / 2
+
+        # Fall back to the mean absolute deviation when more than half the values are identical
+        mean_abs = np.add.reduceat(deviations, starts) / counts
+        scale = np.where(mads > 0, mads / 0.6745, mean_abs * 1.2533)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sorted_scores = np.where(scale[group] > 0, (sorted_vals - medians[group]) / scale[group], 0.0)
+
+        scores = np.empty_like(sorted_scores)
+        scores[order] = sorted_scores
+        sizes = np.empty_like(counts[group])
+        sizes[order] = counts[group]
+        return scores, sizes
+
+    def rebuild_stats(self, user_id: int, category_ids: Optional[Iterable[Optional[int]]] = None) -> int:
+        """
+        Recomputes the running statistics from the full ledger, for all of the user's categories
+        or only `category_ids` (after an expense in them was edited or deleted: the running stats
+        cannot forget a value). Commits.
+        """
+        records = LedgerService(self.session).get_ledger(user_id).expenses_only()
+        records = records[records["amount"] > 0]
+
+        existing = {s.category_id: s for s in self.repository.get_for_user(user_id)}
+        if category_ids is not None:
+            category_ids = set(category_ids)
+            codes = np.array([NO_CATEGORY if c is None else c for c in category_ids], dtype=records["category_id"].dtype)
+            records = records[np.isin(records["category_id"], codes)]
+            existing = {c: stats for c, stats in existing.items() if c in category_ids}
+        if len(records):
+            order = np.lexsort((records["amount"], records["category_id"]))
+            cats = records["category_id"][order]
+            amounts = records["amount"][order]
+            logs = np.log1p(amounts)
+            unique_cats, starts, counts = np.unique(cats, return_index=True, return_counts=True)
+            means = np.add.reduceat(logs, starts) / counts
+            m2s = np.add.reduceat((logs - np.repeat(means, counts)) ** 2, starts)
+        else:
+            unique_cats, starts, counts, means, m2s = [], [], [], [], []
+
+        seen = set()
+        for cat, start, count, mean, m2 in zip(unique_cats, starts, counts, means, m2s):
+            category_id = None if int(cat) == NO_CATEGORY else int(cat)
+            seen.add(category_id)
+            stats = existing.get(category_id) or CategoryStats(user_id=user_id, category_id=category_id)
+            group_amounts = amounts[start:start + count]
+            stats.count = int(count)
+            stats.mean = float(mean)
+            stats.m2 = float(m2)
+            stats.quantile_state = json.dumps({
+                name: P2Quantile.from_sorted(group_amounts, p).to_state() for name, p in TRACKED_QUANTILES.items()
+            })
+            stats.updated_at = datetime.utcnow()
+            self.session.add(stats)
+
+        for category_id, stats in existing.items():
+            if category_id not in seen:
+                self.session.delete(stats)
+
+        self.session.commit()
+        logger.info(f"Rebuilt anomaly statistics for user {user_id} across {len(seen)} categories.")
+        return len(seen)
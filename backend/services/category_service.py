@@ -1,8 +1,10 @@
 from typing import List, Optional
 from sqlmodel import Session
 from backend.adapters.database.repositories.category_repository import CategoryRepository
+from backend.adapters.database.repositories.category_stats_repository import CategoryStatsRepository
 from backend.adapters.database.models import Category
 from backend.api.schemas.all import CategoryCreate
+from backend.services.ledger_service import LedgerService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,6 +12,8 @@ logger = logging.getLogger(__name__)
 class CategoryService:
     def __init__(self, session: Session):
         self.repository = CategoryRepository(session)
+        self.stats_repository = CategoryStatsRepository(session)
+        self.ledger = LedgerService(session)
 
     def create_category(self, category_create: CategoryCreate, user_id: int) -> Optional[Category]:
         # Check uniqueness for this user
@@ -32,5 +36,10 @@ class CategoryService:
         if not category or category.user_id != user_id:
             return False
         
+        stats = self.stats_repository.get_for_category(user_id, category_id)
+        if stats:
+            self.stats_repository.delete(stats)
         self.repository.delete(category)
+        # Snapshot rows still carry the deleted category_id; rebuild from the database on next read
+        self.ledger.invalidate(user_id)
         return True
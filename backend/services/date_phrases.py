@@ -0,0 +1,222 @@
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable, List, Optional, Tuple
+
+WEEKDAYS = {
+    "monday": 0, "mon": 0, "tuesday": 1, "tue": 1, "tues": 1, "wednesday": 2, "wed": 2,
+    "thursday": 3, "thu": 3, "thur": 3, "thurs": 3, "friday": 4, "fri": 4,
+    "saturday": 5, "sat": 5, "sunday": 6, "sun": 6,
+}
+MONTHS = {
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "mar": 3, "april": 4, "apr": 4,
+    "may": 5, "june": 6, "jun": 6, "july": 7, "jul": 7, "august": 8, "aug": 8,
+    "september": 9, "sep": 9, "sept": 9, "october": 10, "oct": 10, "november": 11, "nov": 11,
+    "december": 12, "dec": 12,
+}
+
+_WEEKDAY_ALT = "|".join(sorted(WEEKDAYS, key=len, reverse=True))
+_MONTH_ALT = "|".join(sorted(MONTHS, key=len, reverse=True))
+_ORDINAL = r"(?:st|nd|rd|th)?"
+
+
+@dataclass
+class DateMatch:
+    date: date
+    start: int
+    end: int  # character span of the phrase in the searched text
+
+
+def _past(candidate: date, today: date) -> date:
+    """Dates without a year refer to the most recent occurrence, never the future."""
+    if candidate > today:
+        try:
+            return candidate.replace(year=candidate.year - 1)
+        except ValueError:  # 29 Feb
+            return candidate - timedelta(days=365)
+    return candidate
+
+
+def _weekday(match: re.Match, today: date) -> date:
+    target = WEEKDAYS[match.group("weekday")]
+    back = (today.weekday() - target) % 7
+    if match.group("last") and back == 0:
+        back = 7
+    return today - timedelta(days=back)
+
+
+def _day_month(day: int, month: int, year: Optional[int], today: date) -> date:
+    if year is None:
+        return _past(date(today.year, month, day), today)
+    if year < 100:
+        year += 2000
+    return date(year, month, day)
+
+
+def _day_of_month(day: int, today: date) -> date:
+    candidate = date(today.year, today.month, day)
+    if candidate > today:
+        previous = today.replace(day=1) - timedelta(days=1)
+        candidate = date(previous.year, previous.month, day)
+    return candidate
+
+
+# Most specific phrases first; the first pattern that matches wins.
+_DAY_PATTERNS: List[Tuple[re.Pattern, Callable[[re.Match, date], date]]] = [
+    (re.compile(r"\bday before yesterday\b"), lambda m, t: t - timedelta(days=2)),
+    (re.compile(r"\b(?:today|tonight|this (?:morning|afternoon|evening))\b"), lambda m, t: t),
+    (re.compile(r"\b(?:yesterday|yday|last night)\b"), lambda m, t: t - timedelta(days=1)),
+    (re.compile(r"\b(?P<n>\d{1,2}) days? ago\b"), lambda m, t: t - timedelta(days=int(m.group("n")))),
+    (re.compile(r"\b(?P<y>\d{4})-(?P<m>\d{1,2})-(?P<d>\d{1,2})\b"),
+     lambda m, t: date(int(m.group("y")), int(m.group("m")), int(m.group("d")))),
+    # Day first, as written in India: 05/03 is 5 March
+    (re.compile(r"\b(?P<d>\d{1,2})[/.](?P<m>\d{1,2})(?:[/.](?P<y>\d{2}|\d{4}))?\b"),
+     lambda m, t: _day_month(int(m.group("d")), int(m.group("m")), int(m.group("y")) if m.group("y") else None, t)),
+    (re.compile(rf"\b(?P<d>\d{{1,2}}){_ORDINAL}\s+(?:of\s+)?(?P<month>{_MONTH_ALT})\b"),
+     lambda m, t: _day_month(int(m.group("d")), MONTHS[m.group("month")], None, t)),
+    (re.compile(rf"\b(?P<month>{_MONTH_ALT})\s+(?P<d>\d{{1,2}}){_ORDINAL}\b"),
+     lambda m, t: _day_month(int(m.group("d")), MONTHS[m.group("month")], None, t)),
+    (re.compile(rf"\bon the (?P<d>\d{{1,2}}){_ORDINAL}\b"), lambda m, t: _day_of_month(int(m.group("d")), t)),
+    (re.compile(rf"\b(?:(?P<last>last)\s+|on\s+)?(?P<weekday>{_WEEKDAY_ALT})\b"), _weekday),
+]
+
+
+def match_day(text: str, today: date) -> Optional[DateMatch]:
+    """Finds the first single-day phrase ("yesterday", "last friday", "12 mar", "05/03") in lowercased text."""
+    for pattern, resolve in _DAY_PATTERNS:
+        for match in pattern.finditer(text):
+            try:
+                return DateMatch(resolve(match, today), match.start(), match.end())
+            except ValueError:  # e.g. 31/02; keep looking
+                continue
+    return None
+
+
+
+@dataclass
+class PeriodMatch:
+    start: date
+    end: date  # inclusive
+    label: str  # how the period reads in an answer ("last month", "in March 2025")
+    span_start: int
+    span_end: int
+
+
+def _month_bounds(year: int, month: int) -> Tuple[date, date]:
+    start = date(year, month, 1)
+    following = date(year + (month == 12), month % 12 + 1, 1)
+    return start, following - timedelta(days=1)
+
+
+def _months_back(today: date, months: int) -> date:
+    """Same day `months` calendar months earlier, clamped to the end of shorter months."""
+    index = today.year * 12 + today.month - 1 - months
+    year, month = divmod(index, 12)
+    return date(year, month + 1, min(today.day, _month_bounds(year, month + 1)[1].day))
+
+
+def _relative_month(offset: int):
+    def resolve(match: re.Match, today: date) -> Tuple[date, date]:
+        first = _months_back(today.replace(day=1), offset)
+        start, end = _month_bounds(first.year, first.month)
+        return start, min(end, today)
+    return resolve
+
+
+def _relative_week(offset: int):
+    def resolve(match: re.Match, today: date) -> Tuple[date, date]:
+        start = today - timedelta(days=today.weekday() + 7 * offset)
+        return start, min(start + timedelta(days=6), today)
+    return resolve
+
+
+def _relative_year(offset: int):
+    def resolve(match: re.Match, today: date) -> Tuple[date, date]:
+        year = today.year - offset
+        return date(year, 1, 1), min(date(year, 12, 31), today)
+    return resolve
+
+
+def _last_n(match: re.Match, today: date) -> Tuple[date, date]:
+    n = _NUMBER_WORDS.get(match.group("n")) or int(match.group("n"))
+    unit = match.group("unit")
+    if unit == "day":
+        return today - timedelta(days=n - 1), today
+    if unit == "week":
+        return today - timedelta(days=7 * n - 1), today
+    if unit == "month":
+        return _months_back(today, n) + timedelta(days=1), today
+    return _months_back(today, 12 * n) + timedelta(days=1), today
+
+
+def _named_month(match: re.Match, today: date) -> Tuple[date, date]:
+    month = MONTHS[match.group("month")]
+    if match.group("year"):
+        year = int(match.group("year"))
+    else:
+        year = today.year if month <= today.month else today.year - 1
+    return _month_bounds(year, month)
+
+
+def _since_month(match: re.Match, today: date) -> Tuple[date, date]:
+    start, _ = _named_month(match, today)
+    return start, today
+
+
+def _single_day(offset: int):
+    def resolve(match: re.Match, today: date) -> Tuple[date, date]:
+        day = today - timedelta(days=offset)
+        return day, day
+    return resolve
+
+
+_NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+                 "nine": 9, "ten": 10, "twelve": 12}
+_COUNT = r"(?P<n>\d{1,3}|" + "|".join(_NUMBER_WORDS) + r")"
+
+# Most specific phrases first; each resolver returns inclusive (start, end) bounds.
+_PERIOD_PATTERNS: List[Tuple[re.Pattern, Callable[[re.Match, date], Tuple[date, date]]]] = [
+    (re.compile(rf"\b(?:in\s+)?(?:the\s+)?(?:last|past|previous)\s+{_COUNT}\s+(?P<unit>day|week|month|year)s?\b"), _last_n),
+    (re.compile(rf"\bsince\s+(?P<month>{_MONTH_ALT})(?:\s+(?P<year>\d{{4}}))?\b"), _since_month),
+    (re.compile(rf"\b(?:in\s+|during\s+)?(?P<month>{_MONTH_ALT})(?:\s+(?P<year>\d{{4}}))?\b"), _named_month),
+    (re.compile(r"\b(?:(?:so far )?this|current) month\b|\bmonth to date\b"), _relative_month(0)),
+    (re.compile(r"\b(?:last|previous|past) month\b"), _relative_month(1)),
+    (re.compile(r"\b(?:(?:so far )?this|current) week\b"), _relative_week(0)),
+    (re.compile(r"\b(?:last|previous|past) week\b"), _relative_week(1)),
+    (re.compile(r"\b(?:(?:so far )?this|current) year\b|\byear to date\b"), _relative_year(0)),
+    (re.compile(r"\b(?:last|previous|past) year\b"), _relative_year(1)),
+    (re.compile(r"\btoday\b"), _single_day(0)),
+    (re.compile(r"\byesterday\b"), _single_day(1)),
+]
+
+
+def _label(phrase: str) -> str:
+    words = phrase.split()
+    if words[0] in ("last", "past", "previous") and len(words) > 2:
+        return "in the " + " ".join(words)
+    words = [w.capitalize() if w in MONTHS else w for w in words]
+    if words[0].lower() in MONTHS:
+        words.insert(0, "in")
+    return " ".join(words)
+
+
+def match_periods(text: str, today: date) -> List[PeriodMatch]:
+    """All non-overlapping period phrases in lowercased text, in order of appearance."""
+    found: List[PeriodMatch] = []
+    taken: List[Tuple[int, int]] = []
+    for pattern, resolve in _PERIOD_PATTERNS:
+        for match in pattern.finditer(text):
+            if any(match.start() < end and start < match.end() for start, end in taken):
+                continue
+            groups = match.groupdict()
+            # "may" is also a verb: only treat it as a month with a preposition or year attached
+            if groups.get("month") == "may" and not re.search(r"\b(?:in|during|since)\s+may\b|\bmay\s+\d{4}\b", match.group(0)):
+                continue
+            try:
+                start, end = resolve(match, today)
+            except ValueError:
+                continue
+            label = _label(match.group(0))
+            found.append(PeriodMatch(start, end, label, match.start(), match.end()))
+            taken.append((match.start(), match.end()))
+    return sorted(found, key=lambda p: p.span_start)
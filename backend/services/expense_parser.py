@@ -0,0 +1,238 @@
+import re
+from collections import Counter
+from dataclasses import dataclass, asdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from backend.services.date_phrases import match_day
+from backend.services.recurring_detector import merchant_key
+
+_CURRENCIES = {
+    "₹": "INR", "rs": "INR", "rs.": "INR", "inr": "INR", "rupee": "INR", "rupees": "INR",
+    "$": "USD", "usd": "USD", "dollar": "USD", "dollars": "USD", "bucks": "USD",
+    "€": "EUR", "eur": "EUR", "euro": "EUR", "euros": "EUR",
+    "£": "GBP", "gbp": "GBP", "pound": "GBP", "pounds": "GBP",
+}
+DEFAULT_CURRENCY = "INR"
+FOREIGN_CURRENCY_MAX_CONFIDENCE = 0.5
+
+_CURRENCY_PREFIX = r"(?P<pre>₹|\$|€|£|\brs\.?|\binr\b)"
+_CURRENCY_SUFFIX = r"(?P<post>₹|\$|€|£|\brs\b\.?|\binr\b|\brupees?\b|\bdollars?\b|\bbucks\b|\beuros?\b|\bpounds?\b)"
+_AMOUNT_RE = re.compile(
+    rf"(?:{_CURRENCY_PREFIX}\s*)?(?<![\w.])(?P<num>\d{{1,3}}(?:,\d{{2,3}})+(?:\.\d+)?|\d+(?:\.\d+)?)(?P<k>k\b)?(?:\s*{_CURRENCY_SUFFIX})?"
+)
+_WORD_RE = re.compile(r"[^\W\d_][\w'&.-]*", re.UNICODE)
+
+# Words that frame an entry rather than name it ("spent 200 on lunch")
+_LEADING_FILLER = {"spent", "spend", "paid", "pay", "bought", "buy", "got", "i", "for", "on", "at", "to", "a", "an", "the", "my"}
+_TRAILING_FILLER = {"for", "on", "at", "to", "in", "of", "and", "with", "the", "a", "an", "via", "using"}
+_LOWERCASE_WORDS = {"at", "on", "for", "to", "in", "of", "and", "with", "the", "a", "an", "from", "via"}
+
+# Generic hints used only when the user's own history says nothing. Keys are phrases a
+# category name may contain; values are words in the entry that point at that category.
+CATEGORY_HINTS: Dict[Tuple[str, ...], Tuple[str, ...]] = {
+    ("food", "dining", "restaurant", "eating"): (
+        "coffee", "tea", "chai", "lunch", "dinner", "breakfast", "brunch", "snack", "snacks", "pizza",
+        "burger", "biryani", "swiggy", "zomato", "cafe", "restaurant", "starbucks", "dominos", "mcdonalds",
+        "kfc", "food", "meal", "dessert", "icecream", "juice",
+    ),
+    ("grocer",): (
+        "groceries", "grocery", "vegetables", "veggies", "fruits", "milk", "eggs", "bread", "bigbasket",
+        "blinkit", "zepto", "dmart", "supermarket",
+    ),
+    ("transport", "travel", "commute", "fuel"): (
+        "uber", "ola", "rapido", "taxi", "cab", "auto", "rickshaw", "metro", "bus", "train", "petrol",
+        "diesel", "fuel", "parking", "toll", "flight", "fastag",
+    ),
+    ("shopping",): ("amazon", "flipkart", "myntra", "ajio", "clothes", "shoes", "shirt", "jeans", "gadget"),
+    ("entertainment", "fun", "leisure"): (
+        "movie", "movies", "cinema", "netflix", "spotify", "prime", "hotstar", "concert", "game", "games",
+        "bookmyshow", "pvr",
+    ),
+    ("bill", "utilit"): (
+        "electricity", "water", "gas", "internet", "wifi", "broadband", "recharge", "mobile", "phone",
+        "dth", "bill",
+    ),
+    ("health", "medical"): ("medicine", "medicines", "pharmacy", "doctor", "hospital", "clinic", "gym", "apollo", "chemist"),
+    ("rent", "housing", "home"): ("rent", "maintenance", "society"),
+}
+
+
+@dataclass
+class ParsedExpense:
+    title: str
+    amount: Optional[float]
+    date: str
+    category_id: Optional[int]
+    currency: str
+    confidence: float
+    source: str = "local"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ExpenseParser:
+    """
+    Rule-based parser for quick-add text ("coffee 150 yesterday", "paid ₹1,200 for uber on 5 mar").
+
+    Pulls out the amount/currency, a relative or absolute date and a title, then maps the
+    title to a category using the user's own history (merchant key -> category counts),
+    category names mentioned in the text, and finally generic keyword hints. Each part
+    contributes to `confidence`; callers fall back to the LLM when it is low.
+    """
+
+    def __init__(self, categories: Iterable[Tuple[int, str]], history: Iterable[Tuple[str, Optional[int], int]]):
+        """`categories` is (id, name); `history` is (title, category_id, count) from past expenses."""
+        self.categories = [(cid, name) for cid, name in categories]
+        self._category_words = {name.lower(): cid for cid, name in self.categories}
+
+        self._merchants: Dict[str, Counter] = {}
+        self._merchant_titles: Dict[str, Counter] = {}
+        self._tokens: Dict[str, Counter] = {}
+        for title, category_id, count in history:
+            key = merchant_key(title)
+            if not key or category_id is None:
+                continue
+            self._merchants.setdefault(key, Counter())[category_id] += count
+            self._merchant_titles.setdefault(key, Counter())[title.strip()] += count
+            for token in key.split():
+                self._tokens.setdefault(token, Counter())[category_id] += count
+
+        self._hints: Dict[str, int] = {}
+        for name_parts, words in CATEGORY_HINTS.items():
+            category_id = next((cid for cid, name in self.categories if any(p in name.lower() for p in name_parts)), None)
+            if category_id is not None:
+                for word in words:
+                    self._hints.setdefault(word, category_id)
+
+    def parse(self, text: str, today: Optional[date] = None) -> ParsedExpense:
+        today = today or datetime.now().date()
+        original = " ".join(text.split())
+        lowered = original.lower()
+        confidence = 0.0
+
+        # Date first, so "12 mar" or "05/03" is not mistaken for the amount
+        day = match_day(lowered, today)
+        spans: List[Tuple[int, int]] = []
+        if day:
+            spans.append((day.start, day.end))
+            masked = lowered[:day.start] + " " * (day.end - day.start) + lowered[day.end:]
+        else:
+            masked = lowered
+
+        amount, currency, amount_span, ambiguous = self._extract_amount(masked)
+        if amount is not None:
+            spans.append(amount_span)
+            confidence += 0.25 if ambiguous else 0.45
+            # Only the unambiguous case counts as a fully clean parse
+            if not ambiguous:
+                confidence += 0.05
+
+        title_words = self._title_words(original, spans)
+        title = self._format_title(title_words)
+        if title:
+            confidence += 0.2
+
+        category_id, category_score, known_title = self._categorise(title_words, lowered)
+        confidence += category_score
+        if known_title:
+            title = known_title
+        if currency != DEFAULT_CURRENCY:
+            # Amounts are saved in DEFAULT_CURRENCY and there are no exchange rates here: never auto-accept
+            confidence = min(confidence, FOREIGN_CURRENCY_MAX_CONFIDENCE)
+
+        return ParsedExpense(
+            title=title or "Expense",
+            amount=amount,
+            date=(day.date if day else today).isoformat(),
+            category_id=category_id,
+            currency=currency,
+            confidence=round(min(confidence, 1.0), 2),
+        )
+
+    @staticmethod
+    def _extract_amount(text: str):
+        candidates = []
+        for match in _AMOUNT_RE.finditer(text):
+            value = float(match.group("num").replace(",", ""))
+            if match.group("k"):
+                value *= 1000
+            marker = match.group("pre") or match.group("post")
+            candidates.append((value, marker, match.span()))
+
+        if not candidates:
+            return None, DEFAULT_CURRENCY, None, False
+
+        tagged = [c for c in candidates if c[1]]
+        if tagged:
+            value, marker, span = tagged[0]
+            ambiguous = len(tagged) > 1
+        else:
+            # "2 coffees 300": a bare trailing number is usually the price
+            value, marker, span = candidates[-1]
+            ambiguous = len(candidates) > 1
+        currency = _CURRENCIES.get(marker.strip().lower(), DEFAULT_CURRENCY) if marker else DEFAULT_CURRENCY
+        return round(value, 2), currency, span, ambiguous or value <= 0
+
+    @staticmethod
+    def _title_words(text: str, spans: List[Tuple[int, int]]) -> List[str]:
+        for start, end in sorted(spans, reverse=True):
+            text = text[:start] + " | " + text[end:]
+        # Keep the longest run of words between the removed date/amount pieces
+        runs = [_WORD_RE.findall(part) for part in text.split("|")]
+        runs = [[w for w in run if w.lower() not in _CURRENCIES] for run in runs]
+        words = max(runs, key=len) if runs else []
+
+        while words and words[0].lower() in _LEADING_FILLER:
+            words = words[1:]
+        while words and words[-1].lower() in _TRAILING_FILLER:
+            words = words[:-1]
+        return words
+
+    @staticmethod
+    def _format_title(words: List[str]) -> str:
+        formatted = []
+        for i, word in enumerate(words):
+            if word.islower() and not (i and word in _LOWERCASE_WORDS):
+                word = word[0].upper() + word[1:]
+            formatted.append(word)
+        return " ".join(formatted)
+
+    def _categorise(self, words: List[str], lowered: str) -> Tuple[Optional[int], float, Optional[str]]:
+        """Returns (category_id, confidence contribution, canonical title from history)."""
+        key = merchant_key(" ".join(words))
+        if key in self._merchants:
+            category_id, share = self._dominant(self._merchants[key])
+            title = self._merchant_titles[key].most_common(1)[0][0]
+            return category_id, 0.3 * share, title
+
+        tokens = _WORD_RE.findall(lowered)
+        for token in tokens:
+            if token in self._category_words:
+                return self._category_words[token], 0.3, None
+
+        votes: Counter = Counter()
+        key_tokens = key.split()
+        known = [t for t in key_tokens if t in self._tokens]
+        for token in known:
+            votes.update(self._tokens[token])
+        if votes and len(known) == len(key_tokens):
+            category_id, share = self._dominant(votes)
+            return category_id, 0.2 * share, None
+
+        # A generic hint beats a history match on only part of the title ("mobile recharge" vs "Metro Recharge")
+        for token in tokens:
+            hint = self._hints.get(token) or (self._hints.get(token[:-1]) if token.endswith("s") else None)
+            if hint is not None:
+                return hint, 0.15, None
+
+        if votes:
+            category_id, share = self._dominant(votes)
+            return category_id, 0.1 * share, None
+        return None, 0.0, None
+
+    @staticmethod
+    def _dominant(counts: Counter) -> Tuple[int, float]:
+        category_id, top = counts.most_common(1)[0]
+        return category_id, top / sum(counts.values())
@@ -6,12 +6,17 @@ import logging
 from backend.adapters.database.models import Expense, User
 from backend.api.schemas.all import ExpenseCreate, ExpenseUpdate
 from backend.adapters.ai.service import AIService
+from backend.services.ledger_service import LedgerService
+from backend.services.anomaly_service import AnomalyService
+from backend.adapters.ledger.snapshot import ledger_row
 
 logger = logging.getLogger(__name__)
 
 class ExpenseService:
     def __init__(self, session: Session):
         self.repository = ExpenseRepository(session)
+        self.ledger = LedgerService(session)
+        self.anomalies = AnomalyService(session)
         self.session = session
 
     def create_expense(self, expense_create: ExpenseCreate, user_id: int) -> Optional[Expense]:
@@ -20,7 +25,55 @@ class ExpenseService:
             return None
         
         db_expense = Expense(**expense_create.model_dump(), user_id=user_id)
-        return self.repository.create(db_expense)
+        self._score(db_expense)
+        db_expense = self.repository.create(db_expense)
+        self.ledger.record_upsert(user_id, [db_expense])
+        self._record_stats(user_id, [db_expense])
+        return db_expense
+
+    def create_expenses(self, expense_creates: List[ExpenseCreate], user_id: int) -> List[Expense]:
+        """Creates several expenses in one transaction (one flush, one commit, one ledger append)."""
+        db_expenses = []
+        for expense_create in expense_creates:
+            if expense_create.amount <= 0:
+                logger.warning(f"Skipping bulk expense with non-positive amount: {expense_create.amount}")
+                continue
+            db_expense = Expense(**expense_create.model_dump(), user_id=user_id)
+            self._score(db_expense)
+            db_expenses.append(db_expense)
+        if not db_expenses:
+            return []
+
+        self.session.add_all(db_expenses)
+        # Flush first so the ledger delta can be written from the assigned ids
+        self.session.flush()
+        ledger_rows = [ledger_row(e) for e in db_expenses]
+        self.session.commit()
+        self.ledger.record_rows(user_id, ledger_rows)
+        self._record_stats(user_id, db_expenses)
+        logger.info(f"Bulk-created {len(db_expenses)} expenses for user {user_id}.")
+        return db_expenses
+
+    # Anomaly stats are best effort: a failure there never fails the expense write
+    def _score(self, expense: Expense):
+        try:
+            self.anomalies.score(expense)
+        except Exception as e:
+            logger.error(f"Anomaly scoring failed for user {expense.user_id}: {e}")
+
+    def _record_stats(self, user_id: int, expenses: List[Expense]):
+        try:
+            self.anomalies.record(expenses)
+        except Exception as e:
+            self.session.rollback()
+            logger.error(f"Anomaly stats update failed for user {user_id}: {e}")
+
+    def _rebuild_stats(self, user_id: int, category_ids):
+        try:
+            self.anomalies.rebuild_stats(user_id, category_ids)
+        except Exception as e:
+            self.session.rollback()
+            logger.error(f"Anomaly stats rebuild failed for user {user_id}: {e}")
 
     def get_expenses(
         self,
@@ -60,16 +113,37 @@ class ExpenseService:
             return None
         
         update_data = expense_update.model_dump(exclude_unset=True)
-        return self.repository.update(db_expense, update_data)
+        before = (db_expense.category_id, db_expense.amount, db_expense.type)
+        edited = Expense(**{**db_expense.model_dump(), **update_data})
+        changed = (edited.category_id, edited.amount, edited.type) != before
+        if changed:
+            # Re-scored like a new expense, against the stats before the edit is folded in
+            self._score(edited)
+            update_data["is_anomaly"] = edited.is_anomaly
+        db_expense = self.repository.update(db_expense, update_data)
+        self.ledger.record_upsert(user_id, [db_expense])
+        if changed and "expense" in (before[2], db_expense.type):
+            self._rebuild_stats(user_id, {before[0], db_expense.category_id})
+        return db_expense
 
     def delete_expense(self, expense_id: int, user_id: int) -> bool:
         db_expense = self.get_expense(expense_id, user_id)
         if not db_expense:
             return False
         
+        # Capture the row before the ORM expires the deleted instance
+        deleted_row = ledger_row(db_expense)
+        category_id, tracked = db_expense.category_id, db_expense.type == "expense"
         self.repository.delete(db_expense)
+        self.ledger.record_delete(user_id, deleted_row)
+        if tracked:
+            self._rebuild_stats(user_id, {category_id})
         return True
 
     def auto_categorize(self, user_id: int) -> int:
         ai_service = AIService(self.session, user_id)
-        return ai_service.auto_categorize_expenses()
+        count = ai_service.auto_categorize_expenses()
+        if count:
+            # Categories changed in bulk outside this service; rebuild on next read
+            self.ledger.invalidate(user_id)
+        return count
@@ -0,0 +1,280 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select, func, desc
+
+from backend.adapters.ai.prompt_builder import PromptBuilder
+from backend.adapters.database.models import Expense, Category
+from backend.core.config import settings
+from backend.services.ledger_service import LedgerService
+from backend.services.query_engine import month_bucket
+
+logger = logging.getLogger(__name__)
+
+TOP_MERCHANTS = 10
+TREND_MONTHS = 12
+MAX_TRANSACTION_ROWS = 50
+# Shape of a rendered transaction line, for sizing SQL LIMITs before fetching
+_SAMPLE_TRANSACTION_LINE = "- 2025-01-31: Typical merchant name (Category name) ₹12,345"
+
+_cache: Dict[Tuple, object] = {}
+_cache_lock = threading.Lock()
+_CACHE_MAX_ENTRIES = 2048
+
+
+def _money(amount: float) -> str:
+    return f"₹{amount:,.0f}"
+
+
+@dataclass
+class CategoryTotal:
+    category_id: Optional[int]
+    name: str
+    total: float
+    count: int
+    max_single: float
+
+
+@dataclass
+class Transaction:
+    date: datetime
+    title: str
+    category: str
+    amount: float
+
+
+@dataclass
+class PeriodSummary:
+    """Aggregates for one date range [start, end), computed with a handful of SQL aggregates."""
+    start: datetime
+    end: datetime
+    total_spent: float = 0.0
+    total_income: float = 0.0
+    transaction_count: int = 0  # expenses only
+    categories: List[CategoryTotal] = field(default_factory=list)  # largest first
+    merchants: List[Tuple[str, float, int]] = field(default_factory=list)  # (title, total, count)
+
+    # --- Prompt fragments ---
+    def overview(self) -> str:
+        text = f"Total spent {_money(self.total_spent)} across {self.transaction_count} transactions"
+        if self.total_income:
+            text += f"; income {_money(self.total_income)}"
+        return text + "."
+
+    def category_lines(self, limit: Optional[int] = None) -> List[str]:
+        lines = []
+        for c in self.categories[:limit]:
+            share = (c.total / self.total_spent * 100) if self.total_spent else 0
+            lines.append(f"- {c.name}: {_money(c.total)} ({share:.0f}%, {c.count} txns)")
+        return lines
+
+    def merchant_lines(self, limit: int = TOP_MERCHANTS) -> List[str]:
+        return [f"- {title}: {_money(total)} ({count}x)" for title, total, count in self.merchants[:limit]]
+
+
+def transaction_line(t: Transaction) -> str:
+    return f"- {t.date.strftime('%Y-%m-%d')}: {t.title} ({t.category}) {_money(t.amount)}"
+
+
+@dataclass
+class FinancialContext:
+    user_id: int
+    version: Tuple
+    last_30_days: PeriodSummary
+    last_90_days: PeriodSummary
+    last_365_days: PeriodSummary
+    monthly_trend: List[Tuple[str, float, float]]  # (YYYY-MM, spent, income), oldest first
+
+    def trend_lines(self, months: int = TREND_MONTHS) -> List[str]:
+        """Newest month first, so budget trimming drops the oldest."""
+        return [f"- {month}: spent {_money(spent)}, income {_money(income)}" for month, spent, income in reversed(self.monthly_trend[-months:])]
+
+    def window(self, days: int) -> PeriodSummary:
+        windows = {30: self.last_30_days, 90: self.last_90_days, 365: self.last_365_days}
+        if days not in windows:
+            raise ValueError(f"No cached {days}-day window; use 30, 90 or 365.")
+        return windows[days]
+
+
+class FinancialContextService:
+    """
+    Builds and caches the aggregates AI prompts need (category totals, monthly trend, top
+    merchants, recent and largest transactions). Everything is computed in SQL and cached
+    per user data version (ledger version + category names), so repeated prompts within a
+    version cost no database work. Prompt text is assembled under a token budget, fetching
+    only as many transaction rows as will be shown.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.ledger_service = LedgerService(session)
+
+    def get_context(self, user_id: int, now: Optional[datetime] = None) -> FinancialContext:
+        # Windows end at the start of tomorrow so the cache key is stable within a day
+        tomorrow = (now or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        key, categories = self._cache_key(user_id, "context", tomorrow)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        context = FinancialContext(
+            user_id=user_id,
+            version=key,
+            last_30_days=self._period(user_id, tomorrow - timedelta(days=30), tomorrow, categories),
+            last_90_days=self._period(user_id, tomorrow - timedelta(days=90), tomorrow, categories),
+            last_365_days=self._period(user_id, tomorrow - timedelta(days=365), tomorrow, categories),
+            monthly_trend=self._monthly_trend(user_id, tomorrow),
+        )
+        self._store(key, context)
+        logger.debug(f"Built financial context for user {user_id}.")
+        return context
+
+    def get_period(self, user_id: int, start: datetime, end: datetime) -> PeriodSummary:
+        """Summary of [start, end), cached like the standard windows."""
+        key, categories = self._cache_key(user_id, "period", start, end)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        summary = self._period(user_id, start, end, categories)
+        self._store(key, summary)
+        return summary
+
+    def get_transactions(self, user_id: int, start: datetime, end: datetime, limit: int, largest: bool = False) -> List[Transaction]:
+        """Most recent (or largest) expenses in [start, end), fetched with a SQL LIMIT."""
+        if limit <= 0:
+            return []
+        key, categories = self._cache_key(user_id, "transactions", start, end, limit, largest)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        statement = select(Expense.date, Expense.title, Expense.category_id, Expense.amount)\
+            .where(Expense.user_id == user_id, Expense.date >= start, Expense.date < end, Expense.type == "expense")\
+            .order_by(Expense.amount.desc() if largest else Expense.date.desc())\
+            .limit(limit)
+        rows = [Transaction(d, t, categories.get(c, "Uncategorized"), float(a)) for d, t, c, a in self.session.exec(statement)]
+        self._store(key, rows)
+        return rows
+
+    # --- Prompt assembly ---
+    def prompt_summary(self, user_id: int, days: int = 365, budget_tokens: Optional[int] = None) -> str:
+        """Data section for AI prompts about the last `days` (30, 90 or 365), sized to the token budget."""
+        context = self.get_context(user_id)
+        summary = context.window(days)
+        return self._render(user_id, summary, f"Last {days} days: ", budget_tokens, trend=context.trend_lines())
+
+    def period_prompt(self, user_id: int, start: datetime, end: datetime, budget_tokens: Optional[int] = None) -> str:
+        """Data section for AI prompts about [start, end), sized to the token budget."""
+        return self._render(user_id, self.get_period(user_id, start, end), "", budget_tokens)
+
+    def _render(self, user_id: int, summary: PeriodSummary, heading: str, budget_tokens: Optional[int], trend: Optional[List[str]] = None) -> str:
+        builder = PromptBuilder(budget_tokens or settings.AI_PROMPT_TOKEN_BUDGET)
+        builder.add(heading + summary.overview())
+
+        categories = summary.categories
+        builder.add_list("Spending by category:", summary.category_lines(), tail=lambda n: (
+            f"- {n} smaller categories: {_money(sum(c.total for c in categories[-n:]))}"
+        ), share=0.4)
+        if trend:
+            builder.add_list("Monthly trend (newest first):", trend, tail=lambda n: f"- ({n} earlier months omitted)", share=0.3)
+        builder.add_list("Top merchants:", summary.merchant_lines(), share=0.3)
+
+        # Fetch only as many rows as the remaining budget can show; when every transaction
+        # fits, the recent list already contains the largest ones
+        fits_all = builder.rows_that_fit(_SAMPLE_TRANSACTION_LINE, cap=MAX_TRANSACTION_ROWS) >= summary.transaction_count
+        largest = [] if fits_all else self.get_transactions(user_id, summary.start, summary.end, builder.rows_that_fit(
+            _SAMPLE_TRANSACTION_LINE, share=0.4, cap=MAX_TRANSACTION_ROWS), largest=True)
+        if largest:
+            builder.add_list("Largest transactions:", [transaction_line(t) for t in largest], share=0.5)
+
+        recent = self.get_transactions(user_id, summary.start, summary.end, builder.rows_that_fit(
+            _SAMPLE_TRANSACTION_LINE, cap=MAX_TRANSACTION_ROWS))
+
+        def recent_tail(omitted_from_list: int) -> str:
+            shown = recent[:len(recent) - omitted_from_list]
+            rest_count = summary.transaction_count - len(shown)
+            rest_total = summary.total_spent - sum(t.amount for t in shown)
+            return f"- ...and {rest_count} earlier transactions totalling {_money(rest_total)}"
+
+        if recent:
+            lines = [transaction_line(t) for t in recent]
+            aggregate = len(recent) < summary.transaction_count
+            if aggregate:
+                # Everything not fetched is summarised as one aggregate line
+                lines.append(recent_tail(0))
+            builder.add_list("Most recent transactions:", lines, tail=lambda n: recent_tail(n - aggregate))
+        return builder.build()
+
+    # --- Caching ---
+    def _cache_key(self, user_id: int, *parts) -> Tuple[Tuple, Dict[int, str]]:
+        categories = dict(self.session.exec(select(Category.id, Category.name).where(Category.user_id == user_id)).all())
+        version = self.ledger_service.current_version(user_id)
+        return (user_id, version, tuple(sorted(categories.items())), *parts), categories
+
+    @staticmethod
+    def _cached(key):
+        with _cache_lock:
+            return _cache.get(key)
+
+    @staticmethod
+    def _store(key, value):
+        with _cache_lock:
+            if len(_cache) >= _CACHE_MAX_ENTRIES:
+                _cache.clear()
+            _cache[key] = value
+
+    # --- Aggregates ---
+    def _period(self, user_id: int, start: datetime, end: datetime, categories: Dict[int, str]) -> PeriodSummary:
+        in_range = (Expense.user_id == user_id, Expense.date >= start, Expense.date < end)
+        expenses = in_range + (Expense.type == "expense",)
+        summary = PeriodSummary(start=start, end=end)
+
+        for type_, total, count in self.session.exec(
+            select(Expense.type, func.sum(Expense.amount), func.count(Expense.id)).where(*in_range).group_by(Expense.type)
+        ):
+            if type_ == "income":
+                summary.total_income = float(total or 0)
+            elif type_ == "expense":
+                summary.total_spent = float(total or 0)
+                summary.transaction_count = int(count)
+
+        if not summary.transaction_count:
+            return summary
+
+        rows = self.session.exec(
+            select(Expense.category_id, func.sum(Expense.amount), func.count(Expense.id), func.max(Expense.amount))
+            .where(*expenses).group_by(Expense.category_id).order_by(desc(func.sum(Expense.amount)))
+        ).all()
+        summary.categories = [
+            CategoryTotal(cid, categories.get(cid, "Uncategorized"), float(total), int(count), float(max_single))
+            for cid, total, count, max_single in rows
+        ]
+
+        merchant_total = func.sum(Expense.amount)
+        summary.merchants = [
+            (title, float(total), int(count))
+            for title, total, count in self.session.exec(
+                select(func.min(Expense.title), merchant_total, func.count(Expense.id))
+                .where(*expenses).group_by(func.lower(Expense.title)).order_by(desc(merchant_total)).limit(TOP_MERCHANTS)
+            )
+        ]
+        return summary
+
+    def _monthly_trend(self, user_id: int, end: datetime) -> List[Tuple[str, float, float]]:
+        first = end.replace(day=1)
+        for _ in range(TREND_MONTHS - 1):
+            first = (first - timedelta(days=1)).replace(day=1)
+        month = month_bucket(self.session)
+        rows = self.session.exec(
+            select(month, Expense.type, func.sum(Expense.amount))
+            .where(Expense.user_id == user_id, Expense.date >= first, Expense.date < end)
+            .group_by(month, Expense.type).order_by(month)
+        ).all()
+
+        trend: Dict[str, List[float]] = {}
+        for key, type_, total in rows:
+            bucket = trend.setdefault(key, [0.0, 0.0])
+            bucket[0 if type_ == "expense" else 1] += float(total or 0)
+        return [(key, spent, income) for key, (spent, income) in trend.items()]
@@ -0,0 +1,191 @@
+import calendar
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlmodel import Session
+
+from backend.adapters.database.models import RecurringExpense
+from backend.adapters.database.repositories.recurring_repository import RecurringExpenseRepository
+from backend.adapters.ledger.snapshot import NO_CATEGORY
+from backend.services.ledger_service import LedgerService
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DAYS = 180
+SMOOTHING_ALPHA = 0.05
+# Charges within this relative distance of an active recurring amount count as that bill
+RECURRING_AMOUNT_TOLERANCE = 0.01
+# How many days of data a weekday needs before its own profile outweighs the flat prior
+WEEKDAY_PRIOR_DAYS = 8
+INTERVAL_Z = 1.2816  # two-sided 80% interval
+
+_cache: Dict[Tuple, Dict[Optional[int], "CategoryForecast"]] = {}
+_cache_lock = threading.Lock()
+_CACHE_MAX_ENTRIES = 1024
+
+
+@dataclass
+class CategoryForecast:
+    category_id: Optional[int]
+    spent: float
+    projected: float
+    lower: float
+    upper: float
+    recurring_due: float
+    days_remaining: int
+
+
+class ForecastService:
+    """
+    End-of-month spend projections per category, without an LLM.
+
+    The baseline is an exponentially smoothed daily level over the last HISTORY_DAYS,
+    shaped by a shrunk day-of-week profile, with scheduled RecurringExpense charges for the
+    rest of the month added explicitly (past charges matching a recurring bill are left out
+    of the baseline so they are not counted twice). All categories are projected in one
+    vectorised pass over the ledger snapshot, and results are cached per ledger version.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.ledger_service = LedgerService(session)
+        self.recurring_repository = RecurringExpenseRepository(session)
+
+    def forecast_month(self, user_id: int, category_ids: Iterable[Optional[int]], now: Optional[datetime] = None) -> Dict[Optional[int], CategoryForecast]:
+        now = now or datetime.utcnow()
+        category_ids = list(dict.fromkeys(category_ids))
+        if not category_ids:
+            return {}
+
+        ledger = self.ledger_service.get_ledger(user_id)
+        recurring = [r for r in self.recurring_repository.get_for_user(user_id) if r.is_active]
+        recurring_key = tuple(sorted((r.id, r.category_id, r.amount, r.frequency, r.next_due_date) for r in recurring))
+        cache_key = (user_id, ledger.version, now.date(), tuple(category_ids), recurring_key)
+
+        with _cache_lock:
+            cached = _cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = self._forecast(ledger.expenses_only(), category_ids, recurring, now)
+
+        with _cache_lock:
+            if len(_cache) >= _CACHE_MAX_ENTRIES:
+                _cache.clear()
+            _cache[cache_key] = result
+        return result
+
+    def _forecast(self, records: np.ndarray, category_ids: List[Optional[int]], recurring: List[RecurringExpense], now: datetime) -> Dict[Optional[int], CategoryForecast]:
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        month_start = today.replace(day=1)
+        days_in_month = calendar.monthrange(today.year, today.month)[1]
+        days_remaining = days_in_month - today.day
+        n_cats = len(category_ids)
+
+        codes = np.array([NO_CATEGORY if c is None else c for c in category_ids], dtype=np.int64)
+        # Map each ledger row to its row in the per-category matrix (-1 if not requested)
+        order = np.argsort(codes)
+        pos = np.searchsorted(codes[order], records["category_id"])
+        pos = np.clip(pos, 0, n_cats - 1)
+        matched = codes[order][pos] == records["category_id"]
+        row_index = np.where(matched, order[pos], -1)
+
+        dates = records["date"]
+        amounts = records["amount"]
+
+        # Spend so far this month
+        in_month = matched & (dates >= np.datetime64(month_start, "s")) & (dates < np.datetime64(now, "s"))
+        spent = np.bincount(row_index[in_month], weights=amounts[in_month], minlength=n_cats)
+
+        # Daily series over the history window, up to (not including) today, without recurring bills
+        window_start = today - timedelta(days=HISTORY_DAYS)
+        in_window = matched & (dates >= np.datetime64(window_start, "s")) & (dates < np.datetime64(today, "s"))
+        for r in recurring:
+            bill = (records["category_id"] == (NO_CATEGORY if r.category_id is None else r.category_id)) & \
+                (np.abs(amounts - r.amount) <= RECURRING_AMOUNT_TOLERANCE * r.amount)
+            in_window &= ~bill
+        day_offsets = ((dates[in_window] - np.datetime64(window_start, "s")) // np.timedelta64(1, "D")).astype(np.int64)
+        daily = np.zeros((n_cats, HISTORY_DAYS))
+        np.add.at(daily, (row_index[in_window], day_offsets), amounts[in_window])
+
+        # Only use the part of the window after each category's first transaction
+        has_data = daily > 0
+        first_day = np.where(has_data.any(axis=1), has_data.argmax(axis=1), HISTORY_DAYS)
+        active = np.arange(HISTORY_DAYS)[None, :] >= first_day[:, None]
+        active_days = active.sum(axis=1)
+
+        # Day-of-week profile, shrunk towards flat when data is thin
+        window_weekdays = (np.arange(HISTORY_DAYS) + window_start.weekday()) % 7
+        weekday_onehot = np.eye(7)[window_weekdays]  # (days, 7)
+        weekday_sums = (daily * active) @ weekday_onehot
+        weekday_counts = active.astype(float) @ weekday_onehot
+        overall_mean = np.divide(daily.sum(axis=1), active_days, out=np.zeros(n_cats), where=active_days > 0)
+        weekday_means = np.divide(weekday_sums, weekday_counts, out=np.zeros_like(weekday_sums), where=weekday_counts > 0)
+        raw_profile = np.divide(weekday_means, overall_mean[:, None], out=np.ones_like(weekday_means), where=overall_mean[:, None] > 0)
+        profile = (weekday_counts * raw_profile + WEEKDAY_PRIOR_DAYS) / (weekday_counts + WEEKDAY_PRIOR_DAYS)
+
+        # Exponentially smoothed level (most recent day weighted highest), as a ratio to the profile:
+        # dividing each day by the shrunk profile first would understate strongly weekly spend
+        ages = np.arange(HISTORY_DAYS)[::-1]
+        weights = SMOOTHING_ALPHA * (1 - SMOOTHING_ALPHA) ** ages * active
+        expected_weight = (weights * profile[:, window_weekdays]).sum(axis=1)
+        level = np.divide((daily * weights).sum(axis=1), expected_weight, out=np.zeros(n_cats), where=expected_weight > 0)
+
+        # Recurring bills are scheduled explicitly for the rest of the month
+        recurring_due = self._recurring_due(recurring, category_ids, month_start, days_in_month)
+
+        # Residual spread of the fitted daily model, for the interval
+        fitted = overall_mean[:, None] * profile[:, window_weekdays]
+        residuals = (daily - fitted) * active
+        dof = np.maximum(active_days - 1, 1)
+        sigma = np.sqrt((residuals ** 2).sum(axis=1) / dof)
+
+        remaining_weekdays = [(today + timedelta(days=d)).weekday() for d in range(1, days_remaining + 1)]
+        # Today's remaining spend is projected as the unspent share of one average day
+        today_fraction = max(0.0, 1.0 - (now - today).total_seconds() / 86400)
+        remaining_factor = profile[:, remaining_weekdays].sum(axis=1) if remaining_weekdays else np.zeros(n_cats)
+        remaining_factor = remaining_factor + today_fraction * profile[:, today.weekday()]
+        baseline_remaining = level * remaining_factor
+
+        projected = spent + baseline_remaining + recurring_due
+        spread = INTERVAL_Z * sigma * np.sqrt(days_remaining + today_fraction)
+        lower = np.maximum(projected - spread, spent + recurring_due)
+        upper = projected + spread
+
+        forecasts = {}
+        for i, category_id in enumerate(category_ids):
+            forecasts[category_id] = CategoryForecast(
+                category_id=category_id,
+                spent=float(spent[i]),
+                projected=float(projected[i]),
+                lower=float(lower[i]),
+                upper=float(upper[i]),
+                recurring_due=float(recurring_due[i]),
+                days_remaining=days_remaining,
+            )
+        return forecasts
+
+    @staticmethod
+    def _recurring_due(recurring: List[RecurringExpense], category_ids: List[Optional[int]], month_start: datetime, days_in_month: int) -> np.ndarray:
+        index = {c: i for i, c in enumerate(category_ids)}
+        due = np.zeros(len(category_ids))
+        month_end = month_start + timedelta(days=days_in_month)
+
+        for r in recurring:
+            i = index.get(r.category_id)
+            if i is None:
+                continue
+            step = timedelta(weeks=1) if r.frequency == "weekly" else timedelta(days=30)
+
+            # Same schedule RecurringExpenseService.process_due_expenses follows; anything from
+            # next_due_date on has not been generated yet, even if it is already overdue
+            occurrence = r.next_due_date
+            while occurrence < month_end:
+                if occurrence >= month_start:
+                    due[i] += r.amount
+                occurrence += step
+        return due
@@ -1,9 +1,15 @@
 import csv
 import io
+import logging
 from typing import Dict, Any, List
 from datetime import datetime
 from sqlmodel import Session, select, delete, or_
-from backend.adapters.database.models import Expense, User, Category, Budget, RecurringExpense, AISuggestion, UserSettings
+from backend.adapters.database.models import Expense, User, Category, Budget, RecurringExpense, AISuggestion, UserSettings, CategoryStats
+from backend.adapters.ledger.snapshot import ledger_row
+from backend.services.anomaly_service import AnomalyService
+from backend.services.ledger_service import LedgerService
+
+logger = logging.getLogger(__name__)
 
 class ImportService:
     def __init__(self, session: Session):
@@ -58,6 +64,7 @@ class ImportService:
 
         # 4. Create Expenses
         count = 0
+        imported = []
         for row in rows:
             try:
                 date_str = row.get('date', datetime.utcnow().strftime('%Y-%m-%d'))
@@ -87,14 +94,30 @@ class ImportService:
                     user_id=user_id
                 )
                 self.session.add(expense)
+                imported.append(expense)
                 count += 1
             except Exception as e:
                 print(f"Skipping row due to error: {e}")
                 continue
                 
+        # Flush first so the ledger delta can be written from the assigned ids
+        self.session.flush()
+        ledger_rows = [ledger_row(e) for e in imported]
         self.session.commit()
+        LedgerService(self.session).record_rows(user_id, ledger_rows)
+        self._rebuild_stats(user_id, {e.category_id for e in imported if e.type == "expense"})
         return {"message": f"Successfully imported {count} expenses and created {new_categories_count} new categories."}
 
+    def _rebuild_stats(self, user_id: int, category_ids: set):
+        """Anomaly stats for the imported categories, so write-time scoring covers imported history."""
+        if not category_ids:
+            return
+        try:
+            AnomalyService(self.session).rebuild_stats(user_id, category_ids)
+        except Exception as e:
+            self.session.rollback()
+            logger.error(f"Anomaly stats rebuild after import failed for user {user_id}: {e}")
+
     def get_all_expenses(self, user_id: int) -> List[Expense]:
         return self.session.exec(
             select(Expense)
@@ -111,11 +134,13 @@ class ImportService:
             self.session.exec(delete(RecurringExpense).where(RecurringExpense.user_id == user_id))
             self.session.exec(delete(AISuggestion).where(AISuggestion.user_id == user_id))
             self.session.exec(delete(UserSettings).where(UserSettings.user_id == user_id))
+            self.session.exec(delete(CategoryStats).where(CategoryStats.user_id == user_id))
             
             # Delete custom categories
             self.session.exec(delete(Category).where(Category.user_id == user_id))
             
             self.session.commit()
+            LedgerService(self.session).invalidate(user_id)
             print("Data cleared successfully")
             return True
         except Exception as e:
@@ -0,0 +1,211 @@
+import re
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from backend.core.metrics import counters
+from backend.services.date_phrases import match_periods
+from backend.services.recurring_detector import merchant_key
+
+# Operation cues, most specific first
+_TOP_MERCHANTS_RE = re.compile(
+    r"\btop\s+(?:(?P<n>\d{1,2})\s+)?(?:merchants?|stores?|shops?|places|vendors|payees)\b"
+    r"|\bwhere\s+do\s+i\s+spend\s+the\s+most\b"
+    r"|\b(?:which|what)\s+(?:merchants?|stores?|shops?|places|vendors)\b"
+)
+_OPERATION_CUES: List[Tuple[str, re.Pattern]] = [
+    ("count_transactions", re.compile(r"\bhow\s+many\b|\bnumber\s+of\b|\bcount\b")),
+    ("average_spend", re.compile(r"\baverage\b|\bavg\b|\bmean\b|\btypical\b")),
+    ("max_spend", re.compile(r"\b(?:biggest|largest|highest|most\s+expensive|max|maximum)\b")),
+    ("min_spend", re.compile(r"\b(?:smallest|lowest|cheapest|min|minimum)\b")),
+    ("total_spend", re.compile(r"\bhow\s+much\b|\btotal\b|\bspen[dt]\b|\bspending\b|\bexpenses?\b|\bbreakdown\b|\bcost\b|\bearn(?:ed|ings)?\b|\bincome\b")),
+]
+_COMPARE_RE = re.compile(r"\b(?:vs|versus|compared?\s+(?:to|with)|compare)\b")
+_GROUP_CUES: List[Tuple[str, re.Pattern]] = [
+    ("category", re.compile(r"\b(?:by|per|each|every|across)\s+categor(?:y|ies)\b|\bcategory\s*wise\b|\bbreakdown\b")),
+    ("month", re.compile(r"\b(?:by|per|each|every)\s+month\b|\bmonthly\b|\bmonth\s+by\s+month\b|\bmonth\s*wise\b")),
+    ("merchant", re.compile(r"\b(?:by|per|each|every)\s+(?:merchant|store|shop|vendor)\b|\bmerchant\s*wise\b")),
+]
+_INCOME_RE = re.compile(r"\b(?:income|earn|earned|earnings|salary|received)\b")
+
+# Words that carry no filter meaning; anything else left over sends the question to the LLM
+_FILLER = set("""
+a an the i me my we our us you your it its is was were are be been do did does done have has had
+how much many what whats which where when who whom this that these those there here in on at for to
+of from by per with and or vs versus compare compared comparison than so far up till until total
+spend spent spending spends expense expenses transaction transactions purchase purchases payment payments
+money amount amounts cost costs paid pay buy bought average avg mean typical biggest largest highest
+most expensive max maximum smallest lowest cheapest min minimum number count tell show give list please
+all overall each every category categories categorywise wise month months monthly merchant merchants
+store stores shop shops place places vendor vendors payee payees top breakdown income earn earned earnings
+salary received single one ever can could would should will know let see get just about roughly around
+approximately may
+ride rides trip trips order orders visit visits delivery deliveries booking bookings
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9&']+")
+
+
+def _mask(text: str, start: int, end: int) -> str:
+    return text[:start] + " " * (end - start) + text[end:]
+
+
+class IntentParser:
+    """
+    Deterministic grammar for common analytics questions ("how much did I spend on food last
+    month", "top 5 merchants this year", "average uber ride since january").
+
+    Produces the same params dict the LLM is asked for (operation, filters, group_by, ...)
+    or None when any part of the question is not understood, so callers can fall back.
+    """
+
+    def __init__(self, categories: Iterable[Tuple[int, str]], history: Iterable[Tuple[str, Optional[int], int]]):
+        """Same inputs as ExpenseParser: (id, name) categories and (title, category_id, count) history."""
+        names = sorted({name for _, name in categories}, key=len, reverse=True)
+        self._categories = [(name, self._name_pattern(name)) for name in names]
+        # Single words of multi-word names ("food" for "Food & Dining") when only one category uses them
+        owners: Dict[str, set] = {}
+        for name in names:
+            words = re.findall(r"[a-z]+", name.lower())
+            if len(words) > 1:
+                for word in words:
+                    if len(word) > 2 and word not in _FILLER:
+                        owners.setdefault(word, set()).add(name)
+        self._categories += [(next(iter(o)), self._name_pattern(w)) for w, o in owners.items() if len(o) == 1]
+
+        merchants = set()
+        for title, _, _ in history:
+            key = merchant_key(title)
+            if key:
+                merchants.add(key)
+                merchants.update(t for t in key.split() if len(t) > 2)
+        merchants -= _FILLER
+        self._merchants = sorted(merchants, key=len, reverse=True)
+
+    @staticmethod
+    def _name_pattern(name: str) -> re.Pattern:
+        words = [re.escape(w) for w in name.lower().replace("&", " & ").split()]
+        last = words[-1]
+        # Tolerate singular/plural ("grocery" for "Groceries", "bills" for "Bill")
+        if last.endswith("ies"):
+            last = last[:-3] + "(?:y|ies)"
+        elif last.endswith("s"):
+            last = last[:-1] + "s?"
+        else:
+            last += "s?"
+        words[-1] = last
+        return re.compile(r"\b" + r"\s+(?:and\s+)?".join(words) + r"\b")
+
+    def parse(self, question: str, today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        today = today or datetime.now().date()
+        text = " ".join(re.sub(r"[?!.,;:\"()]", " ", question.lower()).split())
+        if not text:
+            return None
+
+        periods = match_periods(text, today)
+        masked = text
+        for period in periods:
+            masked = _mask(masked, period.span_start, period.span_end)
+
+        # Operation
+        operation, limit = None, None
+        top = _TOP_MERCHANTS_RE.search(masked)
+        if top:
+            operation = "top_merchants"
+            limit = int(top.group("n")) if top.group("n") else None
+        elif _COMPARE_RE.search(masked):
+            if len(periods) != 2:
+                return None
+            operation = "compare_periods"
+        else:
+            operation = next((op for op, cue in _OPERATION_CUES if cue.search(masked)), None)
+        if operation is None or len(periods) > (2 if operation == "compare_periods" else 1):
+            return None
+
+        group_by = next((g for g, cue in _GROUP_CUES if cue.search(masked)), None)
+        if group_by and operation not in ("total_spend", "count_transactions", "average_spend", "min_spend", "max_spend"):
+            return None
+
+        # Category (at most one)
+        category = None
+        for name, pattern in self._categories:
+            match = pattern.search(masked)
+            if match:
+                if category is not None and category != name:
+                    return None
+                category = name
+                masked = _mask(masked, *match.span())
+
+        # Merchant: known merchant keys from the user's history
+        merchant = None
+        for key in self._merchants:
+            match = re.search(rf"\b{re.escape(key)}s?\b", masked)
+            if match:
+                merchant = key
+                masked = _mask(masked, *match.span())
+                break
+
+        leftovers = [t for t in _TOKEN_RE.findall(masked) if t not in _FILLER and not t.isdigit()]
+        if leftovers:
+            return None
+
+        income = bool(_INCOME_RE.search(text))
+        filters: Dict[str, Any] = {
+            "category_name": category,
+            "merchant_name": merchant,
+            "start_date": None,
+            "end_date": None,
+            "type": "income" if income else "expense",
+        }
+        params: Dict[str, Any] = {"operation": operation, "filters": filters, "group_by": group_by}
+        if limit:
+            params["limit"] = limit
+
+        if operation == "compare_periods":
+            current, previous = periods
+            filters["start_date"], filters["end_date"] = current.start.isoformat(), current.end.isoformat()
+            params["compare_start_date"], params["compare_end_date"] = previous.start.isoformat(), previous.end.isoformat()
+        elif periods:
+            filters["start_date"], filters["end_date"] = periods[0].start.isoformat(), periods[0].end.isoformat()
+
+        params["human_readable_answer_template"] = self._template(operation, group_by, category, merchant, income, periods)
+        return params
+
+    @staticmethod
+    def _template(operation: str, group_by: Optional[str], category: Optional[str], merchant: Optional[str],
+                  income: bool, periods: list) -> str:
+        scope = ""
+        if category:
+            scope += f" on {category}"
+        if merchant:
+            scope += f" at {merchant.title()}"
+        when = f" {periods[0].label}" if periods and operation != "compare_periods" else ""
+
+        if operation == "compare_periods":
+            return f"{'Income' if income else 'Spending'}{scope} {periods[0].label} vs {periods[1].label}:"
+        if operation == "top_merchants":
+            return f"Top merchants{scope}{when}:"
+        if group_by:
+            noun = {"total_spend": "Income" if income else "Spending", "count_transactions": "Transactions",
+                    "average_spend": "Average transaction", "min_spend": "Smallest transaction",
+                    "max_spend": "Largest transaction"}[operation]
+            return f"{noun}{scope}{when} by {group_by}:"
+        if operation == "total_spend":
+            return f"You {'earned' if income else 'spent'} {{value}}{scope}{when}."
+        if operation == "count_transactions":
+            return f"You made {{value}} transactions{scope}{when}."
+        adjective = {"average_spend": "average", "min_spend": "smallest", "max_spend": "largest"}[operation]
+        return f"Your {adjective} {'income' if income else 'expense'}{scope}{when} was {{value}}."
+
+
+def record_route(route: str):
+    """Counts how an analytics question was answered: "local", "llm" or "unanswered"."""
+    counters.increment(f"nl_query.{route}")
+
+
+def routing_stats() -> Dict[str, Any]:
+    snapshot = counters.snapshot("nl_query.")
+    stats = {route: snapshot.get(f"nl_query.{route}", 0) for route in ("local", "llm", "unanswered")}
+    total = sum(stats.values())
+    stats["total"] = total
+    stats["local_fraction"] = round(stats["local"] / total, 3) if total else None
+    return stats
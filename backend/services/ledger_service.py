@@ -0,0 +1,83 @@
+from typing import Iterable, Tuple
+import logging
+from sqlmodel import Session
+from backend.adapters.database.repositories.expense_repository import ExpenseRepository
+from backend.adapters.database.models import Expense
+from backend.adapters.database.session import primary_reads
+from backend.adapters.ledger.snapshot import (
+    LedgerView, LedgerRow, get_snapshot_store, ledger_row, OP_UPSERT, OP_DELETE
+)
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class LedgerService:
+    """
+    Keeps per-user ledger snapshots in step with the expense table.
+
+    Reads go through `get_ledger`, which maps the snapshot and applies the delta log.
+    Writers call the `record_*` hooks after committing; failures there never fail the
+    write itself, they only drop the snapshot so the next read rebuilds it.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.repository = ExpenseRepository(session)
+        self.store = get_snapshot_store()
+
+    def get_ledger(self, user_id: int) -> LedgerView:
+        if self.store.delta_rows(user_id) > settings.LEDGER_DELTA_COMPACT_ROWS:
+            logger.info(f"Ledger delta for user {user_id} is large; compacting snapshot.")
+            self.rebuild(user_id)
+
+        view = self.store.load(user_id)
+        if view is None:
+            self.rebuild(user_id)
+            view = self.store.load(user_id)
+        return view
+
+    def current_version(self, user_id: int) -> Tuple[int, ...]:
+        """
+        The ledger's version token (what `get_ledger(user_id).version` would be) for cache keys:
+        a few stat calls, without mapping the snapshot or applying its delta log. Builds the
+        snapshot only if there is none yet.
+        """
+        version = self.store.version(user_id)
+        if version is None:
+            self.rebuild(user_id)
+            version = self.store.version(user_id)
+        return version
+
+    def rebuild(self, user_id: int) -> int:
+        self.store.begin_compaction(user_id)
+        try:
+            # A snapshot outlives the request: build it from the primary, never a lagging replica
+            with primary_reads(self.session):
+                return self.store.write_snapshot(user_id, self.repository.iter_ledger_rows(user_id))
+        except Exception:
+            self.store.abort_compaction(user_id)
+            raise
+
+    def record_upsert(self, user_id: int, expenses: Iterable[Expense]):
+        self.record_rows(user_id, [ledger_row(e) for e in expenses])
+
+    def record_rows(self, user_id: int, rows: Iterable[LedgerRow]):
+        self._append(user_id, list(rows), OP_UPSERT)
+
+    def record_delete(self, user_id: int, row: LedgerRow):
+        self._append(user_id, [row], OP_DELETE)
+
+    def invalidate(self, user_id: int):
+        try:
+            self.store.drop(user_id)
+        except OSError as e:
+            logger.error(f"Failed to drop ledger snapshot for user {user_id}: {e}")
+
+    def _append(self, user_id: int, rows: list, op: int):
+        if not rows:
+            return
+        try:
+            self.store.append_delta(user_id, rows, op=op)
+        except Exception as e:
+            logger.warning(f"Failed to append ledger delta for user {user_id}: {e}. Dropping snapshot.")
+            self.invalidate(user_id)
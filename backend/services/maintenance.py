@@ -0,0 +1,166 @@
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, func, or_
+from sqlmodel import Session, select
+
+from backend.adapters.database import partitioning
+from backend.adapters.database.migrations import try_lock
+from backend.adapters.database.models import AISuggestion, MonthlyReport
+from backend.adapters.database.repositories.ai_cache_repository import AICacheRepository
+from backend.adapters.database.session import engine
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Job:
+    def __init__(self, name: str, interval_seconds: float, run: Callable[[Session], Any], single_worker: bool):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.run = run
+        self.single_worker = single_worker
+        # Jittered first run, so workers started together do not sweep in lockstep
+        self.next_run = time.monotonic() + random.uniform(0, interval_seconds)
+
+
+class MaintenanceRunner:
+    """
+    Runs periodic housekeeping jobs on a daemon thread, each with its own session. Every worker
+    runs its own copy, so jobs must be idempotent and safe to run concurrently. Jobs registered
+    with `single_worker=True` (deletes, DDL) run only in the worker holding the maintenance lock
+    (migrations.try_lock); if that worker exits, another takes the lock at its next due run.
+    """
+
+    LOCK_NAME = "maintenance-leader"
+
+    def __init__(self):
+        self._jobs: List[_Job] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._leader: Optional[ExitStack] = None # holds the lock while this worker runs single-worker jobs
+
+    def register(self, name: str, interval_seconds: float, run: Callable[[Session], Any], single_worker: bool = False):
+        self._jobs.append(_Job(name, interval_seconds, run, single_worker))
+
+    def _is_leader(self) -> bool:
+        if self._leader is None:
+            stack = ExitStack()
+            if stack.enter_context(try_lock(engine, self.LOCK_NAME)):
+                self._leader = stack
+                logger.info("This worker runs the single-worker maintenance jobs.")
+            else:
+                stack.close()
+        return self._leader is not None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="maintenance", daemon=True)
+        self._thread.start()
+        logger.info(f"Maintenance runner started with jobs: {', '.join(job.name for job in self._jobs)}.")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+        if self._leader is not None:
+            self._leader.close()
+            self._leader = None
+
+    def run_job(self, name: str) -> Any:
+        """Runs one job now, in the calling thread (e.g. from a script)."""
+        job = next(job for job in self._jobs if job.name == name)
+        with Session(engine) as session:
+            return job.run(session)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for job in self._jobs:
+                if now < job.next_run or self._stop.is_set():
+                    continue
+                started = time.perf_counter()
+                try:
+                    if not job.single_worker or self._is_leader():
+                        with Session(engine) as session:
+                            job.run(session)
+                        logger.debug(f"Maintenance job {job.name} took {(time.perf_counter() - started) * 1000:.0f} ms.")
+                except Exception as e:
+                    logger.error(f"Maintenance job {job.name} failed: {e}")
+                job.next_run = time.monotonic() + job.interval_seconds
+            next_due = min((job.next_run for job in self._jobs), default=time.monotonic() + 60)
+            self._stop.wait(max(1.0, next_due - time.monotonic()))
+
+
+def sweep_ai_cache(session: Session) -> int:
+    """Deletes expired AICacheEntry rows."""
+    deleted = AICacheRepository(session).delete_expired(datetime.utcnow())
+    if deleted:
+        logger.info(f"Swept {deleted} expired AI cache entries.")
+    return deleted
+
+
+def prune_history(session: Session, model, order_column, keep_last: int, max_age_days: int) -> int:
+    """
+    Deletes each user's rows beyond the newest `keep_last` (by `order_column`) or created more
+    than `max_age_days` ago; 0 disables either limit. Deletes run in RETENTION_BATCH_SIZE chunks,
+    one short transaction each, so request writes are never blocked for long.
+    """
+    conditions = []
+    if keep_last > 0:
+        rank = func.row_number().over(partition_by=model.user_id, order_by=(order_column.desc(), model.id.desc()))
+        ranked = select(model.id, model.created_at, rank.label("rank")).subquery()
+        conditions.append(ranked.c.rank > keep_last)
+    else:
+        ranked = select(model.id, model.created_at).subquery()
+    if max_age_days > 0:
+        conditions.append(ranked.c.created_at < datetime.utcnow() - timedelta(days=max_age_days))
+    if not conditions:
+        return 0
+
+    ids = session.exec(select(ranked.c.id).where(or_(*conditions))).all()
+    for start in range(0, len(ids), settings.RETENTION_BATCH_SIZE):
+        session.execute(delete(model).where(model.id.in_(ids[start:start + settings.RETENTION_BATCH_SIZE])))
+        session.commit()
+        time.sleep(settings.RETENTION_BATCH_PAUSE_SECONDS)
+    return len(ids)
+
+
+def apply_retention(session: Session) -> Dict[str, int]:
+    """Prunes AI suggestion and monthly report history per the *_KEEP_LAST / *_MAX_AGE_DAYS settings."""
+    deleted = {
+        "ai_suggestion": prune_history(session, AISuggestion, AISuggestion.created_at, settings.AI_SUGGESTION_KEEP_LAST, settings.AI_SUGGESTION_MAX_AGE_DAYS),
+        "monthly_report": prune_history(session, MonthlyReport, MonthlyReport.month, settings.MONTHLY_REPORT_KEEP_LAST, settings.MONTHLY_REPORT_MAX_AGE_DAYS),
+    }
+    if any(deleted.values()):
+        logger.info(f"Retention deleted {deleted['ai_suggestion']} AI suggestions and {deleted['monthly_report']} monthly reports.")
+    return deleted
+
+
+def ensure_expense_partitions(session: Session) -> List[str]:
+    """Creates upcoming monthly expense partitions (EXPENSE_PARTITION_MONTHS_AHEAD); no-op unless partitioned."""
+    connection = session.connection()
+    if not partitioning.is_partitioned(connection):
+        return []
+    created = partitioning.ensure_partitions(connection, settings.EXPENSE_PARTITION_MONTHS_AHEAD)
+    session.commit()
+    if created:
+        logger.info(f"Created expense partitions: {', '.join(created)}.")
+    return created
+
+
+maintenance = MaintenanceRunner()
+maintenance.register("ai_cache_sweep", settings.AI_CACHE_SWEEP_SECONDS, sweep_ai_cache)
+if any((settings.AI_SUGGESTION_KEEP_LAST, settings.AI_SUGGESTION_MAX_AGE_DAYS,
+        settings.MONTHLY_REPORT_KEEP_LAST, settings.MONTHLY_REPORT_MAX_AGE_DAYS)):
+    maintenance.register("retention", settings.RETENTION_INTERVAL_SECONDS, apply_retention, single_worker=True)
+if settings.EXPENSE_PARTITIONING:
+    maintenance.register("expense_partitions", settings.EXPENSE_PARTITION_CHECK_SECONDS, ensure_expense_partitions, single_worker=True)
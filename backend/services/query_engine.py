@@ -0,0 +1,261 @@
+from dataclasses import dataclass, field, asdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, literal, literal_column
+from sqlmodel import Session, select, func, desc
+
+from backend.adapters.database.models import Expense, Category
+
+# Scalar aggregates: operation -> (SQL aggregate factory, is a money amount)
+AGGREGATES = {
+    "total_spend": (lambda: func.coalesce(func.sum(Expense.amount), 0.0), True),
+    "count_transactions": (lambda: func.count(Expense.id), False),
+    "average_spend": (lambda: func.avg(Expense.amount), True),
+    "min_spend": (lambda: func.min(Expense.amount), True),
+    "max_spend": (lambda: func.max(Expense.amount), True),
+}
+OPERATIONS = set(AGGREGATES) | {"top_merchants", "compare_periods"}
+GROUP_BY = {"category", "month", "merchant"}
+TYPES = {"expense", "income"}
+MAX_LIMIT = 50
+DEFAULT_LIMIT = 5
+UNCATEGORIZED = "Uncategorized"
+
+
+class QueryValidationError(ValueError):
+    pass
+
+
+def month_bucket(session: Session):
+    """'YYYY-MM' of Expense.date for the session's dialect."""
+    # Inline format literals so the SELECT and GROUP BY expressions compare equal on Postgres
+    if session.get_bind().dialect.name == "sqlite":
+        return func.strftime(literal_column("'%Y-%m'"), Expense.date)
+    return func.to_char(Expense.date, literal_column("'YYYY-MM'"))
+
+
+def _parse_date(value: Any, name: str) -> Optional[date]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value), "%Y-%m-%d").date()
+    except ValueError:
+        raise QueryValidationError(f"'{name}' must be a YYYY-MM-DD date, got {value!r}")
+
+
+def _parse_text(value: Any, name: str, max_length: int = 100) -> Optional[str]:
+    if value in (None, ""):
+        return None
+    if not isinstance(value, str) or len(value) > max_length:
+        raise QueryValidationError(f"'{name}' must be a string of at most {max_length} characters")
+    return value.strip() or None
+
+
+@dataclass
+class QueryFilters:
+    category_name: Optional[str] = None
+    merchant_name: Optional[str] = None  # partial, case-insensitive match on the title
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None  # inclusive
+    type: str = "expense"
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "QueryFilters":
+        data = data or {}
+        if not isinstance(data, dict):
+            raise QueryValidationError("'filters' must be an object")
+        filters = cls(
+            category_name=_parse_text(data.get("category_name"), "category_name"),
+            merchant_name=_parse_text(data.get("merchant_name"), "merchant_name"),
+            start_date=_parse_date(data.get("start_date"), "start_date"),
+            end_date=_parse_date(data.get("end_date"), "end_date"),
+            type=data.get("type") or "expense",
+        )
+        if filters.type not in TYPES:
+            raise QueryValidationError(f"'type' must be one of {sorted(TYPES)}")
+        if filters.start_date and filters.end_date and filters.start_date > filters.end_date:
+            raise QueryValidationError("'start_date' is after 'end_date'")
+        return filters
+
+
+@dataclass
+class ExpenseQuery:
+    """
+    Validated query AST for analytics questions. Built from untrusted JSON (LLM output or a
+    local grammar) and only ever compiled into parameterised SQLAlchemy expressions.
+    """
+    operation: str
+    filters: QueryFilters = field(default_factory=QueryFilters)
+    group_by: Optional[str] = None
+    limit: int = DEFAULT_LIMIT
+    # Second period for "compare_periods"; the primary period comes from filters
+    compare_start_date: Optional[date] = None
+    compare_end_date: Optional[date] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ExpenseQuery":
+        if not isinstance(data, dict):
+            raise QueryValidationError("Query must be an object")
+        operation = data.get("operation")
+        if operation not in OPERATIONS:
+            raise QueryValidationError(f"Unsupported operation {operation!r}")
+
+        group_by = data.get("group_by") or None
+        if group_by is not None and group_by not in GROUP_BY:
+            raise QueryValidationError(f"'group_by' must be one of {sorted(GROUP_BY)}")
+        if group_by and operation not in AGGREGATES:
+            raise QueryValidationError(f"'{operation}' cannot be grouped")
+
+        try:
+            limit = int(data.get("limit") or DEFAULT_LIMIT)
+        except (TypeError, ValueError):
+            raise QueryValidationError("'limit' must be an integer")
+        if not 1 <= limit <= MAX_LIMIT:
+            raise QueryValidationError(f"'limit' must be between 1 and {MAX_LIMIT}")
+
+        query = cls(
+            operation=operation,
+            filters=QueryFilters.from_dict(data.get("filters")),
+            group_by=group_by,
+            limit=limit,
+            compare_start_date=_parse_date(data.get("compare_start_date"), "compare_start_date"),
+            compare_end_date=_parse_date(data.get("compare_end_date"), "compare_end_date"),
+        )
+        if operation == "compare_periods":
+            if not (query.filters.start_date and query.filters.end_date and query.compare_start_date and query.compare_end_date):
+                raise QueryValidationError("'compare_periods' needs start/end dates for both periods")
+            if query.compare_start_date > query.compare_end_date:
+                raise QueryValidationError("'compare_start_date' is after 'compare_end_date'")
+        return query
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        for container in (data, data["filters"]):
+            for key, value in container.items():
+                if isinstance(value, date):
+                    container[key] = value.isoformat()
+        return data
+
+
+@dataclass
+class QueryResult:
+    operation: str
+    value: Optional[float] = None
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    comparison: Optional[Dict[str, Any]] = None
+    is_amount: bool = True
+
+    def format_value(self, value: Optional[float] = None) -> str:
+        value = self.value if value is None else value
+        if value is None:
+            return "no data"
+        return f"₹{value:,.2f}" if self.is_amount else f"{int(value)}"
+
+    def describe(self) -> str:
+        """Plain-text rendering used when there is no template (grouped and comparison answers)."""
+        if self.comparison:
+            c = self.comparison
+            direction = "more" if c["difference"] >= 0 else "less"
+            pct = f" ({abs(c['percent_change']):.0f}%)" if c["percent_change"] is not None else ""
+            return (f"{self.format_value(c['current'])} vs {self.format_value(c['previous'])}: "
+                    f"{self.format_value(abs(c['difference']))} {direction}{pct}.")
+        if self.rows:
+            return "\n".join(f"- {row['key']}: {self.format_value(row['value'])}" for row in self.rows)
+        return self.format_value()
+
+
+class QueryEngine:
+    """Compiles an `ExpenseQuery` into a single aggregate SQL statement per period."""
+
+    def __init__(self, session: Session, user_id: int):
+        self.session = session
+        self.user_id = user_id
+
+    def run(self, query: ExpenseQuery) -> QueryResult:
+        if query.operation == "top_merchants":
+            rows = self._grouped(query.filters, "merchant", AGGREGATES["total_spend"][0](), query.limit)
+            return QueryResult(query.operation, rows=rows)
+
+        if query.operation == "compare_periods":
+            return self._compare(query)
+
+        aggregate, is_amount = AGGREGATES[query.operation]
+        if query.group_by:
+            rows = self._grouped(query.filters, query.group_by, aggregate(), query.limit)
+            return QueryResult(query.operation, rows=rows, is_amount=is_amount)
+
+        statement = self._apply_filters(select(aggregate()), query.filters)
+        value = self.session.exec(statement).one()
+        return QueryResult(query.operation, value=self._number(value), is_amount=is_amount)
+
+    def _compare(self, query: ExpenseQuery) -> QueryResult:
+        """Both period totals in one pass using conditional sums over the union of the ranges."""
+        f = query.filters
+        current = self._range_condition(f.start_date, f.end_date)
+        previous = self._range_condition(query.compare_start_date, query.compare_end_date)
+        outer = QueryFilters(
+            category_name=f.category_name, merchant_name=f.merchant_name, type=f.type,
+            start_date=min(f.start_date, query.compare_start_date),
+            end_date=max(f.end_date, query.compare_end_date),
+        )
+        statement = self._apply_filters(select(
+            func.coalesce(func.sum(case((current, Expense.amount), else_=0.0)), 0.0),
+            func.coalesce(func.sum(case((previous, Expense.amount), else_=0.0)), 0.0),
+        ), outer)
+        current_total, previous_total = (float(v) for v in self.session.exec(statement).one())
+
+        difference = current_total - previous_total
+        percent_change = (difference / previous_total * 100) if previous_total else None
+        return QueryResult(query.operation, value=current_total, comparison={
+            "current": current_total,
+            "previous": previous_total,
+            "difference": difference,
+            "percent_change": percent_change,
+        })
+
+    def _grouped(self, filters: QueryFilters, group_by: str, aggregate, limit: int) -> List[Dict[str, Any]]:
+        if group_by == "category":
+            key = func.coalesce(Category.name, literal(UNCATEGORIZED))
+            group_cols = [Category.name]
+        elif group_by == "merchant":
+            # Case-insensitive grouping, showing one of the original spellings
+            key = func.min(Expense.title)
+            group_cols = [func.lower(Expense.title)]
+        else:
+            key = month_bucket(self.session)
+            group_cols = [key]
+
+        statement = self._apply_filters(select(key.label("key"), aggregate.label("value")), filters, join_category=group_by == "category")
+        statement = statement.group_by(*group_cols)
+        if group_by == "month":
+            statement = statement.order_by(key)
+        else:
+            statement = statement.order_by(desc("value")).limit(limit)
+        return [{"key": k, "value": self._number(v)} for k, v in self.session.exec(statement)]
+
+    @staticmethod
+    def _range_condition(start: date, end: date):
+        return (Expense.date >= datetime.combine(start, datetime.min.time())) & \
+            (Expense.date < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+
+    def _apply_filters(self, statement, filters: QueryFilters, join_category: bool = False):
+        statement = statement.select_from(Expense).where(Expense.user_id == self.user_id, Expense.type == filters.type)
+        if join_category or filters.category_name:
+            statement = statement.outerjoin(Category, Expense.category_id == Category.id)
+        if filters.category_name:
+            statement = statement.where(func.lower(Category.name) == filters.category_name.lower())
+        if filters.merchant_name:
+            pattern = filters.merchant_name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            statement = statement.where(Expense.title.ilike(f"%{pattern}%", escape="\\"))
+        if filters.start_date:
+            statement = statement.where(Expense.date >= datetime.combine(filters.start_date, datetime.min.time()))
+        if filters.end_date:
+            statement = statement.where(Expense.date < datetime.combine(filters.end_date + timedelta(days=1), datetime.min.time()))
+        return statement
+
+    @staticmethod
+    def _number(value) -> Optional[float]:
+        return None if value is None else float(value)
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from backend.adapters.ai.llm_provider import CircuitOpenError
+from backend.adapters.ai.receipt_image import prepare_receipt_async
+from backend.adapters.ai.service import AIService
+from backend.adapters.ai.usage import QuotaExceededError
+from backend.api.schemas.all import ExpenseCreate
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def scan_receipts(service: AIService, uploads: List[Tuple[str, Callable[[], Awaitable[bytes]]]], grayscale: Optional[bool] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Scans several receipt images, given as (filename, read) pairs, yielding one result per image
+    as soon as it is ready (completion order, tagged with the upload `index`). At most
+    RECEIPT_BATCH_CONCURRENCY images are read, preprocessed and extracted at once, so only that
+    many raw uploads are held in memory.
+    """
+    # Loaded once, before any scan starts: concurrent worker threads must not share the request's session.
+    # Still a blocking DB read, so it runs on the threadpool rather than the event loop.
+    categories = await run_in_threadpool(service.get_category_choices)
+    semaphore = asyncio.Semaphore(settings.RECEIPT_BATCH_CONCURRENCY)
+
+    async def scan(index: int, filename: str, read: Callable[[], Awaitable[bytes]]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"index": index, "filename": filename}
+        try:
+            async with semaphore:
+                receipt = await prepare_receipt_async(await read(), grayscale=grayscale)
+                result["parsed"] = await run_in_threadpool(service.scan_receipt, receipt, categories)
+            result["status"] = "ok"
+        except QuotaExceededError as e:
+            result.update(status="quota_exceeded", error=str(e))
+        except CircuitOpenError as e:
+            result.update(status="unavailable", error=str(e))
+        except Exception as e:
+            logger.error(f"Batch receipt scan failed for user {service.user_id}, file {filename}: {e}")
+            result.update(status="error", error=str(e))
+        return result
+
+    tasks = [asyncio.create_task(scan(i, name, read)) for i, (name, read) in enumerate(uploads)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away: do not keep paying for extractions nobody will read
+        for task in tasks:
+            task.cancel()
+
+
+def receipt_to_expense(parsed: Dict[str, Any], category_ids: set) -> ExpenseCreate:
+    """Validates an extraction as an expense; raises ValueError if it cannot be saved as-is."""
+    try:
+        amount = float(parsed.get("amount"))
+    except (TypeError, ValueError):
+        raise ValueError("No total amount found on the receipt.")
+    if amount <= 0:
+        raise ValueError("No total amount found on the receipt.")
+
+    try:
+        date = datetime.strptime(str(parsed.get("date")), "%Y-%m-%d")
+    except ValueError:
+        date = datetime.utcnow()
+    category_id = parsed.get("category_id")
+    return ExpenseCreate(
+        title=(parsed.get("title") or "Receipt").strip()[:200],
+        amount=amount,
+        date=date,
+        category_id=category_id if category_id in category_ids else None,
+    )
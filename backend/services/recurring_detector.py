@@ -0,0 +1,159 @@
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from statistics import median
+from typing import Dict, Iterable, List, Optional, Tuple, Any
+
+# Tokens that carry no merchant identity ("POS 1234 NETFLIX.COM*AB12 PAYMENT" -> "netflix")
+_NOISE_TOKENS = {
+    "pos", "upi", "ach", "nach", "ecs", "debit", "credit", "card", "payment", "pmt", "purchase",
+    "txn", "ref", "autopay", "auto", "recurring", "online", "www", "com", "in", "co", "inc",
+    "ltd", "pvt", "llc", "the", "to", "for", "at", "of", "subscription", "monthly", "weekly",
+}
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+# Cadences we can turn into a RecurringExpense, with the interval window (days) that counts as a match.
+_CADENCES = {
+    "weekly": (7.0, 5.5, 8.5),
+    "monthly": (30.4, 26.0, 35.0),
+}
+
+MIN_OCCURRENCES = 3
+MIN_CONFIDENCE = 0.6
+
+
+def merchant_key(title: str) -> str:
+    """Normalises a transaction title into a stable merchant key."""
+    if not title:
+        return ""
+    text = title.lower()
+    text = re.sub(r"\(recurring\)", " ", text)
+    text = re.sub(r"[*#].*$", " ", text)  # "netflix.com*ab12cd" style processor suffixes
+    tokens = [t for t in _TOKEN_RE.findall(text) if t not in _NOISE_TOKENS and len(t) > 1]
+    return " ".join(tokens[:2])
+
+
+def _mad(values: List[float], center: float) -> float:
+    return median(abs(v - center) for v in values)
+
+
+@dataclass
+class _MerchantHistory:
+    key: str
+    titles: Counter = field(default_factory=Counter)
+    dates: List[datetime] = field(default_factory=list)
+    amounts: List[float] = field(default_factory=list)
+
+
+class RecurringDetector:
+    """
+    Deterministic subscription/bill detector.
+
+    Groups the full history by merchant key and scores each group on interval regularity
+    (median and MAD of the gaps between charges against weekly/monthly cadences) and
+    amount stability. Sorting dominates, so a run is O(n log n) in the number of rows.
+    """
+
+    def __init__(self, now: Optional[datetime] = None, min_confidence: float = MIN_CONFIDENCE):
+        self.now = now or datetime.utcnow()
+        self.min_confidence = min_confidence
+
+    def detect(
+        self,
+        transactions: Iterable[Tuple[str, float, datetime]],
+        tracked_titles: Iterable[str] = (),
+    ) -> List[Dict[str, Any]]:
+        tracked = {merchant_key(t) for t in tracked_titles}
+        groups: Dict[str, _MerchantHistory] = {}
+
+        for title, amount, date in transactions:
+            key = merchant_key(title)
+            if not key or key in tracked:
+                continue
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = _MerchantHistory(key)
+            group.titles[title.strip()] += 1
+            group.dates.append(date)
+            group.amounts.append(amount)
+
+        suggestions = []
+        for group in groups.values():
+            suggestion = self._score(group)
+            if suggestion and suggestion["confidence"] >= self.min_confidence:
+                suggestions.append(suggestion)
+
+        suggestions.sort(key=lambda s: s["confidence"], reverse=True)
+        return suggestions
+
+    def _score(self, group: _MerchantHistory) -> Optional[Dict[str, Any]]:
+        if len(group.dates) < MIN_OCCURRENCES:
+            return None
+
+        order = sorted(range(len(group.dates)), key=lambda i: group.dates[i])
+        dates = [group.dates[i] for i in order]
+        amounts = [group.amounts[i] for i in order]
+
+        # Collapse same-day duplicates (split payments, retries) into one charge
+        charges: List[Tuple[datetime, float]] = []
+        for date, amount in zip(dates, amounts):
+            if charges and (date.date() == charges[-1][0].date()):
+                charges[-1] = (charges[-1][0], charges[-1][1] + amount)
+            else:
+                charges.append((date, amount))
+        if len(charges) < MIN_OCCURRENCES:
+            return None
+
+        intervals = [(b[0] - a[0]).total_seconds() / 86400 for a, b in zip(charges, charges[1:])]
+        interval_median = median(intervals)
+        interval_mad = _mad(intervals, interval_median)
+
+        frequency = None
+        for name, (period, low, high) in _CADENCES.items():
+            if low <= interval_median <= high:
+                frequency = name
+                break
+        if frequency is None:
+            return None
+        period = _CADENCES[frequency][0]
+
+        # A subscription that stopped more than two cycles ago is not worth tracking
+        days_since_last = (self.now - charges[-1][0]).total_seconds() / 86400
+        if days_since_last > 2 * period:
+            return None
+
+        charge_amounts = [amount for _, amount in charges]
+        amount_median = median(charge_amounts)
+        if amount_median <= 0:
+            return None
+        amount_mad = _mad(charge_amounts, amount_median)
+
+        periodicity_score = max(0.0, 1.0 - interval_mad / (0.25 * period))
+        stability_score = max(0.0, 1.0 - (amount_mad / amount_median) / 0.2)
+        support_score = min(1.0, (len(charges) - 1) / 5.0)
+        confidence = 0.5 * periodicity_score + 0.3 * stability_score + 0.2 * support_score
+
+        # Latest price wins if it changed (e.g. a plan upgrade)
+        recent_amount = median(charge_amounts[-3:])
+        title = self._display_name(group)
+        reason = (
+            f"{len(charges)} payments of about {recent_amount:,.0f} every ~{interval_median:.0f} days, "
+            f"last on {charges[-1][0].strftime('%Y-%m-%d')}"
+        )
+
+        return {
+            "title": title,
+            "amount": round(recent_amount, 2),
+            "frequency": frequency,
+            "confidence": round(confidence, 2),
+            "reason": reason,
+        }
+
+    @staticmethod
+    def _display_name(group: _MerchantHistory) -> str:
+        raw = group.titles.most_common(1)[0][0]
+        cleaned = re.sub(r"\s*\(recurring\)\s*", " ", raw, flags=re.IGNORECASE)
+        cleaned = re.sub(r"[*#].*$", "", cleaned)
+        cleaned = re.sub(r"\.(com|net|in|io)\b", "", cleaned, flags=re.IGNORECASE).strip()
+        return cleaned or group.key.title()
@@ -0,0 +1,47 @@
+from typing import Any, Dict
+
+from sqlalchemy import event, inspect
+
+from backend.adapters.database.models import MonthlyReport
+
+GRADES = ("A", "B", "C", "D", "F")
+TEXT_FIELDS = ("leakage", "inflation_check", "action_item")
+MAX_TEXT_LENGTH = 1000
+
+
+class ReportAnalysisError(ValueError):
+    pass
+
+
+def validate_report_analysis(data: Any) -> Dict[str, Any]:
+    """
+    Checks a monthly audit payload and returns its normalised form: `grade` is one of A-F
+    (an optional +/- is dropped, so grades compare and index cleanly) and the text fields are
+    non-empty strings. Unknown keys are dropped.
+    """
+    if not isinstance(data, dict):
+        raise ReportAnalysisError("Report analysis must be an object")
+    grade = data.get("grade")
+    if not isinstance(grade, str) or not grade.strip() or grade.strip()[0].upper() not in GRADES or len(grade.strip().rstrip("+-")) != 1:
+        raise ReportAnalysisError(f"'grade' must be one of {', '.join(GRADES)}, got {grade!r}")
+
+    analysis = {"grade": grade.strip()[0].upper()}
+    for name in TEXT_FIELDS:
+        value = data.get(name)
+        if not isinstance(value, str) or not value.strip() or len(value) > MAX_TEXT_LENGTH:
+            raise ReportAnalysisError(f"'{name}' must be a non-empty string of at most {MAX_TEXT_LENGTH} characters")
+        analysis[name] = value.strip()
+    return analysis
+
+
+@event.listens_for(MonthlyReport, "before_insert")
+def _validate_on_insert(mapper, connection, target: MonthlyReport):
+    # Every ORM writer goes through these hooks, so malformed analysis never reaches the table
+    target.analysis = validate_report_analysis(target.analysis)
+
+
+@event.listens_for(MonthlyReport, "before_update")
+def _validate_on_update(mapper, connection, target: MonthlyReport):
+    # Rows migrated from the old text column may hold an empty analysis; only new values are checked
+    if inspect(target).attrs.analysis.history.has_changes():
+        target.analysis = validate_report_analysis(target.analysis)
@@ -1,6 +1,5 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-import json
 from sqlmodel import Session, select, func, desc
 from backend.adapters.database.models import MonthlyReport, Expense, Category
 from backend.adapters.ai.service import AIService
@@ -14,15 +13,34 @@ class ReportService:
         report = ai_service.generate_monthly_audit(month)
         if not report:
             return None
+        self.session.refresh(report) # expired by the commit; model_dump() does not reload
         return self._format_report_response(report)
 
-    def get_all_reports(self, user_id: int) -> List[Dict[str, Any]]:
-        reports = self.session.exec(
-            select(MonthlyReport)
-            .where(MonthlyReport.user_id == user_id)
-            .order_by(MonthlyReport.month.desc())
-        ).all()
-        return [self._format_report_response(r) for r in reports]
+    # Listing columns: everything except the analysis document
+    _SUMMARY_COLUMNS = (MonthlyReport.id, MonthlyReport.month, MonthlyReport.total_spent, MonthlyReport.total_income,
+                        MonthlyReport.savings_rate, MonthlyReport.created_at)
+
+    def list_reports(self, user_id: int, limit: int = 12, before: Optional[str] = None, include_analysis: bool = False) -> Dict[str, Any]:
+        """
+        One page of reports, newest month first. `before` (a YYYY-MM month, exclusive) continues
+        from the previous page's `next_before`. Analysis documents are only loaded when
+        `include_analysis` is set.
+        """
+        columns = (MonthlyReport,) if include_analysis else self._SUMMARY_COLUMNS
+        query = select(*columns).where(MonthlyReport.user_id == user_id)
+        if before:
+            query = query.where(MonthlyReport.month < before)
+        rows = self.session.exec(query.order_by(MonthlyReport.month.desc()).limit(limit + 1)).all()
+
+        page = rows[:limit]
+        if include_analysis:
+            items = [self._format_report_response(r) for r in page]
+        else:
+            items = [dict(zip((c.key for c in self._SUMMARY_COLUMNS), row)) for row in page]
+        return {
+            "items": items,
+            "next_before": items[-1]["month"] if len(rows) > limit else None,
+        }
 
     def get_latest_report(self, user_id: int) -> Optional[Dict[str, Any]]:
         report = self.session.exec(
@@ -46,13 +64,17 @@ class ReportService:
             return None
         return self._format_report_response(report)
 
+    def get_grade_history(self, user_id: int, limit: int = 12, grade: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Audit grade per month, newest first, read from the JSON column without loading the analysis."""
+        grade_column = MonthlyReport.analysis["grade"].as_string()
+        query = select(MonthlyReport.month, grade_column, MonthlyReport.savings_rate).where(MonthlyReport.user_id == user_id)
+        if grade:
+            query = query.where(grade_column == grade)
+        rows = self.session.exec(query.order_by(MonthlyReport.month.desc()).limit(limit)).all()
+        return [{"month": month, "grade": g, "savings_rate": savings_rate} for month, g, savings_rate in rows]
+
     def _format_report_response(self, report: MonthlyReport) -> Dict[str, Any]:
-        resp = report.model_dump()
-        try:
-            resp['analysis'] = json.loads(report.analysis)
-        except:
-            resp['analysis'] = {}
-        return resp
+        return report.model_dump()
 
     def get_monthly_stats_report(self, user_id: int, month: str) -> Dict[str, Any]:
         try:
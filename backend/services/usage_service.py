@@ -0,0 +1,63 @@
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from sqlmodel import Session
+
+from backend.adapters.ai.usage import quota_status
+from backend.adapters.database.repositories.llm_usage_repository import LLMUsageRepository
+
+logger = logging.getLogger(__name__)
+
+
+class UsageService:
+    """Aggregates the LLMUsage ledger for the per-user cost dashboard."""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.repository = LLMUsageRepository(session)
+
+    def get_summary(self, user_id: int, days: int = 30) -> Dict[str, Any]:
+        since = datetime.utcnow() - timedelta(days=days)
+        by_site: Dict[str, Dict[str, Any]] = {}
+        for call_site, model, calls, errors, prompt, completion, cost in self.repository.get_grouped_since(user_id, since):
+            site = by_site.setdefault(call_site, {
+                "call_site": call_site, "calls": 0, "errors": 0, "prompt_tokens": 0,
+                "completion_tokens": 0, "total_tokens": 0, "cost_usd": 0.0, "models": [],
+            })
+            model_totals = {
+                "model": model,
+                "calls": int(calls),
+                "errors": int(errors or 0),
+                "prompt_tokens": int(prompt or 0),
+                "completion_tokens": int(completion or 0),
+                "cost_usd": round(float(cost or 0), 6),
+            }
+            model_totals["total_tokens"] = model_totals["prompt_tokens"] + model_totals["completion_tokens"]
+            site["models"].append(model_totals)
+            for key in ("calls", "errors", "prompt_tokens", "completion_tokens", "total_tokens", "cost_usd"):
+                site[key] += model_totals[key]
+
+        call_sites = sorted(by_site.values(), key=lambda s: s["total_tokens"], reverse=True)
+        for site in call_sites:
+            site["cost_usd"] = round(site["cost_usd"], 6)
+            site["models"].sort(key=lambda m: m["total_tokens"], reverse=True)
+            site["latency_ms_p50"] = self._latency_percentile(user_id, since, site, 50)
+            site["latency_ms_p95"] = self._latency_percentile(user_id, since, site, 95)
+        return {
+            "days": days,
+            "totals": {
+                "calls": sum(s["calls"] for s in call_sites),
+                "total_tokens": sum(s["total_tokens"] for s in call_sites),
+                "cost_usd": round(sum(s["cost_usd"] for s in call_sites), 6),
+            },
+            "call_sites": call_sites,
+            "quota": quota_status(user_id),
+        }
+
+    def _latency_percentile(self, user_id: int, since: datetime, site: Dict[str, Any], pct: int) -> float:
+        """Nearest-rank percentile, read from the database one row at a time."""
+        rank = max(0, math.ceil(pct / 100 * site["calls"]) - 1)
+        latency = self.repository.get_latency_at_rank(user_id, since, site["call_site"], rank)
+        return round(float(latency or 0), 1)
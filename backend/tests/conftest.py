@@ -0,0 +1,64 @@
+"""
+Settings are read when backend.core.config is imported, so the environment is pointed at a
+throwaway database and ledger directory before any backend module loads.
+"""
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="expense-tests-")
+os.environ.update(
+    SECRET_KEY="test-secret",
+    DATABASE_URL=f"sqlite:///{_tmp}/test.db",
+    LEDGER_DATA_DIR=os.path.join(_tmp, "ledger"),
+    LOG_DIR=os.path.join(_tmp, "logs"),
+    LLM_FAKE_PROVIDER="true",
+    LLM_PRELOAD="false",
+    MAINTENANCE_ENABLED="false",
+    LITELLM_LOCAL_MODEL_COST_MAP="True",
+)
+os.environ.pop("DATABASE_READ_URL", None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from backend.adapters.database import models  # noqa: F401  (registers the tables)
+from backend.adapters.database.models import Category, User
+from backend.adapters.ledger.snapshot import get_snapshot_store
+
+
+@pytest.fixture
+def memory_engine():
+    """In-memory SQLite with the current schema, one connection shared by every session."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(memory_engine):
+    with Session(memory_engine) as session:
+        yield session
+
+
+@pytest.fixture
+def user(session):
+    user = User(email="user@example.com", full_name="Test User", password_hash="x")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    # Ids restart in every in-memory database; never read another test's snapshot
+    get_snapshot_store().drop(user.id)
+    return user
+
+
+@pytest.fixture
+def category(session, user):
+    category = Category(name="Food", user_id=user.id)
+    session.add(category)
+    session.commit()
+    session.refresh(category)
+    return category
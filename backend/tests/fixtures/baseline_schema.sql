@@ -0,0 +1,117 @@
+-- Schema SQLModel.metadata.create_all produced on SQLite at revision 5e9336781da9,
+-- before startup ran migrations: a legacy database has these tables and no alembic_version.
+
+CREATE TABLE user (
+	email VARCHAR NOT NULL,
+	full_name VARCHAR NOT NULL,
+	created_at DATETIME NOT NULL,
+	id INTEGER NOT NULL,
+	password_hash VARCHAR NOT NULL,
+	PRIMARY KEY (id)
+);
+
+CREATE UNIQUE INDEX ix_user_email ON user (email);
+
+CREATE TABLE category (
+	name VARCHAR NOT NULL,
+	color VARCHAR NOT NULL,
+	id INTEGER NOT NULL,
+	created_at DATETIME NOT NULL,
+	user_id INTEGER,
+	PRIMARY KEY (id),
+	CONSTRAINT unique_user_category_name UNIQUE (user_id, name),
+	FOREIGN KEY(user_id) REFERENCES user (id)
+);
+
+CREATE INDEX ix_category_name ON category (name);
+
+CREATE TABLE usersettings (
+	id INTEGER NOT NULL,
+	user_id INTEGER NOT NULL,
+	openai_api_key VARCHAR,
+	ai_provider VARCHAR NOT NULL,
+	PRIMARY KEY (id),
+	UNIQUE (user_id),
+	FOREIGN KEY(user_id) REFERENCES user (id)
+);
+
+CREATE TABLE aisuggestion (
+	id INTEGER NOT NULL,
+	user_id INTEGER NOT NULL,
+	content VARCHAR NOT NULL,
+	created_at DATETIME NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(user_id) REFERENCES user (id)
+);
+
+CREATE TABLE monthlyreport (
+	id INTEGER NOT NULL,
+	user_id INTEGER NOT NULL,
+	month VARCHAR NOT NULL,
+	total_spent FLOAT NOT NULL,
+	total_income FLOAT NOT NULL,
+	savings_rate FLOAT NOT NULL,
+	analysis VARCHAR NOT NULL,
+	created_at DATETIME NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(user_id) REFERENCES user (id)
+);
+
+CREATE TABLE expense (
+	title VARCHAR NOT NULL,
+	amount FLOAT NOT NULL,
+	category_id INTEGER,
+	type VARCHAR NOT NULL,
+	date DATETIME NOT NULL,
+	id INTEGER NOT NULL,
+	user_id INTEGER NOT NULL,
+	created_at DATETIME NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(category_id) REFERENCES category (id),
+	FOREIGN KEY(user_id) REFERENCES user (id)
+);
+
+CREATE TABLE budget (
+	category_id INTEGER NOT NULL,
+	amount FLOAT NOT NULL,
+	period VARCHAR NOT NULL,
+	id INTEGER NOT NULL,
+	user_id INTEGER NOT NULL,
+	created_at DATETIME NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(category_id) REFERENCES category (id),
+	FOREIGN KEY(user_id) REFERENCES user (id)
+);
+
+CREATE TABLE recurringexpense (
+	title VARCHAR NOT NULL,
+	amount FLOAT NOT NULL,
+	category_id INTEGER NOT NULL,
+	frequency VARCHAR NOT NULL,
+	next_due_date DATETIME NOT NULL,
+	is_active BOOLEAN NOT NULL,
+	id INTEGER NOT NULL,
+	user_id INTEGER NOT NULL,
+	last_generated DATETIME,
+	created_at DATETIME NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(category_id) REFERENCES category (id),
+	FOREIGN KEY(user_id) REFERENCES user (id)
+);
+
+CREATE TABLE challenge (
+	id INTEGER NOT NULL,
+	user_id INTEGER NOT NULL,
+	title VARCHAR NOT NULL,
+	description VARCHAR NOT NULL,
+	category_id INTEGER,
+	target_amount FLOAT NOT NULL,
+	current_amount FLOAT NOT NULL,
+	start_date DATETIME NOT NULL,
+	end_date DATETIME NOT NULL,
+	status VARCHAR NOT NULL,
+	created_at DATETIME NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(user_id) REFERENCES user (id),
+	FOREIGN KEY(category_id) REFERENCES category (id)
+);
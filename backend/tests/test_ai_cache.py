@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+from sqlmodel import select
+
+from backend.adapters.database.models import AICacheEntry
+from backend.adapters.database.repositories.ai_cache_repository import AICacheRepository
+from backend.services.maintenance import sweep_ai_cache
+
+
+def test_only_unexpired_entries_are_returned(session, user):
+    cache = AICacheRepository(session)
+    cache.put(user.id, "budget_alert", "1", "Slow down on food.", ttl_seconds=3600)
+    cache.put(user.id, "budget_alert", "2", "Old advice.", ttl_seconds=0)
+    cache.put(user.id, "other_kind", "1", "Not advice.", ttl_seconds=3600)
+
+    assert cache.get_values(user.id, "budget_alert") == {"1": "Slow down on food."}
+    assert cache.get_values(user.id + 1, "budget_alert") == {}
+
+
+def test_put_replaces_the_value_and_extends_the_expiry(session, user):
+    cache = AICacheRepository(session)
+    first = cache.put(user.id, "budget_alert", "1", "Old advice.", ttl_seconds=0)
+    expired_at = first.expires_at
+    cache.put(user.id, "budget_alert", "1", "New advice.", ttl_seconds=3600)
+
+    assert cache.get_values(user.id, "budget_alert") == {"1": "New advice."}
+    entries = session.exec(select(AICacheEntry)).all()
+    assert len(entries) == 1 and entries[0].expires_at > expired_at + timedelta(minutes=59)
+
+
+def test_sweeper_deletes_expired_entries(session, user):
+    cache = AICacheRepository(session)
+    cache.put(user.id, "budget_alert", "1", "Fresh.", ttl_seconds=3600)
+    for key in ("2", "3"):
+        cache.put(user.id, "budget_alert", key, "Stale.", ttl_seconds=-60)
+
+    assert sweep_ai_cache(session) == 2
+    assert [e.key for e in session.exec(select(AICacheEntry))] == ["1"]
+    assert sweep_ai_cache(session) == 0
+    assert cache.delete_expired(datetime.utcnow() + timedelta(hours=2)) == 1
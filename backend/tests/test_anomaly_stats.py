@@ -0,0 +1,136 @@
+import json
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend.adapters.database.models import Expense
+from backend.adapters.database.repositories.category_stats_repository import CategoryStatsRepository
+from backend.services.anomaly_service import AnomalyService, P2Quantile
+
+
+@pytest.fixture
+def amounts():
+    return np.random.default_rng(42).lognormal(mean=4.0, sigma=0.6, size=2000)
+
+
+def test_welford_matches_numpy(amounts):
+    state = {"count": 0, "mean": 0.0, "m2": 0.0, "quantile_state": "{}"}
+    for chunk in np.array_split(amounts, 37):  # uneven batches, like create_expenses
+        state = AnomalyService._folded(state["count"], state["mean"], state["m2"], state["quantile_state"], chunk.tolist())
+
+    logs = np.log1p(amounts)
+    assert state["count"] == len(amounts)
+    assert state["mean"] == pytest.approx(logs.mean(), rel=1e-12)
+    assert state["m2"] / (state["count"] - 1) == pytest.approx(logs.var(ddof=1), rel=1e-9)
+
+
+@pytest.mark.parametrize("p", [0.5, 0.95])
+def test_p2_quantile_tracks_numpy(amounts, p):
+    estimator = P2Quantile(p)
+    for amount in amounts:
+        estimator.add(float(amount))
+    assert estimator.value() == pytest.approx(np.quantile(amounts, p), rel=0.05)
+
+    restored = P2Quantile(p, json.loads(json.dumps(estimator.to_state())))
+    assert restored.value() == estimator.value()
+
+
+@pytest.mark.parametrize("p", [0.5, 0.95])
+def test_p2_from_sorted_keeps_tracking(amounts, p):
+    history, new = amounts[:500], amounts[500:]
+    estimator = P2Quantile.from_sorted(np.sort(history), p)
+    for amount in new:
+        estimator.add(float(amount))
+    assert estimator.value() == pytest.approx(np.quantile(amounts, p), rel=0.05)
+
+
+def test_p2_small_samples():
+    estimator = P2Quantile(0.5)
+    assert estimator.value() is None
+    for amount in (30.0, 10.0, 20.0):
+        estimator.add(amount)
+    assert estimator.value() == 20.0
+
+
+def _add_expenses(session, user, category, amounts):
+    start = datetime(2025, 1, 1)
+    expenses = [
+        Expense(user_id=user.id, title=f"e{i}", amount=float(a), category_id=category.id, date=start + timedelta(hours=i))
+        for i, a in enumerate(amounts)
+    ]
+    session.add_all(expenses)
+    session.commit()
+    return expenses
+
+
+def test_record_matches_rebuild(session, user, category, amounts):
+    service = AnomalyService(session)
+    repository = CategoryStatsRepository(session)
+    for start in range(0, 200, 25):
+        service.record(_add_expenses(session, user, category, amounts[start:start + 25]))
+    recorded = repository.get_for_category(user.id, category.id)
+    recorded = (recorded.count, recorded.mean, recorded.m2)
+
+    assert service.rebuild_stats(user.id) == 1
+    rebuilt = repository.get_for_category(user.id, category.id)
+    assert recorded[0] == rebuilt.count == 200
+    assert recorded[1] == pytest.approx(rebuilt.mean, rel=1e-12)
+    assert recorded[2] == pytest.approx(rebuilt.m2, rel=1e-9)
+
+
+def test_rebuild_forgets_deleted_expenses(session, user, category, amounts):
+    service = AnomalyService(session)
+    expenses = _add_expenses(session, user, category, amounts[:50])
+    service.record(expenses)
+
+    for expense in expenses[:10]:
+        session.delete(expense)
+    session.commit()
+    service.rebuild_stats(user.id, [category.id])
+
+    stats = CategoryStatsRepository(session).get_for_category(user.id, category.id)
+    logs = np.log1p(amounts[10:50])
+    assert stats.count == 40
+    assert stats.mean == pytest.approx(logs.mean())
+    assert math.sqrt(stats.m2 / (stats.count - 1)) == pytest.approx(logs.std(ddof=1))
+
+
+def test_score_flags_outlier(session, user, category, amounts):
+    service = AnomalyService(session)
+    service.record(_add_expenses(session, user, category, amounts[:100]))
+
+    typical = Expense(user_id=user.id, title="typical", amount=float(np.median(amounts)), category_id=category.id)
+    outlier = Expense(user_id=user.id, title="outlier", amount=float(amounts.max() * 20), category_id=category.id)
+    assert service.score(typical) is False
+    assert service.score(outlier) is True
+
+
+def test_update_rescores_the_edited_row(session, user, category, amounts):
+    from backend.api.schemas.all import ExpenseUpdate
+    from backend.services.expense_service import ExpenseService
+
+    AnomalyService(session).record(_add_expenses(session, user, category, amounts[:100]))
+    expense = _add_expenses(session, user, category, [float(np.median(amounts))])[0]
+    service = ExpenseService(session)
+
+    edited = service.update_expense(expense.id, ExpenseUpdate(amount=float(amounts.max() * 20)), user.id)
+    assert edited.is_anomaly is True
+    edited = service.update_expense(expense.id, ExpenseUpdate(amount=float(np.median(amounts))), user.id)
+    assert edited.is_anomaly is False
+    edited = service.update_expense(expense.id, ExpenseUpdate(title="renamed"), user.id)
+    assert edited.is_anomaly is False
+
+
+def test_import_builds_stats_for_imported_categories(session, user, amounts):
+    from backend.services.import_service import ImportService
+
+    lines = ["date,title,amount,category,type"]
+    lines += [f"2025-01-{i % 28 + 1:02d},Groceries,{a:.2f},Groceries,expense" for i, a in enumerate(amounts[:60])]
+    lines.append("2025-01-31,Salary,50000,Salary,income")
+    ImportService(session).process_import("\n".join(lines).encode(), user.id)
+
+    stats = {s.category_id: s for s in CategoryStatsRepository(session).get_for_user(user.id)}
+    assert [s.count for s in stats.values()] == [60]
+    assert next(iter(stats.values())).mean == pytest.approx(np.log1p(np.round(amounts[:60], 2)).mean())
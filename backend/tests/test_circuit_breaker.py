@@ -0,0 +1,99 @@
+import pytest
+
+from backend.adapters.ai import llm_provider
+from backend.adapters.ai.llm_provider import CircuitBreaker, CircuitOpenError, LiteLLMProvider, ModelRouter, circuit_breaker
+
+
+@pytest.fixture(autouse=True)
+def breakers(monkeypatch):
+    monkeypatch.setattr(llm_provider.settings, "LLM_BREAKER_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(llm_provider.settings, "LLM_BREAKER_RESET_SECONDS", 30)
+    monkeypatch.setattr(llm_provider.settings, "LLM_MODEL_TIERS", {"fast": ["local:llama", "mini"]})
+    monkeypatch.setattr(llm_provider.settings, "LLM_CALL_SITE_TIERS", {})
+    monkeypatch.setattr(llm_provider.settings, "LLM_DEFAULT_TIER", "fast")
+    monkeypatch.setattr(llm_provider.settings, "LLM_TIER_FALLBACKS", {})
+    monkeypatch.setattr(llm_provider.settings, "LLM_LOCAL_BASE_URL", "http://localhost:11434/v1")
+    monkeypatch.setattr(llm_provider, "model_router", ModelRouter())
+    monkeypatch.setattr(llm_provider, "_breakers", llm_provider.OrderedDict())
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_provider.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_breaker_opens_probes_and_closes(clock):
+    breaker = CircuitBreaker("test")
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock[0] += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()  # the probe
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock[0] += 30
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_local_and_hosted_models_have_separate_breakers(clock):
+    provider = LiteLLMProvider("sk-breaker-test")
+    tried = []
+
+    def complete_with(call_site, model, messages, **kwargs):
+        tried.append(model)
+        if model.startswith("local:"):
+            raise ConnectionError(model)
+        return "answer"
+
+    provider._complete_with = complete_with
+    for _ in range(2):
+        assert provider.generate_text("hi") == "answer"
+    local = circuit_breaker("sk-local", endpoint="http://localhost:11434/v1")
+    assert local.state == CircuitBreaker.OPEN
+    assert circuit_breaker("sk-breaker-test").state == CircuitBreaker.CLOSED
+
+    tried.clear()
+    assert provider.generate_text("hi") == "answer"
+    assert tried == ["mini"]  # the open local endpoint is skipped, not waited on
+    provider.ensure_available()
+
+
+def test_all_open_circuits_fail_fast(clock):
+    provider = LiteLLMProvider("sk-breaker-test")
+
+    def complete_with(call_site, model, messages, **kwargs):
+        raise TimeoutError(model)
+
+    provider._complete_with = complete_with
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            provider.generate_text("hi")  # one failure per endpoint per call, not per model
+    with pytest.raises(CircuitOpenError):
+        provider.ensure_available()
+    with pytest.raises(CircuitOpenError):
+        provider.generate_text("hi")
+
+
+def test_oldest_breakers_are_evicted(monkeypatch):
+    monkeypatch.setattr(llm_provider, "_BREAKERS_MAX_ENTRIES", 2)
+    first = circuit_breaker("sk-1")
+    circuit_breaker("sk-2")
+    assert circuit_breaker("sk-1") is first  # used again, so "sk-2" is now the oldest
+    circuit_breaker("sk-3")
+
+    assert circuit_breaker("sk-1") is first
+    assert len(llm_provider._breakers) == 2
+    assert (llm_provider.PROVIDER_ENDPOINT, llm_provider.key_fingerprint("sk-2")) not in llm_provider._breakers
@@ -0,0 +1,26 @@
+from datetime import date
+
+import pytest
+
+from backend.core.config import settings
+from backend.services.expense_parser import FOREIGN_CURRENCY_MAX_CONFIDENCE, ExpenseParser
+
+TODAY = date(2026, 10, 19)
+
+
+@pytest.fixture
+def parser():
+    return ExpenseParser([(1, "Food"), (2, "Transport")], [("Lunch", 1, 4), ("Uber", 2, 6)])
+
+
+def test_default_currency_is_accepted_locally(parser):
+    parsed = parser.parse("₹120 lunch yesterday", today=TODAY)
+    assert (parsed.amount, parsed.currency, parsed.category_id, parsed.date) == (120.0, "INR", 1, "2026-10-18")
+    assert parsed.confidence >= settings.NL_PARSE_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize("text, currency", [("$12 lunch", "USD"), ("lunch 10 euros", "EUR"), ("uber £8", "GBP")])
+def test_foreign_currency_is_not_accepted_locally(parser, text, currency):
+    parsed = parser.parse(text, today=TODAY)
+    assert parsed.currency == currency
+    assert parsed.confidence <= FOREIGN_CURRENCY_MAX_CONFIDENCE < settings.NL_PARSE_MIN_CONFIDENCE
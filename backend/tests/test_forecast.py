@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.adapters.database.models import Category, Expense, RecurringExpense
+from backend.services.forecast_service import HISTORY_DAYS, ForecastService
+
+NOW = datetime(2025, 3, 15, 12, 0)  # 16 full days left in March, plus half of today
+
+
+@pytest.fixture
+def rent(session, user):
+    category = Category(name="Rent", user_id=user.id)
+    session.add(category)
+    session.commit()
+    return category
+
+
+def _daily(session, user, category, amount, days=HISTORY_DAYS, weekdays=range(7)):
+    today = NOW.replace(hour=0, minute=0)
+    for age in range(1, days + 1):
+        day = today - timedelta(days=age)
+        if day.weekday() in weekdays:
+            session.add(Expense(user_id=user.id, title="Daily", amount=amount, category_id=category.id, date=day))
+    session.commit()
+
+
+def test_steady_spend_projects_the_daily_level(session, user, category):
+    _daily(session, user, category, 100.0)
+    forecast = ForecastService(session).forecast_month(user.id, [category.id], now=NOW)[category.id]
+
+    assert forecast.spent == pytest.approx(1400.0)
+    assert forecast.projected == pytest.approx(1400.0 + 100.0 * 16.5)
+    assert forecast.lower == pytest.approx(forecast.projected) == pytest.approx(forecast.upper)
+    assert forecast.days_remaining == 16
+
+
+def test_weekday_profile_shapes_the_projection(session, user, category, rent):
+    _daily(session, user, category, 100.0, weekdays=(5, 6))  # weekends only
+    _daily(session, user, rent, 100.0 * 2 / 7)  # same average, every day
+    forecasts = ForecastService(session).forecast_month(user.id, [category.id, rent.id], now=NOW)
+
+    # NOW is a Saturday: the 16.5 days left hold 5.5 weekend days, so about 550 more, against 16.5 / 7 * 200 for flat spend
+    weekend, flat = (forecasts[c].projected - forecasts[c].spent for c in (category.id, rent.id))
+    assert weekend == pytest.approx(550.0, rel=0.1)
+    assert flat == pytest.approx(16.5 * 200 / 7)
+    assert forecasts[category.id].upper > forecasts[category.id].projected
+
+
+def test_recurring_bills_are_scheduled_not_extrapolated(session, user, rent):
+    for month in (10, 11, 12):
+        session.add(Expense(user_id=user.id, title="Rent", amount=900.0, category_id=rent.id, date=datetime(2024, month, 20)))
+    for month in (1, 2):
+        session.add(Expense(user_id=user.id, title="Rent", amount=900.0, category_id=rent.id, date=datetime(2025, month, 20)))
+    session.add(RecurringExpense(user_id=user.id, title="Rent", amount=900.0, category_id=rent.id, next_due_date=datetime(2025, 3, 20)))
+    session.commit()
+
+    forecast = ForecastService(session).forecast_month(user.id, [rent.id], now=NOW)[rent.id]
+    assert forecast.recurring_due == 900.0
+    assert forecast.projected == pytest.approx(900.0)  # past rent is not also counted as daily spend
+    assert forecast.lower == pytest.approx(900.0)
+
+
+def test_categories_are_projected_independently(session, user, category, rent):
+    _daily(session, user, category, 100.0, days=40)
+    _daily(session, user, rent, 30.0, weekdays=(0,))
+    session.add(Expense(user_id=user.id, title="Misc", amount=55.0, date=NOW - timedelta(days=3)))
+    session.commit()
+
+    service = ForecastService(session)
+    together = service.forecast_month(user.id, [category.id, rent.id, None], now=NOW)
+    for category_id in (category.id, rent.id, None):
+        assert service.forecast_month(user.id, [category_id], now=NOW)[category_id] == together[category_id]
+    assert together[None].spent == 55.0
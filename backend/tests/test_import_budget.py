@@ -0,0 +1,28 @@
+"""CI gate for scripts/check_import_budget.py: each measurement is a fresh interpreter importing backend.main."""
+import os
+import sys
+from statistics import median
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from check_import_budget import DEFERRED_MODULES, measure  # noqa: E402
+
+BUDGET_SECONDS = float(os.environ.get("IMPORT_BUDGET_SECONDS", 2.0))
+RUNS = 3
+
+
+@pytest.fixture(scope="module")
+def runs():
+    return [measure("backend.main") for _ in range(RUNS)]
+
+
+def test_deferred_modules_are_not_imported(runs):
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    assert not loaded, f"imported eagerly by backend.main: {', '.join(loaded)} (load them on first use, see {DEFERRED_MODULES})"
+
+
+def test_import_time_within_budget(runs):
+    elapsed = median(run["seconds"] for run in runs)
+    assert elapsed <= BUDGET_SECONDS, f"import backend.main took {elapsed:.2f}s, budget {BUDGET_SECONDS:.2f}s (see scripts/profile_imports.py)"
@@ -0,0 +1,31 @@
+import re
+from datetime import date
+
+import pytest
+
+from backend.services.intent_parser import IntentParser
+
+TODAY = date(2026, 10, 19)
+DOCUMENTED_EXAMPLES = re.findall(r'"([^"]+)"', IntentParser.__doc__)
+
+
+@pytest.fixture
+def parser():
+    return IntentParser([(1, "Food"), (2, "Transport")], [("Uber", 2, 5), ("Swiggy", 1, 3)])
+
+
+@pytest.mark.parametrize("question", DOCUMENTED_EXAMPLES)
+def test_documented_examples_parse(parser, question):
+    assert parser.parse(question, today=TODAY) is not None
+
+
+def test_average_merchant_ride_since_month(parser):
+    params = parser.parse("average uber ride since january", today=TODAY)
+    assert params["operation"] == "average_spend"
+    assert params["filters"]["merchant_name"] == "uber"
+    assert (params["filters"]["start_date"], params["filters"]["end_date"]) == ("2026-01-01", "2026-10-19")
+    assert params["human_readable_answer_template"] == "Your average expense at Uber since January was {value}."
+
+
+def test_unknown_words_fall_back(parser):
+    assert parser.parse("average uber ride to the airport since january", today=TODAY) is None
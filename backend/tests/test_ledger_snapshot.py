@@ -0,0 +1,124 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from backend.adapters.database.models import Expense
+from backend.adapters.ledger.snapshot import (
+    DELTA_DTYPE, NO_CATEGORY, OP_DELETE, TYPE_CODES, LedgerSnapshotStore,
+)
+from backend.services.ledger_service import LedgerService
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LedgerSnapshotStore(str(tmp_path))
+
+
+def _rows(view):
+    return [(int(r["id"]), float(r["amount"]), int(r["category_id"]), int(r["type"])) for r in view.records]
+
+
+def test_snapshot_round_trip(store):
+    rows = [
+        (2, datetime(2025, 1, 2), 20.0, 5, "expense"),
+        (1, datetime(2025, 1, 1), 10.0, None, "income"),
+    ]
+    assert store.write_snapshot(7, rows) == 2
+
+    view = store.load(7)
+    assert _rows(view) == [(2, 20.0, 5, TYPE_CODES["expense"]), (1, 10.0, NO_CATEGORY, TYPE_CODES["income"])]
+    assert view.dates[0] == np.datetime64("2025-01-02T00:00:00")
+    assert isinstance(view.records, np.memmap)
+
+
+def test_delta_log_upserts_and_deletes(store):
+    store.write_snapshot(7, [
+        (1, datetime(2025, 1, 1), 10.0, 1, "expense"),
+        (2, datetime(2025, 1, 2), 20.0, 1, "expense"),
+        (3, datetime(2025, 1, 3), 30.0, 1, "expense"),
+    ])
+    before = store.version(7)
+
+    store.append_delta(7, [(4, datetime(2025, 1, 4), 40.0, 2, "expense")])
+    store.append_delta(7, [(2, datetime(2025, 1, 5), 25.0, 2, "expense")])  # edit moves it last
+    store.append_delta(7, [(3, datetime(2025, 1, 3), 30.0, 1, "expense")], op=OP_DELETE)
+    store.append_delta(7, [(4, datetime(2025, 1, 4), 45.0, 2, "expense")])  # last write wins
+
+    view = store.load(7)
+    assert [(i, a) for i, a, _, _ in _rows(view)] == [(1, 10.0), (4, 45.0), (2, 25.0)]
+    assert store.delta_rows(7) == 4
+    assert view.version != before
+
+
+def test_torn_delta_record_is_ignored(store):
+    store.write_snapshot(7, [(1, datetime(2025, 1, 1), 10.0, 1, "expense")])
+    store.append_delta(7, [(2, datetime(2025, 1, 2), 20.0, 1, "expense")])
+    with open(store.delta_path(7), "ab") as f:
+        f.write(b"\x01" * (DELTA_DTYPE.itemsize // 2))
+
+    assert [r[0] for r in _rows(store.load(7))] == [1, 2]
+
+
+def test_delta_without_snapshot_is_not_written(store):
+    store.append_delta(7, [(1, datetime(2025, 1, 1), 10.0, 1, "expense")])
+    assert store.load(7) is None
+    assert store.delta_rows(7) == 0
+
+
+def test_aborted_compaction_keeps_writes_in_order(store):
+    store.write_snapshot(7, [(1, datetime(2025, 1, 1), 10.0, 1, "expense")])
+    store.append_delta(7, [(1, datetime(2025, 1, 1), 11.0, 1, "expense")])
+    store.begin_compaction(7)
+    store.append_delta(7, [(1, datetime(2025, 1, 1), 12.0, 1, "expense")])  # written during the rebuild
+    store.abort_compaction(7)
+
+    assert _rows(store.load(7))[0][1] == 12.0
+    assert store.delta_rows(7) == 2
+
+
+def test_ledger_service_matches_database(session, user, category):
+    service = LedgerService(session)
+    first = Expense(user_id=user.id, title="Lunch", amount=12.5, category_id=category.id, date=datetime(2025, 3, 1))
+    session.add(first)
+    session.commit()
+    assert len(service.get_ledger(user.id)) == 1
+
+    second = Expense(user_id=user.id, title="Dinner", amount=30.0, category_id=category.id, date=datetime(2025, 3, 2))
+    session.add(second)
+    session.commit()
+    service.record_upsert(user.id, [second])
+    row = (first.id, first.date, first.amount, first.category_id, first.type)
+    session.delete(first)
+    session.commit()
+    service.record_delete(user.id, row)
+
+    patched = _rows(service.get_ledger(user.id))
+    service.rebuild(user.id)
+    assert patched == _rows(service.get_ledger(user.id)) == [(second.id, 30.0, category.id, TYPE_CODES["expense"])]
+
+
+def test_open_maps_are_capped_least_recently_used_first(tmp_path):
+    store = LedgerSnapshotStore(str(tmp_path), max_maps=2)
+    for user_id in (1, 2, 3):
+        store.write_snapshot(user_id, [(user_id, datetime(2025, 1, 1), float(user_id), 1, "expense")])
+    store.load(1)
+    held = store.load(2)
+    store.load(1)  # most recently used again
+    store.load(3)
+
+    assert list(store._maps) == [1, 3]
+    assert float(held.amounts[0]) == 2.0  # a view still in use keeps its mapping after eviction
+    assert _rows(store.load(2)) == [(2, 2.0, 1, TYPE_CODES["expense"])]
+
+
+def test_drop_all_removes_every_snapshot(store):
+    for user_id in (1, 2):
+        store.write_snapshot(user_id, [(user_id, datetime(2025, 1, 1), 1.0, 1, "expense")])
+        store.load(user_id)
+    store.append_delta(1, [(3, datetime(2025, 1, 2), 2.0, 1, "expense")])
+
+    store.drop_all()
+    assert store.load(1) is None and store.load(2) is None
+    assert store.delta_rows(1) == 0
+    assert not store._maps
@@ -0,0 +1,84 @@
+import pytest
+
+from backend.adapters.ai import llm_provider
+from backend.adapters.ai.llm_provider import LiteLLMProvider, ModelRouter
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(llm_provider.settings, "LLM_MODEL_TIERS", {
+        "fast": ["mini", "local:llama", "turbo"],
+        "smart": ["big", "mini"],
+        "vision": ["big"],
+    })
+    monkeypatch.setattr(llm_provider.settings, "LLM_CALL_SITE_TIERS", {"expense_parse": "fast", "monthly_audit": "smart"})
+    monkeypatch.setattr(llm_provider.settings, "LLM_DEFAULT_TIER", "vision")
+    monkeypatch.setattr(llm_provider.settings, "LLM_TIER_FALLBACKS", {"fast": "smart"})
+    monkeypatch.setattr(llm_provider.settings, "LLM_LOCAL_BASE_URL", None)
+    router = ModelRouter()
+    monkeypatch.setattr(llm_provider, "model_router", router)
+    return router
+
+
+def _fail(router, model, times=5):
+    for _ in range(times):
+        router.record(model, 100.0, ok=False)
+
+
+def test_tier_then_fallback_tier(router, monkeypatch):
+    assert router.candidates("expense_parse") == ["mini", "turbo", "big"]  # local skipped, "mini" not repeated
+    assert router.candidates("monthly_audit") == ["big", "mini"]
+    assert router.candidates("unknown_site") == ["big"]
+    assert router.candidates("expense_parse", model="pinned") == ["pinned"]
+
+    monkeypatch.setattr(llm_provider.settings, "LLM_LOCAL_BASE_URL", "http://localhost:11434/v1")
+    assert router.candidates("expense_parse") == ["mini", "local:llama", "turbo", "big"]
+
+
+def test_fallback_cycles_stop(router, monkeypatch):
+    monkeypatch.setattr(llm_provider.settings, "LLM_TIER_FALLBACKS", {"fast": "smart", "smart": "fast"})
+    assert router.candidates("monthly_audit") == ["big", "mini", "turbo"]
+
+
+def test_empty_tier_is_an_error(router, monkeypatch):
+    monkeypatch.setattr(llm_provider.settings, "LLM_MODEL_TIERS", {"fast": ["local:llama"]})
+    monkeypatch.setattr(llm_provider.settings, "LLM_TIER_FALLBACKS", {})
+    with pytest.raises(ValueError, match="No models configured"):
+        router.candidates("expense_parse")
+
+
+def test_failing_model_is_demoted_within_its_tier(router, monkeypatch):
+    _fail(router, "mini", times=4)
+    assert router.candidates("expense_parse")[0] == "mini"  # not enough calls to judge yet
+    _fail(router, "mini", times=1)
+    assert router.candidates("expense_parse") == ["turbo", "mini", "big"]
+    assert router.stats()["mini"] == {"calls": 5, "error_rate": 1.0, "latency_ms_p50": None, "latency_ms_p95": None, "healthy": False}
+
+    for _ in range(5):
+        router.record("mini", 100.0, ok=True)
+    assert router.candidates("expense_parse")[0] == "turbo"  # half of its recent calls failed
+    router.record("mini", 100.0, ok=True)
+    assert router.candidates("expense_parse")[0] == "mini"
+
+
+def test_demotion_expires_with_the_health_window(router, monkeypatch):
+    _fail(router, "mini")
+    assert router.candidates("expense_parse")[0] == "turbo"
+    monkeypatch.setattr(llm_provider, "HEALTH_WINDOW_SECONDS", 0)
+    assert router.candidates("expense_parse")[0] == "mini"
+    assert router.stats() == {}
+
+
+def test_provider_escalates_to_the_next_tier(router):
+    provider = LiteLLMProvider("sk-router-test")
+    tried = []
+
+    def complete_with(call_site, model, messages, **kwargs):
+        tried.append(model)
+        if model != "big":
+            raise TimeoutError(model)
+        return "answer"
+
+    provider._complete_with = complete_with
+    assert provider.generate_text("hi", call_site="expense_parse") == "answer"
+    assert tried == ["mini", "turbo", "big"]
@@ -0,0 +1,96 @@
+from datetime import date, datetime
+
+import pytest
+from sqlmodel import select
+
+from backend.adapters.database.models import Category, Expense
+from backend.services.query_engine import ExpenseQuery, QueryEngine, QueryValidationError, UNCATEGORIZED
+
+
+@pytest.fixture
+def engine(session, user, category):
+    transport = Category(name="Transport", user_id=user.id)
+    session.add(transport)
+    session.commit()
+    rows = [
+        ("Swiggy order", 200.0, category.id, datetime(2025, 1, 5), "expense"),
+        ("swiggy ORDER", 300.0, category.id, datetime(2025, 1, 20), "expense"),
+        ("Uber", 150.0, transport.id, datetime(2025, 1, 31, 23, 30), "expense"),
+        ("Uber", 50.0, transport.id, datetime(2025, 2, 1), "expense"),
+        ("100% cotton shirt", 999.0, None, datetime(2025, 2, 10), "expense"),
+        ("Salary", 50000.0, None, datetime(2025, 1, 1), "income"),
+    ]
+    session.add_all(Expense(user_id=user.id, title=t, amount=a, category_id=c, date=d, type=ty) for t, a, c, d, ty in rows)
+    session.add(Expense(user_id=user.id + 1, title="Uber", amount=1000.0, date=datetime(2025, 1, 10)))  # another user
+    session.commit()
+    return QueryEngine(session, user.id)
+
+
+def run(engine, **data):
+    return engine.run(ExpenseQuery.from_dict(data))
+
+
+@pytest.mark.parametrize("data, message", [
+    ({"operation": "drop_table"}, "Unsupported operation"),
+    ({"operation": "total_spend", "group_by": "user_id"}, "'group_by'"),
+    ({"operation": "top_merchants", "group_by": "month"}, "cannot be grouped"),
+    ({"operation": "total_spend", "limit": 500}, "'limit'"),
+    ({"operation": "total_spend", "filters": {"start_date": "01/02/2025"}}, "YYYY-MM-DD"),
+    ({"operation": "total_spend", "filters": {"start_date": "2025-02-01", "end_date": "2025-01-01"}}, "after"),
+    ({"operation": "total_spend", "filters": {"type": "transfer"}}, "'type'"),
+    ({"operation": "compare_periods", "filters": {"start_date": "2025-02-01", "end_date": "2025-02-28"}}, "both periods"),
+])
+def test_invalid_queries_are_rejected(data, message):
+    with pytest.raises(QueryValidationError, match=message):
+        ExpenseQuery.from_dict(data)
+
+
+def test_round_trips_through_dict():
+    query = ExpenseQuery.from_dict({"operation": "total_spend", "filters": {"start_date": "2025-01-01", "category_name": " Food "}})
+    assert query.filters.start_date == date(2025, 1, 1)
+    assert query.filters.category_name == "Food"
+    assert ExpenseQuery.from_dict(query.to_dict()) == query
+
+
+def test_scalar_aggregates_with_filters(engine):
+    assert run(engine, operation="total_spend").value == 1699.0
+    assert run(engine, operation="count_transactions", filters={"type": "income"}).value == 1
+    january = {"start_date": "2025-01-01", "end_date": "2025-01-31"}  # end date is inclusive
+    assert run(engine, operation="total_spend", filters=january).value == 650.0
+    assert run(engine, operation="max_spend", filters={"category_name": "food"}).value == 300.0
+    assert run(engine, operation="average_spend", filters={"merchant_name": "uber"}).value == 100.0
+
+
+def test_merchant_filter_is_a_literal_match(engine):
+    assert run(engine, operation="count_transactions", filters={"merchant_name": "100%"}).value == 1
+    assert run(engine, operation="count_transactions", filters={"merchant_name": "_"}).value == 0
+    assert run(engine, operation="total_spend", filters={"merchant_name": "'; DROP TABLE expense; --"}).value == 0.0
+    assert engine.session.exec(select(Expense)).first() is not None
+
+
+def test_category_filter_is_an_exact_match(engine):
+    assert run(engine, operation="count_transactions", filters={"category_name": "TRANSPORT"}).value == 2
+    for name in ("%", "F__d", "Trans%"):
+        assert run(engine, operation="count_transactions", filters={"category_name": name}).value == 0
+
+
+def test_grouped_queries(engine):
+    by_category = run(engine, operation="total_spend", group_by="category").rows
+    assert by_category == [
+        {"key": UNCATEGORIZED, "value": 999.0},
+        {"key": "Food", "value": 500.0},
+        {"key": "Transport", "value": 200.0},
+    ]
+    by_month = run(engine, operation="total_spend", group_by="month").rows
+    assert by_month == [{"key": "2025-01", "value": 650.0}, {"key": "2025-02", "value": 1049.0}]
+    merchants = run(engine, operation="top_merchants", limit=2).rows
+    assert [row["value"] for row in merchants] == [999.0, 500.0]
+    assert merchants[1]["key"].lower() == "swiggy order"
+
+
+def test_compare_periods(engine):
+    result = run(engine, operation="compare_periods",
+                 filters={"start_date": "2025-02-01", "end_date": "2025-02-28"},
+                 compare_start_date="2025-01-01", compare_end_date="2025-01-31")
+    assert result.comparison == {"current": 1049.0, "previous": 650.0, "difference": 399.0,
+                                 "percent_change": pytest.approx(399.0 / 650.0 * 100)}
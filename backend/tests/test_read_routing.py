@@ -0,0 +1,104 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from backend.adapters.database import session as db
+from backend.adapters.database.models import User
+from backend.api.deps import READ_USER_KEY, get_read_db
+from backend.core.security import create_access_token
+
+
+@pytest.fixture
+def primary(tmp_path, monkeypatch):
+    """Separate primary and replica databases, so every row says which one answered."""
+    engines = {}
+    for name in ("primary", "replica"):
+        engines[name] = create_engine(f"sqlite:///{tmp_path / name}.db")
+        SQLModel.metadata.create_all(engines[name])
+        with Session(engines[name]) as session:
+            session.add(User(email=f"{name}@example.com", full_name=name, password_hash="x"))
+            session.commit()
+    monkeypatch.setattr(db, "engine", engines["primary"])
+    monkeypatch.setattr(db, "read_engine", engines["replica"])
+    monkeypatch.setattr(db, "_recent_writes", {})
+    yield engines["primary"]
+    for engine in engines.values():
+        engine.dispose()
+
+
+def _names(session):
+    return session.exec(select(User.full_name)).all()
+
+
+def test_reads_go_to_the_replica(primary):
+    with db.read_session() as session:
+        assert session.get_bind() is db.read_engine
+        assert _names(session) == ["replica"]
+        with db.primary_reads(session):
+            assert _names(session) == ["primary"]
+        assert _names(session) == ["replica"]
+
+
+def test_plain_session_stays_on_the_primary(primary):
+    with db.RoutingSession(primary) as session:
+        assert _names(session) == ["primary"]
+
+
+def test_pending_changes_and_writes_route_to_the_primary(primary):
+    with db.read_session() as session:
+        user = session.exec(select(User)).one()
+        user.full_name = "edited"
+        assert session.get_bind() is primary  # dirty: autoflush must not hit the replica
+        session.rollback()
+
+        assert session.get_bind(clause=update(User).values(full_name="x")) is primary
+        assert session.get_bind() is db.read_engine
+
+        session.add(User(email="new@example.com", full_name="new", password_hash="x"))
+        session.commit()
+        assert session.info[db.WROTE_KEY]
+        assert sorted(_names(session)) == ["new", "primary"]  # read-your-writes for the rest of the session
+
+
+def test_recent_writer_reads_from_the_primary(primary, monkeypatch):
+    monkeypatch.setattr(db.settings, "DATABASE_READ_STICKY_SECONDS", 60.0)
+    with db.read_session() as session:
+        db.read_as_user(session, 1)
+        session.add(User(email="new@example.com", full_name="new", password_hash="x"))
+        session.commit()
+    assert db.wrote_recently(1)
+
+    with db.read_session() as session:
+        db.read_as_user(session, 1)
+        assert sorted(_names(session)) == ["new", "primary"]
+    with db.read_session() as session:
+        db.read_as_user(session, 2)
+        assert _names(session) == ["replica"]
+
+    monkeypatch.setattr(db.settings, "DATABASE_READ_STICKY_SECONDS", 0.0)
+    assert not db.wrote_recently(1)
+
+
+def _read_db(email):
+    dependency = get_read_db(create_access_token({"sub": email}))
+    return dependency, next(dependency)
+
+
+def test_read_dependency_loads_the_user_on_the_read_session(primary):
+    dependency, session = _read_db("replica@example.com")
+    assert session.info[READ_USER_KEY].full_name == "replica"
+    assert session.info[db.USER_KEY] == session.info[READ_USER_KEY].id
+    assert _names(session) == ["replica"]
+    dependency.close()
+
+
+def test_read_dependency_finds_users_not_yet_on_the_replica(primary):
+    dependency, session = _read_db("primary@example.com")
+    assert session.info[READ_USER_KEY].full_name == "primary"
+    assert _names(session) == ["replica"]  # only the lookup fell back to the primary
+    dependency.close()
+
+    with pytest.raises(HTTPException) as error:
+        _read_db("nobody@example.com")
+    assert error.value.status_code == 401
@@ -0,0 +1,94 @@
+import io
+import random
+
+import pytest
+from PIL import Image, ImageDraw
+
+from backend.adapters.ai import receipt_image
+from backend.adapters.ai.receipt_image import ReceiptImageError, _difference, get_cached_scan, prepare_receipt, store_scan
+from backend.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def scan_cache(monkeypatch):
+    monkeypatch.setattr(receipt_image, "_scan_cache", {})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(receipt_image.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _receipt(seed, shift=0, size=(1500, 2000)):
+    """A synthetic photo: white slip with random printed lines on a dark table."""
+    rng = random.Random(seed)
+    image = Image.new("RGB", (1500, 2000), (90, 70, 60))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((150 + shift, 100, 1350 + shift, 1900), fill="white")
+    for i in range(rng.randint(10, 35)):
+        draw.rectangle((200 + shift + rng.randint(0, 100), 150 + i * 48, 200 + shift + rng.randint(300, 1050), 175 + i * 48), fill="black")
+    return image.resize(size) if size != image.size else image
+
+
+def _jpeg(image, quality=90):
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=quality)
+    return out.getvalue()
+
+
+def test_photo_is_downscaled_and_recompressed():
+    prepared = prepare_receipt(_jpeg(_receipt(1)))
+    assert max(prepared.width, prepared.height) == settings.RECEIPT_MAX_LONG_EDGE
+    assert prepared.media_type == "image/jpeg"
+    assert Image.open(io.BytesIO(prepared.data)).size == (prepared.width, prepared.height)
+
+
+def test_unusable_uploads_are_rejected(monkeypatch):
+    with pytest.raises(ReceiptImageError, match="Could not read"):
+        prepare_receipt(b"not an image")
+    monkeypatch.setattr(settings, "RECEIPT_MAX_UPLOAD_BYTES", 100)
+    with pytest.raises(ReceiptImageError, match="too large"):
+        prepare_receipt(_jpeg(_receipt(1)))
+
+
+def test_fingerprint_matches_rescans_but_not_other_receipts():
+    original = prepare_receipt(_jpeg(_receipt(1))).fingerprint
+    rescans = [
+        prepare_receipt(_jpeg(_receipt(1), quality=60)).fingerprint,
+        prepare_receipt(_jpeg(_receipt(1, size=(1125, 1500)))).fingerprint,
+    ]
+    others = [prepare_receipt(_jpeg(_receipt(seed))).fingerprint for seed in (2, 3, 4)]
+
+    assert all(_difference(original, rescan) <= settings.RECEIPT_MATCH_MAX_DIFF for rescan in rescans)
+    assert all(_difference(original, other) > settings.RECEIPT_MATCH_MAX_DIFF for other in others)
+    assert prepare_receipt(_jpeg(Image.new("RGB", (800, 1000), "white"))).fingerprint is None
+
+
+def test_near_duplicate_scan_reuses_the_extraction(clock):
+    fingerprint = prepare_receipt(_jpeg(_receipt(1))).fingerprint
+    rescan = prepare_receipt(_jpeg(_receipt(1), quality=60)).fingerprint
+    store_scan(7, fingerprint, {"title": "Cafe", "amount": 120.0})
+
+    cached = get_cached_scan(7, rescan)
+    assert cached == {"title": "Cafe", "amount": 120.0}
+    cached["source"] = "cache"
+    assert "source" not in get_cached_scan(7, rescan)  # callers get a copy
+    assert get_cached_scan(8, rescan) is None  # per user
+
+    clock[0] += settings.RECEIPT_CACHE_TTL_SECONDS + 1
+    assert get_cached_scan(7, rescan) is None
+    assert not receipt_image._scan_cache[7]
+
+
+def test_each_user_keeps_the_most_recent_scans(monkeypatch):
+    monkeypatch.setattr(receipt_image, "_SCAN_CACHE_PER_USER", 2)
+    fingerprints = [prepare_receipt(_jpeg(_receipt(seed))).fingerprint for seed in (1, 2, 3)]
+    store_scan(7, fingerprints[0], {"title": "first"})
+    store_scan(7, fingerprints[1], {"title": "second"})
+    assert get_cached_scan(7, fingerprints[0])["title"] == "first"  # used again, so "second" is now the oldest
+    store_scan(7, fingerprints[2], {"title": "third"})
+
+    assert get_cached_scan(7, fingerprints[1]) is None
+    assert get_cached_scan(7, fingerprints[0])["title"] == "first"
@@ -0,0 +1,56 @@
+import json
+import os
+
+from alembic import command
+from sqlalchemy import text
+from sqlmodel import create_engine
+
+from backend.adapters.database import migrations
+
+BASELINE_SCHEMA = os.path.join(os.path.dirname(__file__), "fixtures", "baseline_schema.sql")
+BEFORE, REVISION = "d1e4b7c9a2f5", "e8b3f6a2d4c1"
+
+LEGACY_ANALYSIS = {
+    1: '{"grade": "B", "summary": "Fine"}',
+    2: "Grade: B. Spending was fine.",  # free text from before the analysis was validated
+    3: '["not", "an", "object"]',
+    4: "",
+}
+
+
+def _analysis(connection):
+    return dict(connection.execute(text("SELECT id, analysis FROM monthlyreport ORDER BY id")).all())
+
+
+def test_analysis_text_survives_upgrade_and_downgrade(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reports.db'}")
+    with open(BASELINE_SCHEMA) as f:
+        schema = f.read()
+    with engine.connect() as connection:
+        connection.connection.executescript(schema)
+        config = migrations.alembic_config(connection)
+        command.stamp(config, migrations.BASELINE_REVISION)
+        command.upgrade(config, BEFORE)
+        connection.execute(text("INSERT INTO user (id, email, full_name, password_hash, created_at) VALUES (1, 'a@example.com', 'A', 'x', '2024-01-01')"))
+        for report_id, analysis in LEGACY_ANALYSIS.items():
+            connection.execute(text(
+                "INSERT INTO monthlyreport (id, user_id, month, total_spent, total_income, savings_rate, analysis, created_at) "
+                "VALUES (:id, 1, :month, 0, 0, 0, :analysis, '2024-01-01')"
+            ), {"id": report_id, "month": f"2024-0{report_id}", "analysis": analysis})
+        connection.commit()
+
+        command.upgrade(config, REVISION)
+        upgraded = {report_id: json.loads(value) for report_id, value in _analysis(connection).items()}
+        assert upgraded == {
+            1: {"grade": "B", "summary": "Fine"},
+            2: {"raw": LEGACY_ANALYSIS[2]},
+            3: {"raw": LEGACY_ANALYSIS[3]},
+            4: {},
+        }
+
+        command.downgrade(config, BEFORE)
+        downgraded = _analysis(connection)
+        assert json.loads(downgraded[1]) == json.loads(LEGACY_ANALYSIS[1])
+        assert downgraded[2] == LEGACY_ANALYSIS[2]
+        assert downgraded[3] == LEGACY_ANALYSIS[3]
+        assert downgraded[4] == "{}"
@@ -0,0 +1,67 @@
+import os
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlmodel import create_engine
+
+from backend import init_db
+from backend.adapters.database import migrations
+
+BASELINE_SCHEMA = os.path.join(os.path.dirname(__file__), "fixtures", "baseline_schema.sql")
+
+
+def _engine(tmp_path, name):
+    return create_engine(f"sqlite:///{tmp_path / name}")
+
+
+def _legacy_database(tmp_path):
+    """A database as create_all used to leave it: the baseline schema, no alembic_version table."""
+    engine = _engine(tmp_path, "legacy.db")
+    with open(BASELINE_SCHEMA) as f:
+        schema = f.read()
+    with engine.connect() as connection:
+        connection.connection.executescript(schema)
+        connection.execute(text("INSERT INTO user (email, full_name, password_hash, created_at) VALUES ('old@example.com', 'Old', 'x', '2024-01-01')"))
+        connection.commit()
+    return engine
+
+
+def _columns(engine, table):
+    return {column["name"] for column in inspect(engine).get_columns(table)}
+
+
+def test_legacy_database_is_upgraded_from_baseline(tmp_path, monkeypatch):
+    engine = _legacy_database(tmp_path)
+    assert "is_anomaly" not in _columns(engine, "expense")
+
+    monkeypatch.setattr(init_db, "engine", engine)
+    init_db.prepare_database()
+
+    with engine.connect() as connection:
+        assert migrations.current_revisions(connection) == migrations.head_revisions()
+        assert connection.execute(text("SELECT email FROM user")).scalars().all() == ["old@example.com"]
+        assert connection.execute(text("SELECT count(*) FROM category")).scalar() > 0
+    assert "is_anomaly" in _columns(engine, "expense")
+    assert {"categorystats", "llmusage", "aicacheentry"} <= set(inspect(engine).get_table_names())
+
+
+def test_empty_database_is_created_at_head(tmp_path, monkeypatch):
+    engine = _engine(tmp_path, "empty.db")
+    monkeypatch.setattr(init_db, "engine", engine)
+    init_db.prepare_database()
+
+    with engine.connect() as connection:
+        assert migrations.current_revisions(connection) == migrations.head_revisions()
+    assert "is_anomaly" in _columns(engine, "expense")
+
+    init_db.prepare_database()  # already at head and seeded: nothing to do
+
+
+def test_check_mode_refuses_a_database_behind_head(tmp_path, monkeypatch):
+    engine = _legacy_database(tmp_path)
+    monkeypatch.setattr(init_db, "engine", engine)
+    monkeypatch.setattr(init_db.settings, "DB_STARTUP_MODE", "check")
+
+    with pytest.raises(RuntimeError, match="not at the latest revision"):
+        init_db.prepare_database()
+    assert "is_anomaly" not in _columns(engine, "expense")
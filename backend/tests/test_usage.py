@@ -0,0 +1,78 @@
+import time
+from datetime import datetime
+
+import pytest
+from sqlmodel import select
+
+from backend.adapters.ai import usage
+from backend.adapters.ai.usage import QuotaExceededError, UsageWriter, check_quota, quota_status, record_usage
+from backend.adapters.database.models import LLMUsage
+
+
+@pytest.fixture
+def writer(memory_engine, monkeypatch):
+    """A fresh writer on the test database, recording the size of every batch it writes."""
+    monkeypatch.setattr(usage, "engine", memory_engine)
+    monkeypatch.setattr(usage, "_daily", {})
+    writer = UsageWriter()
+    writer.batches = []
+    write = writer._write
+    writer._write = lambda batch: (writer.batches.append(len(batch)), write(batch))
+    monkeypatch.setattr(usage, "usage_writer", writer)
+    yield writer
+    writer.stop()
+
+
+def _row(user_id, tokens=10):
+    return {"user_id": user_id, "call_site": "test", "model": "mini", "prompt_tokens": tokens, "completion_tokens": 0, "created_at": datetime.utcnow()}
+
+
+def test_rows_are_written_in_batches(writer, session, user, monkeypatch):
+    monkeypatch.setattr(usage.settings, "LLM_USAGE_BATCH_SIZE", 3)
+    monkeypatch.setattr(usage.settings, "LLM_USAGE_FLUSH_SECONDS", 60.0)
+    for _ in range(7):
+        writer.submit(_row(user.id))
+    writer.stop()  # the last, partial batch is flushed on shutdown
+
+    assert writer.batches == [3, 3, 1]
+    assert len(session.exec(select(LLMUsage)).all()) == 7
+
+
+def test_partial_batch_is_flushed_after_the_interval(writer, session, user, monkeypatch):
+    monkeypatch.setattr(usage.settings, "LLM_USAGE_FLUSH_SECONDS", 0.05)
+    writer.submit(_row(user.id))
+    deadline = time.monotonic() + 5
+    while not writer.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.batches == [1]
+
+
+def test_daily_quotas_count_unflushed_calls(writer, user, monkeypatch):
+    monkeypatch.setattr(usage.settings, "LLM_DAILY_CALL_QUOTA", 2)
+    monkeypatch.setattr(usage.settings, "LLM_USAGE_FLUSH_SECONDS", 60.0)
+    check_quota(user.id)
+    record_usage(user.id, "test", "mini", 10, 5, 100.0)
+    check_quota(user.id)
+    record_usage(user.id, "test", "mini", 10, 5, 100.0)
+    with pytest.raises(QuotaExceededError, match="2 calls"):
+        check_quota(user.id)
+    check_quota(user.id + 1)  # per user
+    check_quota(None)  # calls not made for a user are never limited
+
+    # Another worker (no in-process count) sees the same usage once the rows are written
+    writer.stop()
+    monkeypatch.setattr(usage, "_daily", {})
+    assert quota_status(user.id)["calls_today"] == 2
+    with pytest.raises(QuotaExceededError):
+        check_quota(user.id)
+
+
+def test_token_quota(writer, user, monkeypatch):
+    monkeypatch.setattr(usage.settings, "LLM_DAILY_TOKEN_QUOTA", 100)
+    check_quota(user.id)  # as before every provider call
+    record_usage(user.id, "test", "mini", 60, 30, 100.0)
+    check_quota(user.id)
+    record_usage(user.id, "test", "mini", 5, 5, 100.0)
+    with pytest.raises(QuotaExceededError, match="100 tokens"):
+        check_quota(user.id)
+    assert quota_status(user.id)["tokens_today"] == 100
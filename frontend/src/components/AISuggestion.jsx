@@ -6,7 +6,7 @@ import { Link } from 'react-router-dom';
 import ReactMarkdown from 'react-markdown';
 import Card from './ui/Card';
 import Button from './ui/Button';
-import api from '../lib/api';
+import api, { streamEvents } from '../lib/api';
 
 export default function AISuggestion() {
     const [suggestion, setSuggestion] = useState(null);
@@ -40,16 +40,25 @@ export default function AISuggestion() {
     const handleGenerate = async () => {
         setLoading(true);
         setError(null);
+        let content = '';
         try {
-            const { data } = await api.post('/ai/generate');
-            if (data.suggestion) {
-                setSuggestion({ content: data.suggestion, created_at: new Date().toISOString() });
-            } else {
-                setSuggestion({ content: data.suggestion || data.message || "No suggestion generated.", created_at: new Date().toISOString() });
-            }
+            // Tokens are shown as they arrive; the spinner only covers time to first token
+            await streamEvents('/ai/generate/stream', {
+                onEvent: (event, data) => {
+                    if (event === 'token') {
+                        content += data.text;
+                        setLoading(false);
+                        setSuggestion({ content, created_at: new Date().toISOString() });
+                    } else if (event === 'done') {
+                        setSuggestion({ id: data.id, content, created_at: data.created_at || new Date().toISOString() });
+                    } else if (event === 'error') {
+                        throw new Error(data.detail);
+                    }
+                },
+            });
         } catch (err) {
             console.error(err);
-            setError("Failed to generate suggestion. Please try again.");
+            setError(err.message || "Failed to generate suggestion. Please try again.");
         } finally {
             setLoading(false);
         }
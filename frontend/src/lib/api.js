@@ -30,4 +30,46 @@ api.interceptors.response.use(
     }
 );
 
+/**
+ * POSTs (or GETs) a server-sent-events endpoint and calls onEvent(event, data) for each
+ * event as it arrives. axios cannot expose a streaming body in the browser, so this uses fetch.
+ */
+export async function streamEvents(path, { method = 'POST', onEvent, signal } = {}) {
+    const token = localStorage.getItem('token');
+    const response = await fetch(`${api.defaults.baseURL}${path}`, {
+        method,
+        signal,
+        headers: {
+            Accept: 'text/event-stream',
+            'ngrok-skip-browser-warning': 'true',
+            ...(token ? { Authorization: `Bearer ${token}` } : {}),
+        },
+    });
+    if (!response.ok) {
+        const body = await response.json().catch(() => ({}));
+        throw new Error(body.detail || `Request failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const raw = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message';
+            let data = '';
+            for (const line of raw.split('\n')) {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            }
+            onEvent(event, data ? JSON.parse(data) : {});
+        }
+    }
+}
+
 export default api;